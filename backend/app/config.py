@@ -18,7 +18,44 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str = ""
     
     # Storage Configuration
-    STORAGE_TYPE: str = "local"
+    STORAGE_TYPE: str = "local"  # "local" or "s3" (any S3-compatible service, e.g. MinIO)
+    S3_BUCKET: str = ""
+    S3_ENDPOINT_URL: str = ""  # Leave empty for AWS; e.g. http://localhost:9000 for MinIO
+    S3_REGION: str = ""
+    S3_ACCESS_KEY_ID: str = ""
+    S3_SECRET_ACCESS_KEY: str = ""
+    S3_PREFIX: str = ""  # Optional key prefix inside the bucket
+    S3_MULTIPART_CHUNK_MB: int = 8  # Part size for multipart uploads
+    S3_PRESIGN_DOWNLOADS: bool = True  # Redirect file downloads to presigned URLs
+    S3_PRESIGN_EXPIRES: int = 3600  # Presigned URL lifetime in seconds
+    S3_BLOB_GC_GRACE_SECONDS: int = 24 * 3600  # Bucket blobs younger than this are never garbage-collected
+    STORAGE_GC_INTERVAL_SECONDS: int = 6 * 3600  # Delete unreferenced upload blobs this often (0 = only via CLI)
+    
+    # Background Workers
+    WORKER_PROCESSES: int = 4  # Size of the shared process pool for CPU-bound jobs
+    OUTPUT_JOB_QUEUE_LIMIT: int = 32  # Max output generation jobs queued or running at once
+    PPT_PARALLEL_MIN_MODULES: int = 150  # Render deck modules in the pool from this many modules up (0 = never)
+    
+    # Generated output cache
+    OUTPUT_CACHE_MAX_BYTES: int = 2 * 1024 ** 3  # Evict least recently used cached decks/manuals beyond this size
+    
+    # Curriculum aggregates shared by the output generators
+    CURRICULUM_CACHE_SIZE: int = 64  # Curricula kept in memory (least recently used evicted)
+    CURRICULUM_CACHE_TTL_SECONDS: int = 60  # Cached curricula are reloaded after this long
+    
+    # Curriculum designs memoised by their inputs
+    DESIGN_CACHE_SIZE: int = 256  # Designs kept in memory (least recently used evicted)
+    
+    # Chat conversation state
+    CONVERSATION_STORE: str = "memory"  # "memory", or also persist to "mysql" (app database) / "sqlite"
+    CONVERSATION_SQLITE_PATH: str = "local_data/conversations.db"
+    CONVERSATION_CACHE_SIZE: int = 1000  # Conversations kept in memory (least recently used evicted)
+    CONVERSATION_TTL_SECONDS: int = 4 * 3600  # Idle conversations expire after this long
+    CONVERSATION_PURGE_INTERVAL_SECONDS: int = 3600  # Delete expired conversations this often (0 = never)
+    
+    # PDF Rendering
+    PDF_FONTS_DIR: str = ""  # Optional directory of .ttf files registered at first render
+    PDF_BODY_FONT: str = ""  # Registered font name to use for body text (default Helvetica)
     
     @property
     def cors_origins_list(self) -> List[str]:
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, Integer, Text, ForeignKey, JSON, DateTime
+from sqlalchemy import Column, String, Integer, Text, ForeignKey, JSON, DateTime, Index
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 import uuid
@@ -61,9 +62,16 @@ class Curriculum(Base):
     description = Column(Text)
     status = Column(String(50), default='draft')
     total_duration_minutes = Column(Integer)
+    client_key = Column(String(64), unique=True)  # Idempotency key of the save that created it
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    # Children are deleted by the database (ON DELETE CASCADE)
+    modules = relationship('CurriculumModule', back_populates='curriculum',
+                           order_by='CurriculumModule.sequence_order', passive_deletes=True)
+    scenarios = relationship('Scenario', back_populates='curriculum', passive_deletes=True)
+    outputs = relationship('Output', back_populates='curriculum', order_by='Output.created_at', passive_deletes=True)
+
 class CurriculumModule(Base):
     """Curriculum Modules Table - Stores modules within curricula"""
     __tablename__ = "curriculum_modules"
@@ -81,6 +89,8 @@ class CurriculumModule(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    curriculum = relationship('Curriculum', back_populates='modules')
+
 class Output(Base):
     """Outputs Table - Stores generated output files"""
     __tablename__ = "outputs"
@@ -92,9 +102,14 @@ class Output(Base):
     status = Column(String(50), default='pending')
     file_url = Column(Text)
     error_message = Column(Text)
+    started_at = Column(DateTime)
+    completed_at = Column(DateTime)
+    duration_ms = Column(Integer)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    curriculum = relationship('Curriculum', back_populates='outputs')
+
 class Scenario(Base):
     """Scenarios Table - Stores training scenarios"""
     __tablename__ = "scenarios"
@@ -111,6 +126,39 @@ class Scenario(Base):
     difficulty = Column(String(50))
     created_at = Column(DateTime, server_default=func.now())
 
+    curriculum = relationship('Curriculum', back_populates='scenarios')
+
+class QuestionBankItem(Base):
+    """Question Bank Table - Test questions indexed for blueprint assembly"""
+    __tablename__ = "question_bank"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    question = Column(Text, nullable=False)
+    type = Column(String(50), nullable=False)
+    options = Column(JSON)
+    correct_answer = Column(Text, nullable=False)
+    points = Column(Integer, default=4)
+    learning_objective = Column(String(255), nullable=False)
+    topic = Column(String(100), nullable=False)
+    difficulty = Column(String(50), nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        Index('idx_question_bank_topic_difficulty', 'topic', 'difficulty'),
+        Index('idx_question_bank_learning_objective', 'learning_objective'),
+    )
+
+class ChatConversation(Base):
+    """Chat Conversations Table - Persisted chat state (CONVERSATION_STORE=mysql/sqlite)"""
+    __tablename__ = "conversations"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    kind = Column(String(50), nullable=False)  # 'curriculum' or 'ppt'
+    owner_id = Column(String(36))  # RFP id (curriculum chat) or curriculum id (PPT chat)
+    context = Column(JSON)
+    history = Column(JSON)
+    updated_at = Column(DateTime, nullable=False, index=True)
+
 class BRD(Base):
     """Business Requirements Documents Table"""
     __tablename__ = "brds"
@@ -4,9 +4,13 @@ from app.config import settings
 from app.routers import mysql_api, curriculum, outputs, rfp, curriculum_chat, brd, ppt_chat
 from app.database import engine
 from app.db_models import Base
+from app.migrations import apply_migrations
+from app.services.worker_pool import get_process_pool, shutdown_process_pool
+from app.services.maintenance import start_maintenance, stop_maintenance
 
-# Create all database tables
+# Create all database tables, then add columns introduced since they were created
 Base.metadata.create_all(bind=engine)
+apply_migrations(engine)
 
 app = FastAPI(
     title="GTA CPR Curriculum API",
@@ -34,6 +38,17 @@ app.include_router(curriculum_chat.router, prefix="/api/curriculum", tags=["Conv
 app.include_router(outputs.router, prefix="/api/outputs", tags=["Output Generation"])
 app.include_router(ppt_chat.router, prefix="/api/outputs", tags=["PowerPoint Chat"])
 
+@app.on_event("startup")
+async def startup():
+    # Fork pool workers before request and job threads exist
+    get_process_pool()
+    start_maintenance()
+
+@app.on_event("shutdown")
+async def shutdown():
+    stop_maintenance()
+    shutdown_process_pool()
+
 @app.get("/")
 async def root():
     return {
@@ -0,0 +1,69 @@
+"""
+Startup schema migrations
+create_all() only creates missing tables, so columns added to existing
+tables (and data changes they need) are applied here. Every step checks the
+live schema or data first, so running it on each start is a no-op once done.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+# (table, column, column DDL) added after the table first shipped
+ADDED_COLUMNS = [
+    ('outputs', 'started_at', 'DATETIME NULL'),
+    ('outputs', 'completed_at', 'DATETIME NULL'),
+    ('outputs', 'duration_ms', 'INT'),
+    ('curricula', 'client_key', 'VARCHAR(64)'),
+]
+
+# (table, column, index name) for unique columns in ADDED_COLUMNS
+ADDED_UNIQUE_INDEXES = [
+    ('curricula', 'client_key', 'uq_curricula_client_key'),
+]
+
+# Output statuses written before generation became a background job
+LEGACY_OUTPUT_STATUSES = {
+    'generating': 'running',
+    'ready': 'completed',
+    'error': 'failed',
+}
+
+
+def _add_missing_columns(conn, inspector):
+    """ALTER TABLE ... ADD COLUMN for every model column the table lacks"""
+    existing = {}
+    for table, column, ddl in ADDED_COLUMNS:
+        if table not in existing:
+            existing[table] = {c['name'] for c in inspector.get_columns(table)}
+        if column not in existing[table]:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+            print(f"[MIGRATIONS] Added column {table}.{column}")
+
+
+def _add_missing_unique_indexes(conn, inspector):
+    """CREATE UNIQUE INDEX unless the column is already unique under any name"""
+    for table, column, name in ADDED_UNIQUE_INDEXES:
+        unique = [index['column_names'] for index in inspector.get_indexes(table) if index['unique']]
+        unique += [constraint['column_names'] for constraint in inspector.get_unique_constraints(table)]
+        if [column] not in unique:
+            conn.execute(text(f"CREATE UNIQUE INDEX {name} ON {table} ({column})"))
+            print(f"[MIGRATIONS] Added unique index {table}.{column}")
+
+
+def _rename_output_statuses(conn):
+    """Move outputs still carrying the old status names to the job statuses"""
+    cases = ' '.join(f"WHEN '{old}' THEN '{new}'" for old, new in LEGACY_OUTPUT_STATUSES.items())
+    legacy = ', '.join(f"'{old}'" for old in LEGACY_OUTPUT_STATUSES)
+    result = conn.execute(text(
+        f"UPDATE outputs SET status = CASE status {cases} END WHERE status IN ({legacy})"
+    ))
+    if result.rowcount:
+        print(f"[MIGRATIONS] Renamed legacy status on {result.rowcount} outputs")
+
+
+def apply_migrations(engine: Engine):
+    """Bring an existing database up to the current models (run after create_all)"""
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        _add_missing_columns(conn, inspector)
+        _add_missing_unique_indexes(conn, inspector)
+        _rename_output_statuses(conn)
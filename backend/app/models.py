@@ -62,6 +62,16 @@ class GenerateCurriculumRequest(BaseModel):
     rfp_id: str
     clause_ids: List[str]
     standard_ids: List[str]
+    duration_minutes: int = 480
+    audience: str = "General"
+
+class DesignVariantsRequest(BaseModel):
+    rfp_id: str
+    durations_minutes: List[int]  # Grid of course lengths, e.g. [240, 480, 960]
+    audiences: List[str]
+    clause_ids: Optional[List[str]] = None  # Defaults to the RFP's MUST clauses
+    title: Optional[str] = None  # Defaults to the RFP title
+    include_designs: bool = False  # Also return every full design, not just the comparison
 
 class GenerateCurriculumResponse(BaseModel):
     success: bool
@@ -73,6 +83,26 @@ class GenerateCurriculumResponse(BaseModel):
 class GenerateOutputRequest(BaseModel):
     curriculum_id: str
     count: Optional[int] = None
+    customizations: Optional[Dict[str, Any]] = None  # e.g. theme / color_scheme from ppt-chat
+
+class GenerateScenariosRequest(BaseModel):
+    curriculum_id: str
+    count: Optional[int] = None
+    seed: Optional[int] = None  # Defaults to one derived from the curriculum id
+    persist: bool = False  # Also insert the scenarios into the scenarios table
+
+class GenerateTestRequest(BaseModel):
+    curriculum_id: str
+    count: Optional[int] = None
+    forms: int = 1  # Parallel forms drawn from the same blueprint
+    seed: Optional[int] = None  # Defaults to one derived from the curriculum id
+    difficulty: Optional[str] = None  # beginner, intermediate or advanced
+
+class GenerateDeliverablesRequest(BaseModel):
+    curriculum_id: str
+    scenario_count: int = 5
+    question_count: int = 25
+    customizations: Optional[Dict[str, Any]] = None
 
 class Scenario(BaseModel):
     title: str
@@ -92,3 +122,8 @@ class TestQuestion(BaseModel):
     points: int
     learning_objective: str
 
+class QuestionBankEntry(TestQuestion):
+    points: int = 4
+    topic: Optional[str] = None  # Derived from the learning objective when omitted
+    difficulty: Optional[str] = None
+
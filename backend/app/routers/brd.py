@@ -1,20 +1,42 @@
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import FileResponse, StreamingResponse, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
+from collections import defaultdict
+import asyncio
+import hashlib
+import json
 import os
+import time
 from datetime import datetime
 
-from app.database import get_db
-from app.db_models import RFP, Clause, BRD
-from app.services.brd_extractor import brd_extractor
+from app.database import get_db, SessionLocal
+from app.db_models import RFP, Clause, BRD, generate_uuid
+from app.services.brd_extractor import brd_extractor, extract_brd_from_rows
+from app.services.worker_pool import get_process_pool
+from app.services.local_storage import storage
+from app.services.generators.pdf_generator import render_brd_pdf
 
 router = APIRouter()
 
+# BRD columns produced by the extractor
+BRD_FIELDS = [
+    'executive_summary', 'business_objectives', 'functional_requirements',
+    'non_functional_requirements', 'scope', 'stakeholders', 'success_criteria',
+    'constraints', 'assumptions'
+]
+
+# Bump when the BRD PDF layout changes so cached renders are invalidated
+BRD_PDF_VERSION = 1
+
 class GenerateBRDRequest(BaseModel):
     rfp_id: str
 
+class BatchGenerateBRDRequest(BaseModel):
+    rfp_ids: List[str] = []
+    all_parsed: bool = False  # Regenerate for every parsed RFP instead of rfp_ids
+
 @router.get("/brd")
 async def get_all_brds(db: Session = Depends(get_db)):
     """Get all BRDs"""
@@ -52,15 +74,15 @@ async def generate_brd(request: GenerateBRDRequest, db: Session = Depends(get_db
             # Update existing
             brd_data = brd_extractor.extract_from_rfp(rfp, clauses)
             
-            existing_brd.executive_summary = brd_data['executive_summary']
-            existing_brd.business_objectives = brd_data['business_objectives']
-            existing_brd.functional_requirements = brd_data['functional_requirements']
-            existing_brd.non_functional_requirements = brd_data['non_functional_requirements']
-            existing_brd.scope = brd_data['scope']
-            existing_brd.stakeholders = brd_data['stakeholders']
-            existing_brd.success_criteria = brd_data['success_criteria']
-            existing_brd.constraints = brd_data['constraints']
-            existing_brd.assumptions = brd_data['assumptions']
+            existing_brd.executive_summary = brd_data.executive_summary
+            existing_brd.business_objectives = brd_data.business_objectives
+            existing_brd.functional_requirements = brd_data.functional_requirements
+            existing_brd.non_functional_requirements = brd_data.non_functional_requirements
+            existing_brd.scope = brd_data.scope
+            existing_brd.stakeholders = brd_data.stakeholders
+            existing_brd.success_criteria = brd_data.success_criteria
+            existing_brd.constraints = brd_data.constraints
+            existing_brd.assumptions = brd_data.assumptions
             
             db.commit()
             db.refresh(existing_brd)
@@ -74,15 +96,15 @@ async def generate_brd(request: GenerateBRDRequest, db: Session = Depends(get_db
         brd = BRD(
             rfp_id=request.rfp_id,
             rfp_title=rfp.title,
-            executive_summary=brd_data['executive_summary'],
-            business_objectives=brd_data['business_objectives'],
-            functional_requirements=brd_data['functional_requirements'],
-            non_functional_requirements=brd_data['non_functional_requirements'],
-            scope=brd_data['scope'],
-            stakeholders=brd_data['stakeholders'],
-            success_criteria=brd_data['success_criteria'],
-            constraints=brd_data['constraints'],
-            assumptions=brd_data['assumptions']
+            executive_summary=brd_data.executive_summary,
+            business_objectives=brd_data.business_objectives,
+            functional_requirements=brd_data.functional_requirements,
+            non_functional_requirements=brd_data.non_functional_requirements,
+            scope=brd_data.scope,
+            stakeholders=brd_data.stakeholders,
+            success_criteria=brd_data.success_criteria,
+            constraints=brd_data.constraints,
+            assumptions=brd_data.assumptions
         )
         
         db.add(brd)
@@ -94,18 +116,179 @@ async def generate_brd(request: GenerateBRDRequest, db: Session = Depends(get_db
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/brd/generate-batch")
+async def generate_brd_batch(request: BatchGenerateBRDRequest, db: Session = Depends(get_db)):
+    """
+    Generate BRDs for many RFPs at once
+    Loads RFPs, clauses and existing BRDs in one query each, extracts in the
+    shared process pool and upserts in bulk. Progress is streamed as
+    newline-delimited JSON: 'extracted' per RFP as extraction finishes, then
+    'created' / 'updated' (or 'failed') per RFP once the upsert has committed,
+    followed by a summary.
+    """
+    if not request.all_parsed and not request.rfp_ids:
+        raise HTTPException(status_code=400, detail="Provide rfp_ids or set all_parsed")
+    
+    rfp_query = db.query(RFP.id, RFP.title, RFP.organization)
+    if request.all_parsed:
+        rfp_query = rfp_query.filter(RFP.status == 'parsed')
+    else:
+        rfp_query = rfp_query.filter(RFP.id.in_(request.rfp_ids))
+    rfps = rfp_query.all()
+    rfp_ids = [rfp.id for rfp in rfps]
+    
+    # One query for all clauses, grouped by RFP
+    clauses_by_rfp = defaultdict(list)
+    if rfp_ids:
+        clause_rows = (
+            db.query(Clause.rfp_id, Clause.text, Clause.category, Clause.priority)
+            .filter(Clause.rfp_id.in_(rfp_ids))
+            .all()
+        )
+        for rfp_id, text, category, priority in clause_rows:
+            clauses_by_rfp[rfp_id].append((text, category, priority))
+        
+        existing_brds = dict(
+            db.query(BRD.rfp_id, BRD.id).filter(BRD.rfp_id.in_(rfp_ids)).all()
+        )
+    else:
+        existing_brds = {}
+    
+    missing_ids = [] if request.all_parsed else sorted(set(request.rfp_ids) - set(rfp_ids))
+    
+    async def run_batch():
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        pool = get_process_pool()
+        
+        for rfp_id in missing_ids:
+            yield json.dumps({'rfp_id': rfp_id, 'status': 'failed', 'error': 'RFP not found'}) + "\n"
+        
+        async def extract(rfp):
+            rfp_fields = {'title': rfp.title, 'organization': rfp.organization}
+            try:
+                data = await loop.run_in_executor(
+                    pool, extract_brd_from_rows, rfp_fields, clauses_by_rfp[rfp.id]
+                )
+            except Exception as e:
+                return rfp, None, e
+            return rfp, data, None
+        
+        tasks = []
+        for rfp in rfps:
+            if clauses_by_rfp.get(rfp.id):
+                tasks.append(extract(rfp))
+            else:
+                yield json.dumps({'rfp_id': rfp.id, 'status': 'skipped',
+                                  'error': 'No clauses found. Please parse the RFP first.'}) + "\n"
+        
+        inserts = []
+        updates = []
+        failed = 0
+        for task in asyncio.as_completed(tasks):
+            rfp, brd_data, error = await task
+            if error is not None:
+                failed += 1
+                yield json.dumps({'rfp_id': rfp.id, 'status': 'failed', 'error': str(error)}) + "\n"
+                continue
+            
+            row = {field: getattr(brd_data, field) for field in BRD_FIELDS}
+            if rfp.id in existing_brds:
+                row['id'] = existing_brds[rfp.id]
+                updates.append(row)
+            else:
+                row.update(id=generate_uuid(), rfp_id=rfp.id, rfp_title=rfp.title)
+                inserts.append(row)
+            # Not saved yet: created / updated are only reported after the commit
+            yield json.dumps({'rfp_id': rfp.id, 'brd_id': row['id'], 'status': 'extracted'}) + "\n"
+        
+        rfp_id_by_brd = {brd_id: rfp_id for rfp_id, brd_id in existing_brds.items()}
+        saved = [(row['rfp_id'], row['id'], 'created') for row in inserts]
+        saved += [(rfp_id_by_brd[row['id']], row['id'], 'updated') for row in updates]
+        
+        # Bulk upsert in one transaction on a dedicated session
+        session = SessionLocal()
+        save_error = None
+        try:
+            if inserts:
+                session.bulk_insert_mappings(BRD, inserts)
+            if updates:
+                session.bulk_update_mappings(BRD, updates)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            save_error = e
+        finally:
+            session.close()
+        
+        for rfp_id, brd_id, status in saved:
+            if save_error is None:
+                yield json.dumps({'rfp_id': rfp_id, 'brd_id': brd_id, 'status': status}) + "\n"
+            else:
+                yield json.dumps({'rfp_id': rfp_id, 'brd_id': brd_id, 'status': 'failed',
+                                  'error': f"Save failed: {save_error}"}) + "\n"
+        if save_error is not None:
+            failed += len(saved)
+            inserts = updates = []
+        
+        yield json.dumps({
+            'status': 'done',
+            'created': len(inserts),
+            'updated': len(updates),
+            'skipped': len(rfps) - len(tasks),
+            'failed': failed + len(missing_ids),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000)
+        }) + "\n"
+    
+    return StreamingResponse(run_batch(), media_type="application/x-ndjson")
+
 @router.get("/brd/{brd_id}/download")
-async def download_brd(brd_id: str, db: Session = Depends(get_db)):
+async def download_brd(brd_id: str, request: Request, db: Session = Depends(get_db)):
     """
     Download BRD as PDF
+    Renders are cached by BRD content hash and revalidated with ETag /
+    If-None-Match, so the PDF is only rebuilt when the BRD changes.
     """
     brd = db.query(BRD).filter(BRD.id == brd_id).first()
     if not brd:
         raise HTTPException(status_code=404, detail="BRD not found")
     
-    # TODO: Generate PDF from BRD data
-    # For now, return JSON
-    return brd_to_dict(brd)
+    brd_data = brd_to_dict(brd)
+    content_hash = brd_content_hash(brd_data)
+    etag = f'"{content_hash}"'
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    
+    if etag in request.headers.get('if-none-match', ''):
+        return Response(status_code=304, headers=headers)
+    
+    filename = f"brd_{brd_id}_{content_hash[:16]}.pdf"
+    file_path = storage.get_file_path(f"/files/outputs/brds/{filename}")
+    
+    if not os.path.exists(file_path):
+        try:
+            loop = asyncio.get_running_loop()
+            pdf_bytes = await loop.run_in_executor(get_process_pool(), render_brd_pdf, brd_data)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to render BRD PDF: {e}")
+        
+        file_path = storage.save_output(pdf_bytes, filename, 'brds')['path']
+        # Drop renders of previous BRD versions
+        storage.prune_outputs('brds', f"brd_{brd_id}_", keep=filename)
+    
+    return FileResponse(
+        file_path,
+        media_type='application/pdf',
+        filename=f"BRD - {brd.rfp_title}.pdf",
+        headers=headers
+    )
+
+def brd_content_hash(brd_data: dict) -> str:
+    """Stable hash of the BRD fields that appear in the rendered PDF"""
+    content = {field: brd_data.get(field) for field in BRD_FIELDS}
+    content['rfp_title'] = brd_data.get('rfp_title')
+    content['version'] = BRD_PDF_VERSION
+    payload = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
 
 def brd_to_dict(brd: BRD) -> dict:
     """Convert BRD model to dictionary"""
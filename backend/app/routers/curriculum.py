@@ -1,28 +1,95 @@
-from fastapi import APIRouter, HTTPException
-from app.models import GenerateCurriculumRequest, GenerateCurriculumResponse
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.db_models import RFP, Clause
+from app.models import GenerateCurriculumRequest, GenerateCurriculumResponse, DesignVariantsRequest
 from app.services.curriculum_engine import CurriculumEngine
+from app.services.design_cache import clause_set_version, source_fingerprint
+from app.services.design_types import DesignJSONResponse
+from app.services.instructional_designer import instructional_designer, compare_variants
+from app.services.standards_cache import get_standards
 
 router = APIRouter()
 
-@router.post("/generate", response_model=GenerateCurriculumResponse)
-async def generate_curriculum(request: GenerateCurriculumRequest):
+# Largest duration x audience grid designed per request
+MAX_DESIGN_VARIANTS = 200
+
+@router.post(
+    "/generate",
+    response_class=DesignJSONResponse,
+    responses={200: {'model': GenerateCurriculumResponse}}
+)
+async def generate_curriculum(request: GenerateCurriculumRequest, db: Session = Depends(get_db)):
     """
     Generate curriculum from RFP clauses and standards
+    Responds with a GenerateCurriculumResponse; the designed modules are
+    encoded straight to JSON rather than validated and copied through it.
     """
+    if not db.query(RFP.id).filter(RFP.id == request.rfp_id).first():
+        raise HTTPException(status_code=404, detail="RFP not found")
+    if request.duration_minutes <= 0:
+        raise HTTPException(status_code=400, detail="duration_minutes must be positive")
+    
     try:
-        engine = CurriculumEngine()
+        engine = CurriculumEngine(db)
         result = await engine.generate(
             request.rfp_id,
             request.clause_ids,
-            request.standard_ids
+            request.standard_ids,
+            request.duration_minutes,
+            request.audience
         )
         
-        return GenerateCurriculumResponse(
-            success=True,
-            curriculum_id=result['curriculum_id'],
-            modules=result['modules'],
-            total_duration_minutes=result['total_duration_minutes']
-        )
+        return DesignJSONResponse({
+            'success': True,
+            'curriculum_id': result['curriculum_id'],
+            'modules': result['modules'],
+            'total_duration_minutes': result['total_duration_minutes'],
+            'error': None
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/design-variants", response_class=DesignJSONResponse)
+async def design_variants(request: DesignVariantsRequest, db: Session = Depends(get_db)):
+    """
+    Design every (duration, audience) combination of the grid at once and
+    return a comparison table (what-if variants for a tender)
+    """
+    rfp = db.query(RFP.id, RFP.title).filter(RFP.id == request.rfp_id).first()
+    if not rfp:
+        raise HTTPException(status_code=404, detail="RFP not found")
+    variants = [(duration, audience) for duration in request.durations_minutes for audience in request.audiences]
+    if not variants:
+        raise HTTPException(status_code=400, detail="durations_minutes and audiences must not be empty")
+    if len(variants) > MAX_DESIGN_VARIANTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_DESIGN_VARIANTS} variants per request")
+    if any(duration <= 0 for duration in request.durations_minutes):
+        raise HTTPException(status_code=400, detail="durations_minutes must be positive")
+    
+    try:
+        query = db.query(Clause.id, Clause.text, Clause.updated_at).filter(Clause.rfp_id == rfp.id)
+        if request.clause_ids is None:
+            query = query.filter(Clause.priority == 'must')
+        else:
+            query = query.filter(Clause.id.in_(set(request.clause_ids)))
+        clauses = query.order_by(Clause.id).all()
+        title = request.title or rfp.title
+        selection = None if request.clause_ids is None else sorted(set(request.clause_ids))
+        sources = source_fingerprint(rfp.id, clause_set_version(db, rfp.id), selection)
+        
+        designs = await run_in_threadpool(
+            instructional_designer.design_variants,
+            title, variants, clauses, get_standards(db), sources=sources
+        )
+        result = {
+            'title': title,
+            'clauses': len(clauses),
+            'variants': compare_variants(variants, designs)
+        }
+        if request.include_designs:
+            result['designs'] = designs
+        return DesignJSONResponse(result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,30 +1,33 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
+from typing import Iterator, List, Dict, Any, Optional, Tuple
 from pydantic import BaseModel
+from types import SimpleNamespace
+import copy
 import json
 
 from app.database import get_db
-from app.db_models import RFP, Clause, Standard, Curriculum
+from app.db_models import RFP, Clause
+from app.services.conversation_store import conversation_store, Conversation, HISTORY_LIMIT
+from app.services.curriculum_repository import save_designed_curriculum
+from app.services.design_cache import design_cache, design_key, clause_set_version, source_fingerprint
+from app.services.design_types import to_plain
 from app.services.instructional_designer import instructional_designer
+from app.services.sse import sse_event, text_chunks
 
 router = APIRouter()
 
-def _format_modules_summary(modules: List[Dict]) -> str:
-    """Format modules list for chat display"""
-    summary = ""
-    for i, module in enumerate(modules, 1):
-        summary += f"\n  {i}. {module['title']} ({module['duration_minutes']}min)"
-    return summary
-
 # Models for chat
 class ChatMessage(BaseModel):
     role: str  # 'user' or 'assistant'
     content: str
 
 class ChatRequest(BaseModel):
-    rfp_id: str
     message: str
+    conversation_id: Optional[str] = None  # Continues a server-side conversation
+    rfp_id: Optional[str] = None  # Required to start a conversation
+    # Legacy clients round-trip the state; only used to seed a new conversation
     conversation_history: List[ChatMessage] = []
     current_context: Dict[str, Any] = {}  # Stores curriculum being built
 
@@ -35,230 +38,375 @@ class ChatResponse(BaseModel):
     action: Optional[str] = None  # 'continue', 'generate', 'clarify'
     suggestions: List[str] = []
     current_context: Dict[str, Any] = {}  # Return updated context
+    conversation_id: Optional[str] = None  # Send with the next message instead of the context
 
-@router.post("/chat", response_model=ChatResponse)
-async def curriculum_chat(request: ChatRequest, db: Session = Depends(get_db)):
+class GenerateFromChatRequest(BaseModel):
+    rfp_id: str
+    curriculum_data: Dict[str, Any]  # The chat's curriculum_preview, including its modules
+    selected_clause_ids: List[str] = []
+    client_key: Optional[str] = None  # Idempotency key; repeats return the first save
+
+def _must_clause_ids(db: Session, rfp_id: str) -> List[str]:
+    """Ids of the RFP's MUST clauses (ids only, no clause text)"""
+    rows = db.query(Clause.id).filter(Clause.rfp_id == rfp_id, Clause.priority == 'must').all()
+    return [clause_id for clause_id, in rows]
+
+def _load_clauses(db: Session, rfp_id: str, clause_ids: List[str]) -> List[SimpleNamespace]:
+    """Selected clauses in selection order, with one IN query"""
+    if not clause_ids:
+        return []
+    rows = (
+        db.query(Clause.id, Clause.text, Clause.updated_at)
+        .filter(Clause.rfp_id == rfp_id, Clause.id.in_(set(clause_ids)))
+        .all()
+    )
+    by_id = {row.id: row for row in rows}
+    return [
+        SimpleNamespace(id=clause_id, text=by_id[clause_id].text, updated_at=by_id[clause_id].updated_at)
+        for clause_id in clause_ids if clause_id in by_id
+    ]
+
+def _get_conversation(db: Session, request: ChatRequest) -> Conversation:
     """
-    Conversational curriculum builder
-    Adapts to user's style - guided OR free-form
+    The request's stored conversation, or a new one for request.rfp_id
+    (seeded from a legacy client's round-tripped context and history)
     """
-    try:
-        # Get RFP and clauses
-        rfp = db.query(RFP).filter(RFP.id == request.rfp_id).first()
+    conversation = None
+    if request.conversation_id:
+        conversation = conversation_store.get(request.conversation_id, 'curriculum')
+    if conversation is None:
+        if not request.rfp_id:
+            raise HTTPException(status_code=404, detail="Conversation not found or expired")
+        conversation = conversation_store.create(
+            'curriculum', request.rfp_id, request.current_context
+        )
+        conversation.history = [m.model_dump() for m in request.conversation_history][-HISTORY_LIMIT:]
+        print(f"[CHAT] Starting new conversation for RFP: {request.rfp_id}")
+    
+    # Clauses and standards are loaded only by the stages that use them
+    if 'rfp_title' not in conversation.cache:
+        rfp = db.query(RFP.title).filter(RFP.id == conversation.owner_id).first()
         if not rfp:
             raise HTTPException(status_code=404, detail="RFP not found")
+        conversation.cache['rfp_title'] = rfp.title
+    return conversation
+
+def _chat_turn(db: Session, conversation: Conversation, message: str) -> Tuple[ChatResponse, Optional[Dict[str, Any]]]:
+    """
+    Advance the conversation by one user message
+    Returns the response and, on the generate turn, the designer inputs;
+    the curriculum itself is designed by _design_curriculum so it can stream.
+    """
+    rfp_title = conversation.cache['rfp_title']
+    design = None
+    
+    # Analyze user message
+    user_message = message.lower()
+    context = copy.deepcopy(conversation.context)
+    
+    # Initialize context if empty or missing stage
+    if not context or 'stage' not in context:
+        context = {
+            'stage': 'initial',  # initial, gathering_info, selecting_clauses, generating
+            'curriculum_title': '',
+            'duration': None,
+            'audience': '',
+            'topics': [],
+            'selected_clause_ids': []
+        }
+    
+    print(f"[CHAT] Current stage: {context.get('stage')}, User message: {message[:50]}")
+    
+    # Simple rule-based conversation (will upgrade to AI later)
+    response_message = ""
+    selected_clauses = context.get('selected_clause_ids', [])
+    action = 'continue'
+    suggestions = []
+    curriculum_preview = None
+    
+    # Stage 1: Initial - understand what they want
+    if context['stage'] == 'initial':
+        # Store their initial request
+        context['initial_request'] = message
         
-        clauses = db.query(Clause).filter(Clause.rfp_id == request.rfp_id).all()
-        standards = db.query(Standard).all()
-        
-        # Analyze user message
-        user_message = request.message.lower()
-        context = request.current_context if request.current_context else {}
-        
-        # Initialize context if empty or missing stage
-        if not context or 'stage' not in context:
-            context = {
-                'stage': 'initial',  # initial, gathering_info, selecting_clauses, generating
-                'curriculum_title': '',
-                'duration': None,
-                'audience': '',
-                'topics': [],
-                'selected_clause_ids': []
-            }
-            print(f"[CHAT] Starting new conversation for RFP: {request.rfp_id}")
-        
-        print(f"[CHAT] Current stage: {context.get('stage')}, User message: {request.message[:50]}")
+        # Check if they gave detailed instructions
+        has_course_type = any(word in user_message for word in ['cpr', 'first aid', 'course', 'training', 'curriculum'])
+        has_duration = 'hour' in user_message or any(str(i) in user_message for i in range(1, 25))
+        has_audience = any(word in user_message for word in ['healthcare', 'workers', 'public', 'responders'])
         
-        # Simple rule-based conversation (will upgrade to AI later)
-        response_message = ""
-        selected_clauses = context.get('selected_clause_ids', [])
-        action = 'continue'
-        suggestions = []
-        curriculum_preview = None
+        # Count how much info they provided
+        info_provided = sum([has_course_type, has_duration, has_audience])
         
-        # Stage 1: Initial - understand what they want
-        if context['stage'] == 'initial':
-            # Store their initial request
-            context['initial_request'] = request.message
-            
-            # Check if they gave detailed instructions
-            has_course_type = any(word in user_message for word in ['cpr', 'first aid', 'course', 'training', 'curriculum'])
-            has_duration = 'hour' in user_message or any(str(i) in user_message for i in range(1, 25))
-            has_audience = any(word in user_message for word in ['healthcare', 'workers', 'public', 'responders'])
+        if info_provided >= 2:
+            # They gave good detail - move to title
+            context['stage'] = 'gathering_title'
             
-            # Count how much info they provided
-            info_provided = sum([has_course_type, has_duration, has_audience])
+            # Extract what we can
+            if has_duration:
+                words = user_message.split()
+                for i, word in enumerate(words):
+                    if 'hour' in word and i > 0:
+                        try:
+                            duration_num = int(''.join(filter(str.isdigit, words[i-1])))
+                            context['duration'] = duration_num * 60
+                        except:
+                            pass
             
-            if info_provided >= 2:
-                # They gave good detail - move to title
-                context['stage'] = 'gathering_title'
-                
-                # Extract what we can
-                if has_duration:
-                    words = user_message.split()
-                    for i, word in enumerate(words):
-                        if 'hour' in word and i > 0:
-                            try:
-                                duration_num = int(''.join(filter(str.isdigit, words[i-1])))
-                                context['duration'] = duration_num * 60
-                            except:
-                                pass
-                
-                response_message = f"Excellent! I can help you create: '{request.message}'\n\nWhat should we call this curriculum? (You can use the RFP title or create your own)"
-                suggestions = [
-                    f"{rfp.title} - Basic Course",
-                    f"{rfp.title} - Advanced Course",
-                    "Custom name"
-                ]
-            else:
-                # Need more info - guide them
-                context['stage'] = 'initial'  # Stay at initial
-                response_message = f"Great start! To create the perfect curriculum, I need a bit more detail.\n\nCould you tell me:\n• What type of course? (e.g., CPR, First Aid, etc.)\n• How long should it be?\n• Who's it for?\n\nOr just describe it in a sentence!"
-                suggestions = [
-                    "8-hour CPR course for healthcare workers",
-                    "Basic first aid training, 4 hours, general public",
-                    "Advanced life support, 16 hours, paramedics"
-                ]
+            response_message = f"Excellent! I can help you create: '{message}'\n\nWhat should we call this curriculum? (You can use the RFP title or create your own)"
+            suggestions = [
+                f"{rfp_title} - Basic Course",
+                f"{rfp_title} - Advanced Course",
+                "Custom name"
+            ]
+        else:
+            # Need more info - guide them
+            context['stage'] = 'initial'  # Stay at initial
+            response_message = f"Great start! To create the perfect curriculum, I need a bit more detail.\n\nCould you tell me:\n• What type of course? (e.g., CPR, First Aid, etc.)\n• How long should it be?\n• Who's it for?\n\nOr just describe it in a sentence!"
+            suggestions = [
+                "8-hour CPR course for healthcare workers",
+                "Basic first aid training, 4 hours, general public",
+                "Advanced life support, 16 hours, paramedics"
+            ]
+    
+    # Stage 2: Gathering title
+    elif context['stage'] == 'gathering_title':
+        context['curriculum_title'] = message
         
-        # Stage 2: Gathering title
-        elif context['stage'] == 'gathering_title':
-            context['curriculum_title'] = request.message
-            
-            # Check if we already have duration
-            if context.get('duration'):
-                # Skip to audience
-                context['stage'] = 'gathering_audience'
-                response_message = f"Perfect! We'll call it '{request.message}'.\n\nWho is the target audience?"
-                suggestions = ["Healthcare workers", "General public", "First responders", "Workplace safety teams"]
-            else:
-                # Ask for duration
-                context['stage'] = 'gathering_duration'
-                response_message = f"Great title: '{request.message}'!\n\nHow long should this course be?"
-                suggestions = ["8 hours", "16 hours", "4 hours", "Custom duration"]
-            
-        elif context['stage'] == 'gathering_duration':
-            # Extract duration
-            try:
-                if 'hour' in user_message:
-                    duration_hours = int(''.join(filter(str.isdigit, user_message.split('hour')[0])))
-                    context['duration'] = duration_hours * 60
-                else:
-                    duration_hours = int(''.join(filter(str.isdigit, user_message)))
-                    context['duration'] = duration_hours * 60
-            except:
-                context['duration'] = 480  # Default 8 hours
-            
+        # Check if we already have duration
+        if context.get('duration'):
+            # Skip to audience
             context['stage'] = 'gathering_audience'
-            response_message = f"Got it - {context['duration'] // 60} hours.\n\nWho is the target audience for this curriculum?"
+            response_message = f"Perfect! We'll call it '{message}'.\n\nWho is the target audience?"
             suggestions = ["Healthcare workers", "General public", "First responders", "Workplace safety teams"]
+        else:
+            # Ask for duration
+            context['stage'] = 'gathering_duration'
+            response_message = f"Great title: '{message}'!\n\nHow long should this course be?"
+            suggestions = ["8 hours", "16 hours", "4 hours", "Custom duration"]
         
-        elif context['stage'] == 'gathering_audience':
-            context['audience'] = request.message
-            context['stage'] = 'ready_to_generate'
-            
-            # Auto-select relevant clauses (simple keyword matching for now)
-            relevant_clauses = []
-            for clause in clauses:
-                # Select all MUST clauses by default
-                if clause.priority == 'must':
-                    relevant_clauses.append(clause.id)
-            
-            context['selected_clause_ids'] = relevant_clauses
-            selected_clauses = relevant_clauses
+    elif context['stage'] == 'gathering_duration':
+        # Extract duration
+        try:
+            if 'hour' in user_message:
+                duration_hours = int(''.join(filter(str.isdigit, user_message.split('hour')[0])))
+                context['duration'] = duration_hours * 60
+            else:
+                duration_hours = int(''.join(filter(str.isdigit, user_message)))
+                context['duration'] = duration_hours * 60
+        except:
+            context['duration'] = 480  # Default 8 hours
+        
+        context['stage'] = 'gathering_audience'
+        response_message = f"Got it - {context['duration'] // 60} hours.\n\nWho is the target audience for this curriculum?"
+        suggestions = ["Healthcare workers", "General public", "First responders", "Workplace safety teams"]
+    
+    elif context['stage'] == 'gathering_audience':
+        context['audience'] = message
+        context['stage'] = 'ready_to_generate'
+        
+        # Auto-select relevant clauses (all MUST clauses by default)
+        relevant_clauses = _must_clause_ids(db, conversation.owner_id)
+        
+        context['selected_clause_ids'] = relevant_clauses
+        selected_clauses = relevant_clauses
+        
+        # Build preview
+        curriculum_preview = {
+            'title': context['curriculum_title'],
+            'description': f"{context.get('initial_request', 'Curriculum')} for {context['audience']}",
+            'total_duration_minutes': context['duration'],
+            'status': 'draft'
+        }
+        
+        response_message = f"Perfect! Here's what I've prepared:\n\n📚 **{context['curriculum_title']}**\n⏱️ Duration: {context['duration'] // 60} hours\n👥 Audience: {context['audience']}\n📋 Requirements: {len(relevant_clauses)} MUST-HAVE clauses selected\n\nYou can see the selected requirements in the right panel.\n\nReady to generate?"
+        suggestions = [
+            "Yes, generate it!",
+            "Add focus on AED training",
+            "Include pediatric CPR requirements"
+        ]
+    
+    elif context['stage'] in ('ready_to_generate', 'generated'):
+        if 'yes' in user_message or 'generate' in user_message or 'create' in user_message or 'go' in user_message or 'proceed' in user_message:
+            # Actually generate using professional instructional design!
+            action = 'generate'
+            context['stage'] = 'generated'
             
-            # Build preview
-            curriculum_preview = {
+            # Load the selected clauses; designing happens in _design_curriculum
+            design = {
                 'title': context['curriculum_title'],
-                'description': f"{context.get('initial_request', 'Curriculum')} for {context['audience']}",
-                'total_duration_minutes': context['duration'],
-                'status': 'draft'
+                'duration_minutes': context['duration'],
+                'audience': context['audience'],
+                'clauses': _load_clauses(db, conversation.owner_id, selected_clauses),
+                'sources': source_fingerprint(
+                    conversation.owner_id, clause_set_version(db, conversation.owner_id), selected_clauses
+                ),
+                'user_instructions': context.get('initial_request', '')
             }
+            suggestions = []
+        else:
+            # They want to refine
+            context['additional_instructions'] = context.get('additional_instructions', [])
+            context['additional_instructions'].append(message)
             
-            response_message = f"Perfect! Here's what I've prepared:\n\n📚 **{context['curriculum_title']}**\n⏱️ Duration: {context['duration'] // 60} hours\n👥 Audience: {context['audience']}\n📋 Requirements: {len(relevant_clauses)} MUST-HAVE clauses selected\n\nYou can see the selected requirements in the right panel.\n\nReady to generate?"
-            suggestions = [
-                "Yes, generate it!",
-                "Add focus on AED training",
-                "Include pediatric CPR requirements"
-            ]
-        
-        elif context['stage'] == 'ready_to_generate':
-            if 'yes' in user_message or 'generate' in user_message or 'create' in user_message or 'go' in user_message or 'proceed' in user_message:
-                # Actually generate using professional instructional design!
-                action = 'generate'
-                context['stage'] = 'generated'
-                
-                # Get selected clauses objects
-                selected_clause_objs = [c for c in clauses if c.id in selected_clauses]
-                
-                # Use instructional designer to create professional curriculum
-                designed_curriculum = instructional_designer.design_curriculum_structure(
-                    title=context['curriculum_title'],
-                    duration_minutes=context['duration'],
-                    audience=context['audience'],
-                    clauses=selected_clause_objs,
-                    standards=standards,
-                    user_instructions=context.get('initial_request', '')
-                )
-                
-                curriculum_preview = designed_curriculum
-                
-                response_message = f"✨ **Curriculum Generated!**\n\n📚 **{designed_curriculum['title']}**\n⏱️ {designed_curriculum['total_duration_minutes'] // 60} hours • {len(designed_curriculum['modules'])} modules\n👥 {context['audience']}\n\n**Instructional Design Applied:**\n• Bloom's Taxonomy for learning progression\n• 70-20-10 model (70% hands-on practice!)\n• ADDIE framework\n• Industry-standard assessments\n\n**Modules Created:**\n{_format_modules_summary(designed_curriculum['modules'])}\n\n📊 Check the preview below to see the full curriculum. Click 'Save' when ready!"
-                suggestions = []
-            else:
-                # They want to refine
-                context['additional_instructions'] = context.get('additional_instructions', [])
-                context['additional_instructions'].append(request.message)
-                
-                response_message = f"Noted! I'll make sure to: '{request.message}'\n\nAnything else to add before I generate?"
-                suggestions = ["That's all, generate it!", "Also include...", "Change the duration"]
+            response_message = f"Noted! I'll make sure to: '{message}'\n\nAnything else to add before I generate?"
+            suggestions = ["That's all, generate it!", "Also include...", "Change the duration"]
+    
+    response = ChatResponse(
+        message=response_message,
+        selected_clauses=selected_clauses,
+        curriculum_preview=curriculum_preview,
+        action=action,
+        suggestions=suggestions,
+        current_context=context,  # Return updated context so conversation continues
+        conversation_id=conversation.id
+    )
+    return response, design
+
+def _design_curriculum(design: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+    """
+    Design the curriculum, yielding ('message', text) deltas of the reply,
+    ('module', module) as each module is designed and finally ('preview', curriculum)
+    A design already made from the same inputs (a repeated or re-rendered
+    generate) is replayed from the design cache.
+    """
+    key = design_key(design['title'], design['duration_minutes'], design['audience'],
+                     design['sources'], design['user_instructions'])
+    cached = design_cache.get(key)
+    num_modules = instructional_designer.module_count(design['duration_minutes'])
+    yield 'message', (
+        f"✨ **Curriculum Generated!**\n\n📚 **{design['title']}**\n⏱️ {design['duration_minutes'] // 60} hours • {num_modules} modules\n👥 {design['audience']}\n\n"
+        "**Instructional Design Applied:**\n• Bloom's Taxonomy for learning progression\n• 70-20-10 model (70% hands-on practice!)\n• ADDIE framework\n• Industry-standard assessments\n\n"
+        "**Modules Created:**\n"
+    )
+    
+    if cached is not None:
+        designed = iter(cached.modules)
+    else:
+        designed = instructional_designer.iter_modules(design['duration_minutes'], design['audience'], design['clauses'])
+    
+    modules = []
+    for module in designed:
+        modules.append(module)
+        yield 'module', module
+        yield 'message', f"\n  {len(modules)}. {module.title} ({module.duration_minutes}min)"
+    
+    yield 'message', "\n\n📊 Check the preview below to see the full curriculum. Click 'Save' when ready!"
+    if cached is not None:
+        yield 'preview', cached
+        return
+    curriculum = instructional_designer.curriculum_summary(
+        design['title'], design['duration_minutes'], design['audience'], modules
+    )
+    design_cache.put(key, curriculum)
+    yield 'preview', curriculum
+
+def _save_turn(conversation: Conversation, message: str, response: ChatResponse):
+    conversation.context = response.current_context
+    conversation.add_turn(message, response.message)
+    conversation_store.save(conversation)
+
+@router.post("/chat", response_model=ChatResponse)
+async def curriculum_chat(request: ChatRequest, db: Session = Depends(get_db)):
+    """
+    Conversational curriculum builder
+    Adapts to user's style - guided OR free-form
+    The conversation state stays on the server: send conversation_id and
+    the new message (rfp_id to start).
+    """
+    conversation = _get_conversation(db, request)
+    
+    try:
+        response, design = _chat_turn(db, conversation, request.message)
+        if design:
+            reply = []
+            for kind, data in _design_curriculum(design):
+                if kind == 'message':
+                    reply.append(data)
+                elif kind == 'preview':
+                    response.curriculum_preview = to_plain(data)
+            response.message = "".join(reply)
         
-        return ChatResponse(
-            message=response_message,
-            selected_clauses=selected_clauses,
-            curriculum_preview=curriculum_preview,
-            action=action,
-            suggestions=suggestions,
-            current_context=context  # Return updated context so conversation continues
-        )
+        _save_turn(conversation, request.message, response)
+        return response
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/chat/stream")
+async def curriculum_chat_stream(request: ChatRequest, db: Session = Depends(get_db)):
+    """
+    Server-Sent Events variant of /chat
+    Streams `message` events ({"delta": text}) as the reply is written,
+    a `module` event for each module as the designer produces it, then
+    `done` with the ChatResponse (its curriculum_preview without the
+    modules already sent) or `error`.
+    """
+    conversation = _get_conversation(db, request)
+    try:
+        response, design = _chat_turn(db, conversation, request.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    def event_stream():
+        reply = []
+        failed = False
+        try:
+            if design:
+                parts = _design_curriculum(design)
+            else:
+                parts = (('message', chunk) for chunk in text_chunks(response.message))
+            for kind, data in parts:
+                if kind == 'message':
+                    reply.append(data)
+                    yield sse_event({'delta': data}, 'message')
+                elif kind == 'module':
+                    yield sse_event(data, 'module')
+                else:
+                    # Modules were already sent as events
+                    response.curriculum_preview = {
+                        field: getattr(data, field) for field in data.__dataclass_fields__ if field != 'modules'
+                    }
+            
+            response.message = "".join(reply)
+            done = response.model_dump()
+            yield sse_event(done, 'done')
+        except Exception as e:
+            failed = True
+            yield sse_event({'detail': str(e)}, 'error')
+        finally:
+            # Also keeps the turn if the client disconnects mid-stream
+            if not failed:
+                response.message = "".join(reply)
+                _save_turn(conversation, request.message, response)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @router.post("/generate-from-chat")
-async def generate_from_chat(
-    rfp_id: str,
-    curriculum_data: Dict[str, Any],
-    selected_clause_ids: List[str],
-    db: Session = Depends(get_db)
-):
+async def generate_from_chat(request: GenerateFromChatRequest, db: Session = Depends(get_db)):
     """
-    Generate curriculum from chat conversation
+    Save the curriculum designed in the chat, with all of its modules
+    Send the same client_key when retrying so the curriculum is saved once.
     """
+    if request.client_key and len(request.client_key) > 64:
+        raise HTTPException(status_code=400, detail="client_key must be at most 64 characters")
+    if not db.query(RFP.id).filter(RFP.id == request.rfp_id).first():
+        raise HTTPException(status_code=404, detail="RFP not found")
+    
     try:
-        # Create curriculum record
-        curriculum = Curriculum(
-            rfp_id=rfp_id,
-            title=curriculum_data.get('title', 'Untitled Curriculum'),
-            description=curriculum_data.get('description', ''),
-            status='generating',
-            total_duration_minutes=curriculum_data.get('total_duration_minutes', 480)
+        curriculum_id, created = save_designed_curriculum(
+            db, request.rfp_id, request.curriculum_data, request.client_key
         )
-        
-        db.add(curriculum)
-        db.commit()
-        db.refresh(curriculum)
-        
-        # TODO: Call curriculum generation engine with selected clauses
-        # For now, update status to completed
-        curriculum.status = 'completed'
-        db.commit()
-        
         return {
             'success': True,
-            'curriculum_id': curriculum.id,
-            'message': 'Curriculum generated successfully!'
+            'curriculum_id': curriculum_id,
+            'created': created,
+            'message': 'Curriculum generated successfully!' if created else 'Curriculum already saved'
         }
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/design-cache")
+async def get_design_cache_stats():
+    """Hit/miss counters and size of the memoised curriculum designs"""
+    return design_cache.stats()
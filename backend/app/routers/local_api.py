@@ -1,11 +1,12 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Optional
 from datetime import datetime
 import os
 
 from app.services.local_database import db
 from app.services.local_storage import storage
+from app.services.file_serving import serve_stored_file
 from app.services.rfp_parser import RfpParser
 
 router = APIRouter()
@@ -34,12 +35,11 @@ async def create_rfp(
     description: str = ""
 ):
     """Upload and parse RFP"""
-    # Save file
-    file_content = await file.read()
+    # Save file (streamed from the spooled upload, not read into memory)
     timestamp = int(datetime.now().timestamp() * 1000)
     safe_filename = f"{timestamp}-{file.filename}"
     
-    file_info = storage.save_upload(file_content, safe_filename)
+    file_info = await run_in_threadpool(storage.save_upload_file, file.file, safe_filename)
     
     # Create RFP record
     rfp = db.insert('rfps', {
@@ -119,12 +119,11 @@ async def create_standard(
     category: str = "Compliance"
 ):
     """Upload standard document"""
-    # Save file
-    file_content = await file.read()
+    # Save file (streamed from the spooled upload, not read into memory)
     timestamp = int(datetime.now().timestamp() * 1000)
     safe_filename = f"{timestamp}-{file.filename}"
     
-    file_info = storage.save_upload(file_content, safe_filename)
+    file_info = await run_in_threadpool(storage.save_upload_file, file.file, safe_filename)
     
     # Create standard record
     standard = db.insert('standards', {
@@ -142,9 +141,12 @@ async def create_standard(
 @router.delete("/standards/{standard_id}")
 async def delete_standard(standard_id: str):
     """Delete a standard"""
+    standard = db.select_by_id('standards', standard_id)
     success = db.delete('standards', standard_id)
     if not success:
         raise HTTPException(status_code=404, detail="Standard not found")
+    if standard.get('file_url'):
+        storage.delete_upload(standard['file_url'])
     return {"success": True}
 
 # ===== CURRICULA ENDPOINTS =====
@@ -204,19 +206,13 @@ async def update_output(output_id: str, data: dict):
 # ===== FILE SERVING =====
 
 @router.get("/files/uploads/{filename}")
-async def get_upload_file(filename: str):
-    """Serve uploaded file"""
-    filepath = os.path.join(storage.uploads_dir, filename)
-    if not os.path.exists(filepath):
-        raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(filepath)
+def get_upload_file(filename: str, request: Request):
+    """Serve uploaded file (ETag revalidation, Range requests)"""
+    return serve_stored_file(request, f"/files/uploads/{filename}")
 
 @router.get("/files/outputs/{output_type}/{filename}")
-async def get_output_file(output_type: str, filename: str):
-    """Serve generated output file"""
-    filepath = os.path.join(storage.outputs_dir, output_type, filename)
-    if not os.path.exists(filepath):
-        raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(filepath)
+def get_output_file(output_type: str, filename: str, request: Request):
+    """Serve generated output file (ETag revalidation, Range requests, precompressed variants)"""
+    return serve_stored_file(request, f"/files/outputs/{output_type}/{filename}")
 
 
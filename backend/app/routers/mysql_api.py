@@ -1,5 +1,5 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Form
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Form, Request
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
@@ -8,7 +8,10 @@ import os
 from app.database import get_db
 from app.db_models import RFP, Clause, Standard, Curriculum, Output
 from app.services.local_storage import storage
+from app.services.file_serving import serve_stored_file
 from app.services.rfp_parser import RfpParser
+from app.services.standards_cache import invalidate_standards
+from app.services.curriculum_repository import invalidate_curriculum
 
 router = APIRouter()
 
@@ -37,12 +40,11 @@ async def create_rfp(
     db: Session = Depends(get_db)
 ):
     """Upload and parse RFP"""
-    # Save file
-    file_content = await file.read()
+    # Save file (streamed from the spooled upload, not read into memory)
     timestamp = int(datetime.now().timestamp() * 1000)
     safe_filename = f"{timestamp}-{file.filename}"
     
-    file_info = storage.save_upload(file_content, safe_filename)
+    file_info = await run_in_threadpool(storage.save_upload_file, file.file, safe_filename)
     
     # Create RFP record
     rfp = RFP(
@@ -147,12 +149,11 @@ async def create_standard(
     db: Session = Depends(get_db)
 ):
     """Upload standard document"""
-    # Save file
-    file_content = await file.read()
+    # Save file (streamed from the spooled upload, not read into memory)
     timestamp = int(datetime.now().timestamp() * 1000)
     safe_filename = f"{timestamp}-{file.filename}"
     
-    file_info = storage.save_upload(file_content, safe_filename)
+    file_info = await run_in_threadpool(storage.save_upload_file, file.file, safe_filename)
     
     # Create standard record
     standard = Standard(
@@ -168,6 +169,7 @@ async def create_standard(
     db.add(standard)
     db.commit()
     db.refresh(standard)
+    invalidate_standards()
     
     return standard_to_dict(standard)
 
@@ -178,8 +180,12 @@ async def delete_standard(standard_id: str, db: Session = Depends(get_db)):
     if not standard:
         raise HTTPException(status_code=404, detail="Standard not found")
     
+    file_url = standard.file_url
     db.delete(standard)
     db.commit()
+    invalidate_standards()
+    if file_url:
+        storage.delete_upload(file_url)
     return {"success": True}
 
 # ===== CURRICULA ENDPOINTS =====
@@ -218,10 +224,11 @@ async def update_curriculum(curriculum_id: str, data: dict, db: Session = Depend
         raise HTTPException(status_code=404, detail="Curriculum not found")
     
     for key, value in data.items():
-        if hasattr(curriculum, key):
+        if key in Curriculum.__table__.columns:
             setattr(curriculum, key, value)
     
     db.commit()
+    invalidate_curriculum(curriculum_id)
     db.refresh(curriculum)
     return curriculum_to_dict(curriculum)
 
@@ -236,6 +243,14 @@ async def get_outputs(curriculum_id: Optional[str] = None, db: Session = Depends
     outputs = query.order_by(Output.created_at.desc()).all()
     return [output_to_dict(output) for output in outputs]
 
+@router.get("/outputs/{output_id}")
+async def get_output(output_id: str, db: Session = Depends(get_db)):
+    """Get single output (poll this for generation job status)"""
+    output = db.query(Output).filter(Output.id == output_id).first()
+    if not output:
+        raise HTTPException(status_code=404, detail="Output not found")
+    return output_to_dict(output)
+
 @router.post("/outputs")
 async def create_output(data: dict, db: Session = Depends(get_db)):
     """Create output"""
@@ -253,7 +268,7 @@ async def update_output(output_id: str, data: dict, db: Session = Depends(get_db
         raise HTTPException(status_code=404, detail="Output not found")
     
     for key, value in data.items():
-        if hasattr(output, key):
+        if key in Output.__table__.columns:
             setattr(output, key, value)
     
     db.commit()
@@ -263,20 +278,14 @@ async def update_output(output_id: str, data: dict, db: Session = Depends(get_db
 # ===== FILE SERVING =====
 
 @router.get("/files/uploads/{filename}")
-async def get_upload_file(filename: str):
-    """Serve uploaded file"""
-    filepath = os.path.join(storage.uploads_dir, filename)
-    if not os.path.exists(filepath):
-        raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(filepath)
+def get_upload_file(filename: str, request: Request):
+    """Serve uploaded file (ETag revalidation, Range requests)"""
+    return serve_stored_file(request, f"/files/uploads/{filename}")
 
 @router.get("/files/outputs/{output_type}/{filename}")
-async def get_output_file(output_type: str, filename: str):
-    """Serve generated output file"""
-    filepath = os.path.join(storage.outputs_dir, output_type, filename)
-    if not os.path.exists(filepath):
-        raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(filepath)
+def get_output_file(output_type: str, filename: str, request: Request):
+    """Serve generated output file (ETag revalidation, Range requests, precompressed variants)"""
+    return serve_stored_file(request, f"/files/outputs/{output_type}/{filename}")
 
 # ===== HELPER FUNCTIONS =====
 
@@ -347,6 +356,9 @@ def output_to_dict(output: Output) -> dict:
         'status': output.status,
         'file_url': output.file_url,
         'error_message': output.error_message,
+        'started_at': output.started_at.isoformat() if output.started_at else None,
+        'completed_at': output.completed_at.isoformat() if output.completed_at else None,
+        'duration_ms': output.duration_ms,
         'created_at': output.created_at.isoformat() if output.created_at else None,
         'updated_at': output.updated_at.isoformat() if output.updated_at else None,
     }
@@ -1,77 +1,259 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse, JSONResponse
-from app.models import GenerateOutputRequest, Scenario, TestQuestion
-from app.services.generators.ppt_generator import PptGenerator
-from app.services.generators.pdf_generator import PdfGenerator
-from app.services.generators.scenario_generator import ScenarioGenerator
-from app.services.generators.test_generator import TestGenerator
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from sqlalchemy.orm import Session
+from app.database import get_db, SessionLocal
+from app.db_models import Curriculum, Output
+from app.models import (
+    GenerateOutputRequest, GenerateDeliverablesRequest, GenerateScenariosRequest, GenerateTestRequest,
+    QuestionBankEntry, Scenario, TestQuestion
+)
+from app.services.generators.scenario_generator import ScenarioGenerator, scenario_seed, curriculum_topics
+from app.services.generators.test_generator import TestGenerator, DIFFICULTIES, add_questions
+from app.services.output_jobs import submit_output_job, JobQueueFull, TERMINAL_STATUSES
+from app.services.curriculum_repository import invalidate_curriculum
+from app.services.deliverables_pipeline import load_curriculum_snapshot, run_pipeline, PipelineError
+from app.services.sse import sse_event
+from app.routers.mysql_api import output_to_dict
 from typing import List
+from datetime import datetime
+import asyncio
+import json
 
 router = APIRouter()
 
-@router.post("/generate-ppt")
-async def generate_powerpoint(request: GenerateOutputRequest):
-    """
-    Generate PowerPoint presentation from curriculum
-    """
+# How often the job events stream re-reads the Output row
+JOB_EVENTS_POLL_SECONDS = 0.5
+
+def _submit_job(db: Session, request: GenerateOutputRequest, output_type: str) -> dict:
+    """Queue an output generation job and return its pending Output"""
+    if not db.query(Curriculum.id).filter(Curriculum.id == request.curriculum_id).first():
+        raise HTTPException(status_code=404, detail="Curriculum not found")
     try:
-        generator = PptGenerator()
-        file_path = await generator.generate(request.curriculum_id)
-        return {"success": True, "file_url": file_path}
+        output = submit_output_job(db, request.curriculum_id, output_type, request.customizations)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return {"success": True, "output_id": output.id, "status": output.status, "output": output_to_dict(output)}
 
-@router.post("/generate-student-manual")
-async def generate_student_manual(request: GenerateOutputRequest):
+@router.post("/generate-ppt", status_code=202)
+async def generate_powerpoint(request: GenerateOutputRequest, db: Session = Depends(get_db)):
     """
-    Generate student manual PDF from curriculum
+    Queue PowerPoint generation from curriculum
+    Poll GET /api/outputs/{output_id} or subscribe to /api/outputs/jobs/{output_id}/events
     """
-    try:
-        generator = PdfGenerator()
-        file_path = await generator.generate_student_manual(request.curriculum_id)
-        return {"success": True, "file_url": file_path}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return _submit_job(db, request, 'ppt')
+
+@router.post("/generate-student-manual", status_code=202)
+async def generate_student_manual(request: GenerateOutputRequest, db: Session = Depends(get_db)):
+    """
+    Queue student manual PDF generation from curriculum
+    """
+    return _submit_job(db, request, 'student_manual')
 
-@router.post("/generate-instructor-manual")
-async def generate_instructor_manual(request: GenerateOutputRequest):
+@router.post("/generate-instructor-manual", status_code=202)
+async def generate_instructor_manual(request: GenerateOutputRequest, db: Session = Depends(get_db)):
     """
-    Generate instructor manual PDF from curriculum
+    Queue instructor manual PDF generation from curriculum
     """
+    return _submit_job(db, request, 'instructor_manual')
+
+@router.post("/generate-all")
+async def generate_all_deliverables(request: GenerateDeliverablesRequest, db: Session = Depends(get_db)):
+    """
+    Generate every deliverable (PPT, both manuals, scenarios, test questions)
+    in parallel from one curriculum load and bundle them into a ZIP
+    """
+    snapshot = load_curriculum_snapshot(db, request.curriculum_id, request.question_count)
+    if not snapshot:
+        raise HTTPException(status_code=404, detail="Curriculum not found")
+    
+    output = Output(
+        curriculum_id=request.curriculum_id,
+        type='bundle',
+        title='All Deliverables',
+        status='running',
+        started_at=datetime.utcnow()
+    )
+    db.add(output)
+    db.commit()
+    
     try:
-        generator = PdfGenerator()
-        file_path = await generator.generate_instructor_manual(request.curriculum_id)
-        return {"success": True, "file_url": file_path}
+        result = await run_pipeline(
+            snapshot,
+            scenario_count=request.scenario_count,
+            question_count=request.question_count,
+            customizations=request.customizations
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        output.status = 'failed'
+        output.error_message = str(e)
+        output.completed_at = datetime.utcnow()
+        db.commit()
+        detail = {'message': 'Deliverables pipeline failed', 'errors': e.errors, 'timings': e.timings} \
+            if isinstance(e, PipelineError) else str(e)
+        raise HTTPException(status_code=500, detail=detail)
+    
+    output.status = 'completed'
+    output.file_url = result['file_url']
+    output.duration_ms = result['total_ms']
+    output.completed_at = datetime.utcnow()
+    db.commit()
+    db.refresh(output)
+    
+    return {"success": True, "output": output_to_dict(output), **result}
+
+@router.get("/jobs/{output_id}/events")
+async def output_job_events(output_id: str):
+    """
+    Server-Sent Events stream of an output job's status
+    Emits an event on every status change and closes once the job finishes.
+    """
+    async def event_stream():
+        last_status = None
+        while True:
+            db = SessionLocal()
+            try:
+                output = db.query(Output).filter(Output.id == output_id).first()
+                data = output_to_dict(output) if output else None
+            finally:
+                db.close()
+            
+            if data is None:
+                yield sse_event({'detail': 'Output not found'}, 'error')
+                return
+            if data['status'] != last_status:
+                last_status = data['status']
+                yield sse_event(data)
+            if last_status in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
 
 @router.post("/generate-scenarios", response_model=List[Scenario])
-async def generate_scenarios(request: GenerateOutputRequest):
+async def generate_scenarios(request: GenerateScenariosRequest, db: Session = Depends(get_db)):
     """
     Generate practice scenarios from curriculum
+    Reproducible for a given seed; optionally saved to the scenarios table.
     """
+    if request.persist and not db.query(Curriculum.id).filter(Curriculum.id == request.curriculum_id).first():
+        raise HTTPException(status_code=404, detail="Curriculum not found")
     try:
-        generator = ScenarioGenerator()
+        generator = ScenarioGenerator(db)
         scenarios = await generator.generate(
             request.curriculum_id,
-            count=request.count or 5
+            count=request.count or 5,
+            seed=request.seed
         )
+        if request.persist:
+            list(generator.persist(db, request.curriculum_id, scenarios))
+            db.commit()
+            invalidate_curriculum(request.curriculum_id)
         return scenarios
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/generate-scenarios/stream")
+async def stream_scenarios(request: GenerateScenariosRequest, db: Session = Depends(get_db)):
+    """
+    Stream scenarios as NDJSON, one per line, for large exports
+    Scenarios are generated lazily and, with persist, bulk-inserted in
+    batches as they stream; the insert commits once the stream completes.
+    """
+    if request.persist and not db.query(Curriculum.id).filter(Curriculum.id == request.curriculum_id).first():
+        raise HTTPException(status_code=404, detail="Curriculum not found")
+    
+    generator = ScenarioGenerator()
+    scenarios = generator.iter_scenarios(
+        curriculum_topics(db, request.curriculum_id),
+        request.count or 5,
+        scenario_seed(request.curriculum_id, request.seed)
+    )
+    
+    def export():
+        if not request.persist:
+            for scenario in scenarios:
+                yield scenario.model_dump_json() + "\n"
+            return
+        
+        session = SessionLocal()
+        try:
+            for scenario in generator.persist(session, request.curriculum_id, scenarios):
+                yield scenario.model_dump_json() + "\n"
+            session.commit()
+            invalidate_curriculum(request.curriculum_id)
+        except Exception as e:
+            session.rollback()
+            yield json.dumps({'status': 'error', 'error': str(e)}) + "\n"
+        finally:
+            session.close()
+    
+    return StreamingResponse(export(), media_type="application/x-ndjson")
+
+def _check_difficulty(difficulty):
+    if difficulty and difficulty not in DIFFICULTIES:
+        raise HTTPException(status_code=400, detail=f"difficulty must be one of {', '.join(DIFFICULTIES)}")
+
 @router.post("/generate-test-questions", response_model=List[TestQuestion])
-async def generate_test_questions(request: GenerateOutputRequest):
+async def generate_test_questions(request: GenerateTestRequest, db: Session = Depends(get_db)):
     """
-    Generate test questions from curriculum
+    Assemble a test from the question bank, balanced across the curriculum's
+    module learning objectives
     """
+    _check_difficulty(request.difficulty)
     try:
-        generator = TestGenerator()
+        generator = TestGenerator(db)
         questions = await generator.generate(
             request.curriculum_id,
-            count=request.count or 25
+            count=request.count or 25,
+            seed=request.seed,
+            difficulty=request.difficulty
         )
         return questions
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/generate-test-forms")
+async def generate_test_forms(request: GenerateTestRequest, db: Session = Depends(get_db)):
+    """
+    Assemble parallel test forms (e.g. one per candidate in a cohort)
+    Every form follows the same objective blueprint; forms are unique question
+    sets while the bank allows, and reproducible for a given seed.
+    """
+    _check_difficulty(request.difficulty)
+    if request.forms < 1:
+        raise HTTPException(status_code=400, detail="forms must be at least 1")
+    try:
+        forms = TestGenerator(db).generate_forms(
+            request.curriculum_id,
+            count=request.count or 25,
+            forms=request.forms,
+            seed=request.seed,
+            difficulty=request.difficulty
+        )
+        return {
+            'curriculum_id': request.curriculum_id,
+            'count': len(forms),
+            'forms': [[q.model_dump() for q in form] for form in forms]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/question-bank")
+async def add_to_question_bank(entries: List[QuestionBankEntry], db: Session = Depends(get_db)):
+    """
+    Bulk-add questions to the bank; topic and difficulty are derived from
+    the learning objective when not given
+    """
+    for entry in entries:
+        _check_difficulty(entry.difficulty)
+    try:
+        added = add_questions(db, (entry.model_dump() for entry in entries))
+        db.commit()
+        return {'added': added}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
@@ -2,7 +2,120 @@
 Business Requirements Document (BRD) Extractor
 Analyzes RFP and extracts business requirements in professional format
 """
-from typing import List, Dict, Any
+import re
+from types import SimpleNamespace
+from typing import List, Dict, Any, Iterable, Tuple
+
+from app.services.design_types import BRDData
+
+
+FUNCTIONAL_KEYWORDS = [
+    'must include', 'shall provide', 'will include', 'training must',
+    'course must', 'shall demonstrate', 'must cover', 'required to',
+    'participants will', 'students must', 'shall be able to'
+]
+
+STAKEHOLDER_KEYWORDS = {
+    'management': 'Management Team',
+    'supervisor': 'Supervisors',
+    'employee': 'Employees',
+    'worker': 'Workers',
+    'regulator': 'Regulatory Bodies',
+    'accredit': 'Accreditation Bodies'
+}
+
+# Result caps - the accumulator stops collecting once a list is full
+MAX_BUSINESS_OBJECTIVES = 10
+MAX_FUNCTIONAL_REQUIREMENTS = 20
+MAX_NON_FUNCTIONAL_REQUIREMENTS = 15
+MAX_SUCCESS_CRITERIA = 10
+MAX_CONSTRAINTS = 10
+MAX_STAKEHOLDERS = 8
+
+
+def _keyword_matcher(keywords: List[str]):
+    """Compile a keyword list into a single substring matcher"""
+    return re.compile('|'.join(re.escape(keyword) for keyword in keywords)).search
+
+
+_is_functional = _keyword_matcher(FUNCTIONAL_KEYWORDS)
+_is_constraint = _keyword_matcher(['budget', 'cost', 'resource'])
+_mentions_compliance = _keyword_matcher(['comply', 'compliance'])
+_mentions_skill = _keyword_matcher(['skill', 'competenc'])
+
+
+class _ClauseAccumulator:
+    """
+    Collects everything the BRD needs from a single pass over the clauses
+    Each clause is normalised (lowercased) exactly once
+    """
+
+    def __init__(self):
+        self.functional_reqs: List[str] = []
+        self.non_functional_reqs: List[str] = []
+        self.business_objectives: List[str] = []
+        self.success_criteria: List[str] = []
+        self.constraints: List[str] = []
+        self.stakeholders = set()
+        self.num_clauses = 0
+        self.must_clauses = 0
+        self.content_clauses = 0
+        self.duration_clauses = 0
+        self.assessment_clauses = 0
+        self._seen_objectives = set()
+        self._seen_criteria = set()
+        self._pending_stakeholders = dict(STAKEHOLDER_KEYWORDS)
+
+    def add(self, clause: Any, extractor: 'BRDExtractor'):
+        """Fold one clause into the accumulated BRD data"""
+        text = clause.text if hasattr(clause, 'text') else str(clause)
+        category = clause.category if hasattr(clause, 'category') else 'other'
+        priority = clause.priority if hasattr(clause, 'priority') else 'may'
+        text_lower = text.lower()
+
+        self.num_clauses += 1
+        if category == 'content':
+            self.content_clauses += 1
+        elif category == 'duration':
+            self.duration_clauses += 1
+        elif category == 'assessment':
+            self.assessment_clauses += 1
+
+        # Categorize based on content and priority
+        if priority == 'must':
+            self.must_clauses += 1
+            # MUST requirements are functional requirements
+            if _is_functional(text_lower):
+                if len(self.functional_reqs) < MAX_FUNCTIONAL_REQUIREMENTS:
+                    self.functional_reqs.append(text)
+            elif len(self.non_functional_reqs) < MAX_NON_FUNCTIONAL_REQUIREMENTS:
+                self.non_functional_reqs.append(text)
+
+        # Extract business objectives from content-related clauses
+        if (category == 'content' and priority in ('must', 'should')
+                and len(self.business_objectives) < MAX_BUSINESS_OBJECTIVES):
+            objective = extractor._extract_business_objective(text, text_lower)
+            if objective and objective not in self._seen_objectives:
+                self._seen_objectives.add(objective)
+                self.business_objectives.append(objective)
+
+        # Duration and assessment clauses often indicate success criteria
+        if (category in ('assessment', 'duration')
+                and len(self.success_criteria) < MAX_SUCCESS_CRITERIA):
+            criteria = extractor._extract_success_criteria(text, text_lower)
+            if criteria and criteria not in self._seen_criteria:
+                self._seen_criteria.add(criteria)
+                self.success_criteria.append(criteria)
+
+        # Equipment and resource clauses may be constraints
+        if len(self.constraints) < MAX_CONSTRAINTS and _is_constraint(text_lower):
+            self.constraints.append(text)
+
+        # Look for specific stakeholders - keywords are dropped once found
+        if self._pending_stakeholders:
+            for keyword in [k for k in self._pending_stakeholders if k in text_lower]:
+                self.stakeholders.add(self._pending_stakeholders.pop(keyword))
+
 
 class BRDExtractor:
     """
@@ -10,53 +123,24 @@ class BRDExtractor:
     Creates professional BRD following industry standards
     """
     
-    def extract_from_rfp(self, rfp: Any, clauses: List[Any]) -> Dict[str, Any]:
+    def extract_from_rfp(self, rfp: Any, clauses: Iterable[Any]) -> BRDData:
         """
         Extract business requirements from RFP and create BRD
         
         Args:
             rfp: RFP object with title, organization, description
-            clauses: List of parsed clauses from RFP
+            clauses: Parsed clauses from RFP (iterated exactly once)
             
         Returns:
-            Dict with BRD structure
+            BRDData with the BRD structure
         """
         
-        # Categorize clauses
-        functional_reqs = []
-        non_functional_reqs = []
-        business_objectives = []
-        constraints = []
-        success_criteria = []
-        
+        acc = _ClauseAccumulator()
         for clause in clauses:
-            text = clause.text if hasattr(clause, 'text') else str(clause)
-            category = clause.category if hasattr(clause, 'category') else 'other'
-            priority = clause.priority if hasattr(clause, 'priority') else 'may'
-            
-            # Categorize based on content and priority
-            if priority == 'must':
-                # MUST requirements are functional requirements
-                if self._is_functional_requirement(text):
-                    functional_reqs.append(text)
-                else:
-                    non_functional_reqs.append(text)
-            
-            # Extract business objectives from content-related clauses
-            if category == 'content' and priority in ['must', 'should']:
-                objective = self._extract_business_objective(text)
-                if objective and objective not in business_objectives:
-                    business_objectives.append(objective)
-            
-            # Duration and assessment clauses often indicate success criteria
-            if category in ['assessment', 'duration']:
-                criteria = self._extract_success_criteria(text)
-                if criteria and criteria not in success_criteria:
-                    success_criteria.append(criteria)
-            
-            # Equipment and resource clauses may be constraints
-            if 'budget' in text.lower() or 'cost' in text.lower() or 'resource' in text.lower():
-                constraints.append(text)
+            acc.add(clause, self)
+        
+        business_objectives = acc.business_objectives
+        success_criteria = acc.success_criteria
         
         # If no business objectives found, create from RFP description
         if not business_objectives:
@@ -64,66 +148,43 @@ class BRDExtractor:
         
         # If no success criteria found, create from requirements
         if not success_criteria:
-            success_criteria = self._generate_default_success_criteria(clauses)
-        
-        # Extract stakeholders
-        stakeholders = self._identify_stakeholders(rfp, clauses)
-        
-        # Create executive summary
-        executive_summary = self._create_executive_summary(rfp, clauses)
-        
-        # Define scope
-        scope = self._define_scope(rfp, clauses)
-        
-        # Identify assumptions
-        assumptions = self._identify_assumptions(rfp, clauses)
-        
-        return {
-            'rfp_title': rfp.title if hasattr(rfp, 'title') else 'RFP',
-            'executive_summary': executive_summary,
-            'business_objectives': business_objectives[:10],  # Top 10
-            'functional_requirements': functional_reqs[:20],  # Top 20
-            'non_functional_requirements': non_functional_reqs[:15],  # Top 15
-            'scope': scope,
-            'stakeholders': stakeholders,
-            'success_criteria': success_criteria[:10],
-            'constraints': constraints[:10] if constraints else self._default_constraints(),
-            'assumptions': assumptions
-        }
-    
-    def _is_functional_requirement(self, text: str) -> bool:
-        """Determine if clause is a functional requirement"""
-        functional_keywords = [
-            'must include', 'shall provide', 'will include', 'training must', 
-            'course must', 'shall demonstrate', 'must cover', 'required to',
-            'participants will', 'students must', 'shall be able to'
-        ]
+            success_criteria = self._generate_default_success_criteria()
         
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in functional_keywords)
+        return BRDData(
+            rfp_title=rfp.title if hasattr(rfp, 'title') else 'RFP',
+            executive_summary=self._create_executive_summary(rfp, acc),
+            business_objectives=business_objectives[:MAX_BUSINESS_OBJECTIVES],
+            functional_requirements=acc.functional_reqs,
+            non_functional_requirements=acc.non_functional_reqs,
+            scope=self._define_scope(rfp, acc),
+            stakeholders=self._identify_stakeholders(rfp, acc),
+            success_criteria=success_criteria[:MAX_SUCCESS_CRITERIA],
+            constraints=acc.constraints if acc.constraints else self._default_constraints(),
+            assumptions=self._identify_assumptions(rfp)
+        )
     
-    def _extract_business_objective(self, text: str) -> str:
+    def _extract_business_objective(self, text: str, text_lower: str) -> str:
         """Convert clause to business objective"""
         # Common patterns to business objective mapping
-        if 'certification' in text.lower():
+        if 'certification' in text_lower:
             return "Provide industry-recognized certification to participants"
-        if 'comply' in text.lower() or 'compliance' in text.lower():
+        if _mentions_compliance(text_lower):
             return "Ensure regulatory compliance with training standards"
-        if 'skill' in text.lower() or 'competenc' in text.lower():
+        if _mentions_skill(text_lower):
             return "Develop practical skills and competencies in participants"
-        if 'safety' in text.lower():
+        if 'safety' in text_lower:
             return "Improve workplace safety through proper training"
         
         # Default: Clean up the clause text
         return text[:100] + "..." if len(text) > 100 else text
     
-    def _extract_success_criteria(self, text: str) -> str:
+    def _extract_success_criteria(self, text: str, text_lower: str) -> str:
         """Extract success criteria from clause"""
-        if 'pass' in text.lower():
+        if 'pass' in text_lower:
             return text
-        if '%' in text or 'percent' in text.lower():
+        if '%' in text or 'percent' in text_lower:
             return text
-        if 'assess' in text.lower():
+        if 'assess' in text_lower:
             return f"Successful completion of: {text[:80]}"
         return None
     
@@ -140,7 +201,7 @@ class BRDExtractor:
             "Provide measurable learning outcomes and competency verification"
         ]
     
-    def _generate_default_success_criteria(self, clauses: List[Any]) -> List[str]:
+    def _generate_default_success_criteria(self) -> List[str]:
         """Generate default success criteria"""
         return [
             "80% or higher pass rate on final assessment",
@@ -151,7 +212,7 @@ class BRDExtractor:
             "Compliance with accreditation standards"
         ]
     
-    def _identify_stakeholders(self, rfp: Any, clauses: List[Any]) -> List[str]:
+    def _identify_stakeholders(self, rfp: Any, acc: _ClauseAccumulator) -> List[str]:
         """Identify project stakeholders"""
         stakeholders = set()
         
@@ -164,31 +225,17 @@ class BRDExtractor:
         stakeholders.add("Instructors/Trainers")
         stakeholders.add("Program Administrators")
         
-        # Look for specific stakeholders in clauses
-        stakeholder_keywords = {
-            'management': 'Management Team',
-            'supervisor': 'Supervisors',
-            'employee': 'Employees',
-            'worker': 'Workers',
-            'regulator': 'Regulatory Bodies',
-            'accredit': 'Accreditation Bodies'
-        }
+        # Specific stakeholders found in clauses
+        stakeholders.update(acc.stakeholders)
         
-        for clause in clauses:
-            text = clause.text.lower() if hasattr(clause, 'text') else str(clause).lower()
-            for keyword, stakeholder in stakeholder_keywords.items():
-                if keyword in text:
-                    stakeholders.add(stakeholder)
-        
-        return sorted(list(stakeholders))[:8]  # Max 8 stakeholders
+        return sorted(stakeholders)[:MAX_STAKEHOLDERS]
     
-    def _create_executive_summary(self, rfp: Any, clauses: List[Any]) -> str:
+    def _create_executive_summary(self, rfp: Any, acc: _ClauseAccumulator) -> str:
         """Create executive summary"""
         title = rfp.title if hasattr(rfp, 'title') else 'Training Program'
         org = rfp.organization if hasattr(rfp, 'organization') else 'the organization'
-        num_clauses = len(clauses)
-        
-        must_clauses = sum(1 for c in clauses if hasattr(c, 'priority') and c.priority == 'must')
+        num_clauses = acc.num_clauses
+        must_clauses = acc.must_clauses
         
         return f"""This Business Requirements Document outlines the requirements extracted from {title} for {org}. 
 
@@ -196,14 +243,14 @@ The RFP contains {num_clauses} requirements, including {must_clauses} mandatory
 
 The primary focus is on delivering a compliant, high-quality training program that meets all specified requirements while ensuring participant competency and regulatory compliance."""
     
-    def _define_scope(self, rfp: Any, clauses: List[Any]) -> str:
+    def _define_scope(self, rfp: Any, acc: _ClauseAccumulator) -> str:
         """Define project scope"""
         title = rfp.title if hasattr(rfp, 'title') else 'training program'
         
-        # Count different types of requirements
-        content_clauses = sum(1 for c in clauses if hasattr(c, 'category') and c.category == 'content')
-        duration_clauses = sum(1 for c in clauses if hasattr(c, 'category') and c.category == 'duration')
-        assessment_clauses = sum(1 for c in clauses if hasattr(c, 'category') and c.category == 'assessment')
+        # Counts of different types of requirements
+        content_clauses = acc.content_clauses
+        duration_clauses = acc.duration_clauses
+        assessment_clauses = acc.assessment_clauses
         
         scope = f"""
 **In Scope:**
@@ -224,7 +271,7 @@ The primary focus is on delivering a compliant, high-quality training program th
         
         return scope
     
-    def _identify_assumptions(self, rfp: Any, clauses: List[Any]) -> List[str]:
+    def _identify_assumptions(self, rfp: Any) -> List[str]:
         """Identify project assumptions"""
         return [
             "All training materials will be provided in required languages",
@@ -249,3 +296,16 @@ The primary focus is on delivering a compliant, high-quality training program th
 # Global instance
 brd_extractor = BRDExtractor()
 
+
+def extract_brd_from_rows(rfp_fields: Dict[str, Any], clause_rows: List[Tuple[str, str, str]]) -> BRDData:
+    """
+    Process-pool entry point for batch BRD generation
+    
+    Args:
+        rfp_fields: Plain dict with RFP title and organization
+        clause_rows: (text, category, priority) tuples for the RFP's clauses
+    """
+    rfp = SimpleNamespace(**rfp_fields)
+    clauses = (SimpleNamespace(text=text, category=category, priority=priority)
+               for text, category, priority in clause_rows)
+    return brd_extractor.extract_from_rfp(rfp, clauses)
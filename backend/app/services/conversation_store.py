@@ -0,0 +1,206 @@
+"""
+Server-side state for the curriculum and PowerPoint chats
+Conversations live in a process-wide LRU with an idle TTL, so each chat turn
+sends only its new message and a turn served from memory runs no queries.
+With CONVERSATION_STORE=mysql or sqlite every turn is also written through
+to the conversations table (one upsert), so conversations survive restarts
+and are shared between API processes; a memory miss costs one primary-key read.
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import os
+import threading
+import time
+import uuid
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db_models import ChatConversation
+
+HISTORY_LIMIT = 100  # Messages kept per conversation (oldest dropped first)
+UPDATE_COLUMNS = ('kind', 'owner_id', 'context', 'history', 'updated_at')
+
+
+class Conversation:
+    """
+    One chat conversation
+    cache holds rows pre-loaded for the conversation (e.g. the RFP's clauses);
+    it lives in memory only and is rebuilt after a persistence-tier hit.
+    """
+
+    def __init__(self, id: str, kind: str, owner_id: Optional[str],
+                 context: Optional[Dict[str, Any]] = None, history: Optional[List[Dict[str, str]]] = None):
+        self.id = id
+        self.kind = kind
+        self.owner_id = owner_id
+        self.context = context or {}
+        self.history = history or []
+        self.cache: Dict[str, Any] = {}
+
+    def add_turn(self, message: str, reply: str):
+        self.history.append({'role': 'user', 'content': message})
+        self.history.append({'role': 'assistant', 'content': reply})
+        del self.history[:-HISTORY_LIMIT]
+
+
+class ConversationStore:
+    """LRU + TTL cache of conversations with an optional write-through database tier"""
+
+    def __init__(self, max_entries: int, ttl_seconds: int,
+                 session_factory: Optional[Callable[[], Session]] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.session_factory = session_factory
+        self._entries: "OrderedDict[str, Tuple[float, Conversation]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, kind: str, owner_id: Optional[str], context: Optional[Dict[str, Any]] = None) -> Conversation:
+        """
+        New conversation under a fresh id (not stored until save)
+        Client-supplied ids are never reused: an unknown or expired id may
+        belong to another chat, and save() would overwrite it.
+        """
+        return Conversation(str(uuid.uuid4()), kind, owner_id, context)
+
+    def get(self, conversation_id: str, kind: str) -> Optional[Conversation]:
+        """Conversation by id, or None if unknown, expired or of another kind"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(conversation_id)
+                conversation = entry[1]
+            else:
+                self._entries.pop(conversation_id, None)
+                conversation = None
+
+        if conversation is None and self.session_factory:
+            conversation = self._load(conversation_id)
+            if conversation:
+                self._remember(conversation)
+
+        if conversation is None or conversation.kind != kind:
+            return None
+        return conversation
+
+    def save(self, conversation: Conversation):
+        """Refresh the conversation's TTL and write it through to the database tier"""
+        self._remember(conversation)
+        if not self.session_factory:
+            return
+
+        values = {
+            'id': conversation.id,
+            'kind': conversation.kind,
+            'owner_id': conversation.owner_id,
+            'context': conversation.context,
+            'history': conversation.history,
+            'updated_at': datetime.utcnow(),
+        }
+        session = self.session_factory()
+        try:
+            self._upsert(session, values)
+            session.commit()
+        finally:
+            session.close()
+
+    def delete(self, conversation_id: str):
+        with self._lock:
+            self._entries.pop(conversation_id, None)
+        if self.session_factory:
+            session = self.session_factory()
+            try:
+                session.query(ChatConversation).filter(ChatConversation.id == conversation_id).delete()
+                session.commit()
+            finally:
+                session.close()
+
+    def purge_expired(self) -> int:
+        """Drop expired conversations from memory and the database tier (run by app.services.maintenance)"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (expires, _) in self._entries.items() if expires <= now]
+            for key in expired:
+                del self._entries[key]
+        removed = len(expired)
+
+        if self.session_factory:
+            cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+            session = self.session_factory()
+            try:
+                removed += session.query(ChatConversation).filter(ChatConversation.updated_at < cutoff).delete()
+                session.commit()
+            finally:
+                session.close()
+        return removed
+
+    def _remember(self, conversation: Conversation):
+        with self._lock:
+            self._entries[conversation.id] = (time.monotonic() + self.ttl_seconds, conversation)
+            self._entries.move_to_end(conversation.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load(self, conversation_id: str) -> Optional[Conversation]:
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        session = self.session_factory()
+        try:
+            row = (
+                session.query(ChatConversation)
+                .filter(ChatConversation.id == conversation_id, ChatConversation.updated_at >= cutoff)
+                .first()
+            )
+            if row is None:
+                return None
+            return Conversation(row.id, row.kind, row.owner_id, row.context, row.history)
+        finally:
+            session.close()
+
+    def _upsert(self, session: Session, values: Dict[str, Any]):
+        """Insert or update in one statement where the dialect supports it"""
+        table = ChatConversation.__table__
+        dialect = session.get_bind().dialect.name
+        if dialect == 'mysql':
+            from sqlalchemy.dialects.mysql import insert
+            statement = insert(table).values(**values)
+            statement = statement.on_duplicate_key_update(
+                **{column: statement.inserted[column] for column in UPDATE_COLUMNS}
+            )
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+            statement = insert(table).values(**values)
+            statement = statement.on_conflict_do_update(
+                index_elements=['id'],
+                set_={column: statement.excluded[column] for column in UPDATE_COLUMNS}
+            )
+        else:
+            session.merge(ChatConversation(**values))
+            return
+        session.execute(statement)
+
+
+def create_conversation_store() -> ConversationStore:
+    """Conversation store with the tier selected by Settings.CONVERSATION_STORE"""
+    session_factory = None
+    if settings.CONVERSATION_STORE == 'mysql':
+        from app.database import SessionLocal
+        session_factory = SessionLocal
+    elif settings.CONVERSATION_STORE == 'sqlite':
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        directory = os.path.dirname(settings.CONVERSATION_SQLITE_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        engine = create_engine(f"sqlite:///{settings.CONVERSATION_SQLITE_PATH}",
+                               connect_args={"check_same_thread": False})
+        ChatConversation.__table__.create(bind=engine, checkfirst=True)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    elif settings.CONVERSATION_STORE != 'memory':
+        raise ValueError(f"Unsupported CONVERSATION_STORE: {settings.CONVERSATION_STORE}")
+
+    return ConversationStore(settings.CONVERSATION_CACHE_SIZE, settings.CONVERSATION_TTL_SECONDS, session_factory)
+
+# Global instance
+conversation_store = create_conversation_store()
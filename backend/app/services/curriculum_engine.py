@@ -1,201 +1,146 @@
-from typing import Dict, List
-from app.models import CurriculumModule, Topic, Activity, Assessment
+"""
+Curriculum generation from selected RFP clauses and standards
+Clauses are mapped to topics through the instructional designer's keyword
+index; each topic becomes a module whose share of the course follows the
+summed priority weight of its clauses.
+"""
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+
+from app.services.design_types import DesignedModule
+from app.services.instructional_designer import (
+    InstructionalDesigner, instructional_designer, TOPIC_KEYWORDS, DEFAULT_TOPICS, match_topics
+)
+from app.services.standards_cache import get_standards
+
+DEFAULT_DURATION_MINUTES = 480
+PRIORITY_WEIGHTS = {'must': 3, 'should': 2, 'may': 1}
+MINUTE_STEP = 5  # Module lengths are whole multiples of this
+MIN_MODULE_MINUTES = 30
 
 class CurriculumEngine:
     """
     Service to generate curriculum from RFP clauses and standards
     """
-    
+
+    def __init__(self, db: Optional[Session] = None, designer: Optional[InstructionalDesigner] = None):
+        self.db = db
+        self.designer = designer or instructional_designer
+
     async def generate(
         self,
         rfp_id: str,
         clause_ids: List[str],
-        standard_ids: List[str]
+        standard_ids: List[str],
+        duration_minutes: int = DEFAULT_DURATION_MINUTES,
+        audience: str = "General"
     ) -> Dict:
         """
         Generate curriculum modules from clauses and standards
         """
-        # For now, create sample curriculum
-        # In production, this would analyze clauses and standards to generate real content
-        
-        modules = [
-            self._create_introduction_module(),
-            self._create_cpr_basics_module(),
-            self._create_hands_on_practice_module(),
-            self._create_assessment_module()
-        ]
-        
-        total_duration = sum(module.duration_minutes for module in modules)
-        
+        modules = self.build_modules(
+            self._load_clauses(rfp_id, clause_ids),
+            self._load_standards(standard_ids),
+            duration_minutes,
+            audience
+        )
+
         return {
             'curriculum_id': rfp_id,
             'modules': modules,
-            'total_duration_minutes': total_duration
+            'total_duration_minutes': sum(module.duration_minutes for module in modules)
         }
-    
-    def _create_introduction_module(self) -> CurriculumModule:
-        return CurriculumModule(
-            title="Introduction to CPR",
-            description="Overview of CPR, its importance, and course objectives",
-            learning_objectives=[
-                "Understand the importance of CPR in emergency situations",
-                "Identify when CPR is needed",
-                "Recognize the signs of cardiac arrest"
-            ],
-            duration_minutes=60,
-            sequence_order=1,
-            topics=[
-                Topic(
-                    title="What is CPR?",
-                    content="Cardiopulmonary resuscitation (CPR) is a lifesaving technique...",
-                    duration_minutes=20
-                ),
-                Topic(
-                    title="The Chain of Survival",
-                    content="Understanding the critical steps in emergency response...",
-                    duration_minutes=20
-                ),
-                Topic(
-                    title="Legal and Ethical Considerations",
-                    content="Good Samaritan laws and duty to act...",
-                    duration_minutes=20
-                )
-            ],
-            activities=[
-                Activity(
-                    type="lecture",
-                    title="CPR Overview Presentation",
-                    description="Instructor-led presentation on CPR fundamentals",
-                    duration_minutes=30
-                ),
-                Activity(
-                    type="discussion",
-                    title="Emergency Scenarios Discussion",
-                    description="Group discussion of various emergency scenarios",
-                    duration_minutes=30
-                )
-            ]
-        )
-    
-    def _create_cpr_basics_module(self) -> CurriculumModule:
-        return CurriculumModule(
-            title="CPR Techniques",
-            description="Step-by-step CPR techniques for adults, children, and infants",
-            learning_objectives=[
-                "Demonstrate proper hand placement for chest compressions",
-                "Perform chest compressions at correct rate and depth",
-                "Deliver rescue breaths effectively"
-            ],
-            duration_minutes=120,
-            sequence_order=2,
-            topics=[
-                Topic(
-                    title="Adult CPR",
-                    content="Techniques for performing CPR on adults...",
-                    duration_minutes=40
-                ),
-                Topic(
-                    title="Child CPR",
-                    content="Modified techniques for children...",
-                    duration_minutes=40
-                ),
-                Topic(
-                    title="Infant CPR",
-                    content="Special considerations for infants...",
-                    duration_minutes=40
-                )
-            ],
-            activities=[
-                Activity(
-                    type="hands-on",
-                    title="Adult CPR Practice",
-                    description="Practice chest compressions and rescue breaths on manikins",
-                    duration_minutes=60,
-                    materials_needed=["Adult CPR manikins", "Face shields", "Gloves"]
-                ),
-                Activity(
-                    type="video",
-                    title="CPR Demonstration Video",
-                    description="Watch professional demonstration of proper technique",
-                    duration_minutes=15
-                )
-            ]
-        )
-    
-    def _create_hands_on_practice_module(self) -> CurriculumModule:
-        return CurriculumModule(
-            title="Hands-On Practice and Scenarios",
-            description="Realistic scenario practice with feedback",
-            learning_objectives=[
-                "Apply CPR skills in realistic scenarios",
-                "Work effectively in emergency situations",
-                "Make appropriate decisions under pressure"
-            ],
-            duration_minutes=180,
-            sequence_order=3,
-            topics=[
-                Topic(
-                    title="Scenario-Based Training",
-                    content="Practice with realistic emergency scenarios...",
-                    duration_minutes=120
-                ),
-                Topic(
-                    title="Team CPR",
-                    content="Coordinating with others during CPR...",
-                    duration_minutes=60
-                )
-            ],
-            activities=[
-                Activity(
-                    type="scenario",
-                    title="Cardiac Arrest Scenarios",
-                    description="Students respond to various cardiac arrest scenarios",
-                    duration_minutes=120,
-                    materials_needed=["Manikins", "AED trainers", "Scenario cards"]
-                )
-            ]
-        )
-    
-    def _create_assessment_module(self) -> CurriculumModule:
-        return CurriculumModule(
-            title="Skills Assessment and Certification",
-            description="Practical skills test and written exam",
-            learning_objectives=[
-                "Demonstrate competency in CPR skills",
-                "Pass written knowledge assessment"
-            ],
-            duration_minutes=60,
-            sequence_order=4,
-            topics=[
-                Topic(
-                    title="Skills Test",
-                    content="Practical demonstration of CPR skills...",
-                    duration_minutes=30
-                ),
-                Topic(
-                    title="Written Exam",
-                    content="Knowledge assessment covering all course content...",
-                    duration_minutes=30
-                )
-            ],
-            activities=[
-                Activity(
-                    type="assessment",
-                    title="Practical Skills Test",
-                    description="Students perform CPR on manikins while being evaluated",
-                    duration_minutes=30
-                ),
-                Activity(
-                    type="assessment",
-                    title="Written Knowledge Test",
-                    description="25-question multiple choice exam",
-                    duration_minutes=30
-                )
-            ],
-            assessment=Assessment(
-                type="practical",
-                title="CPR Skills Assessment",
-                passing_score=80
-            )
+
+    def build_modules(self, clauses: List[Any], standards: List[Any], duration_minutes: int,
+                      audience: str) -> List[DesignedModule]:
+        """
+        One module per weighted topic, the heaviest topics kept when there are
+        more topics than the course length allows, in teaching order
+        """
+        weights = topic_weights(clauses)
+        # No more modules than the course can give MIN_MODULE_MINUTES each
+        limit = min(self.designer.module_count(duration_minutes),
+                    max(1, duration_minutes // MIN_MODULE_MINUTES))
+        kept = set(sorted(weights, key=weights.get, reverse=True)[:limit])
+        topics = [topic for topic in TOPIC_KEYWORDS if topic in kept]
+        if not topics:
+            topics = DEFAULT_TOPICS[:limit]
+            weights = dict.fromkeys(topics, 1)
+
+        aligned = standards_by_topic(standards)
+        durations = allocate_minutes([weights[topic] for topic in topics], duration_minutes)
+
+        modules = []
+        for number, (topic, minutes) in enumerate(zip(topics, durations), 1):
+            module = self.designer.design_module(topic, number, len(topics), minutes, audience)
+            if aligned.get(topic):
+                module.description += f" (aligned with {', '.join(aligned[topic])})"
+            modules.append(module)
+        return modules
+
+    def _load_clauses(self, rfp_id: str, clause_ids: List[str]) -> List[Any]:
+        """The RFP's selected clauses (text and priority only), with one IN query"""
+        from app.db_models import Clause
+
+        if not self.db or not clause_ids:
+            return []
+        return (
+            self.db.query(Clause.text, Clause.priority)
+            .filter(Clause.rfp_id == rfp_id, Clause.id.in_(set(clause_ids)))
+            .all()
         )
 
+    def _load_standards(self, standard_ids: List[str]) -> List[Any]:
+        """Selected standards from the process-wide standards snapshot"""
+        if not self.db or not standard_ids:
+            return []
+        wanted = set(standard_ids)
+        return [standard for standard in get_standards(self.db) if standard.id in wanted]
+
+
+def topic_weights(clauses: List[Any]) -> Dict[str, int]:
+    """Summed priority weight of the clauses that mention each topic"""
+    weights: Dict[str, int] = {}
+    for clause in clauses:
+        weight = PRIORITY_WEIGHTS.get(str(clause.priority).lower(), 1)
+        for topic in match_topics(clause.text.lower()):
+            weights[topic] = weights.get(topic, 0) + weight
+    return weights
+
+
+def standards_by_topic(standards: List[Any]) -> Dict[str, List[str]]:
+    """Standard names grouped by the topics their name, description and tags mention"""
+    aligned: Dict[str, List[str]] = {}
+    for standard in standards:
+        text = " ".join([standard.name, standard.description or "", *(standard.tags or [])]).lower()
+        for topic in match_topics(text):
+            aligned.setdefault(topic, []).append(standard.name)
+    return aligned
+
+
+def allocate_minutes(weights: List[int], total_minutes: int) -> List[int]:
+    """
+    Split the course across modules in proportion to weight
+    Every module gets at least MIN_MODULE_MINUTES (when the course is long
+    enough); the rest is shared in MINUTE_STEP blocks by largest remainder,
+    and minutes short of a whole block go to the last module, so the
+    lengths always add up to total_minutes. Courses too short for a block
+    per module are shared in single minutes instead, so every module gets
+    at least one; more modules than minutes raise ValueError.
+    """
+    if len(weights) > total_minutes:
+        raise ValueError(f"Cannot split {total_minutes} minutes across {len(weights)} modules")
+    step = MINUTE_STEP if total_minutes >= MINUTE_STEP * len(weights) else 1
+    steps = total_minutes // step
+    floor_steps = min(MIN_MODULE_MINUTES // step, steps // len(weights))
+    spare = steps - floor_steps * len(weights)
+    total_weight = sum(weights)
+
+    shares = [spare * weight / total_weight for weight in weights]
+    blocks = [floor_steps + int(share) for share in shares]
+    by_remainder = sorted(range(len(weights)), key=lambda i: shares[i] - int(shares[i]), reverse=True)
+    for i in by_remainder[:steps - sum(blocks)]:
+        blocks[i] += 1
+    minutes = [block * step for block in blocks]
+    minutes[-1] += total_minutes - steps * step
+    return minutes
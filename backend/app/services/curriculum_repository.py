@@ -0,0 +1,176 @@
+"""
+Curriculum persistence helpers shared by the chat and the output generators
+"""
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Any, Dict, Optional, Tuple
+import threading
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+
+from app.config import settings
+
+# Modules fetched per round-trip while streaming
+MODULE_BATCH_SIZE = 4
+
+_aggregate_lock = threading.Lock()
+_aggregates: "OrderedDict[str, Tuple[float, SimpleNamespace]]" = OrderedDict()
+_generation = 0  # Bumped by invalidate_curriculum so in-flight loads are not cached
+
+
+def load_curriculum_aggregate(db: Session, curriculum_id: str) -> Optional[SimpleNamespace]:
+    """
+    A curriculum with its modules (in sequence order) and scenarios, in
+    three queries whatever their size: the curriculum, then one selectin
+    query per relationship
+    The aggregate is a detached, read-only copy (attribute access like the
+    ORM models, collections as tuples). Outputs are left out: their status
+    changes while jobs run, so a cached copy would be stale at once.
+    Returns None if the curriculum does not exist.
+    """
+    from app.db_models import Curriculum
+
+    curriculum = (
+        db.query(Curriculum)
+        .options(
+            selectinload(Curriculum.modules),
+            selectinload(Curriculum.scenarios),
+        )
+        .filter(Curriculum.id == curriculum_id)
+        .first()
+    )
+    if curriculum is None:
+        return None
+    return _snapshot(
+        curriculum,
+        modules=tuple(_snapshot(module) for module in curriculum.modules),
+        scenarios=tuple(_snapshot(scenario) for scenario in curriculum.scenarios),
+    )
+
+
+def get_curriculum_aggregate(db: Session, curriculum_id: str) -> Optional[SimpleNamespace]:
+    """
+    load_curriculum_aggregate() through a process-wide LRU shared by the
+    output generators, so building a deck, both manuals, scenarios and a test
+    for one curriculum loads it once
+    Entries expire after CURRICULUM_CACHE_TTL_SECONDS; edits made through the
+    API call invalidate_curriculum().
+    """
+    now = time.monotonic()
+    with _aggregate_lock:
+        entry = _aggregates.get(curriculum_id)
+        if entry and entry[0] > now:
+            _aggregates.move_to_end(curriculum_id)
+            return entry[1]
+        _aggregates.pop(curriculum_id, None)
+        generation = _generation
+
+    aggregate = load_curriculum_aggregate(db, curriculum_id)
+    if aggregate is None:
+        return None
+
+    with _aggregate_lock:
+        # Skip caching if an invalidation landed while we were loading
+        if generation == _generation:
+            _aggregates[curriculum_id] = (time.monotonic() + settings.CURRICULUM_CACHE_TTL_SECONDS, aggregate)
+            while len(_aggregates) > settings.CURRICULUM_CACHE_SIZE:
+                _aggregates.popitem(last=False)
+    return aggregate
+
+
+def invalidate_curriculum(curriculum_id: Optional[str] = None):
+    """Drop a cached aggregate (every aggregate if no id is given)"""
+    global _generation
+    with _aggregate_lock:
+        _generation += 1
+        if curriculum_id is None:
+            _aggregates.clear()
+        else:
+            _aggregates.pop(curriculum_id, None)
+
+
+def iter_modules(db: Session, curriculum_id: str, batch_size: int = MODULE_BATCH_SIZE):
+    """
+    Yield a curriculum's modules in sequence order, fetched in small batches
+    Each module is expunged once the caller moves on, so the session does
+    not accumulate every ORM object of a large curriculum. Used by the PDF
+    manuals, which render one module at a time, instead of the aggregate.
+    """
+    from app.db_models import CurriculumModule
+    
+    query = (
+        db.query(CurriculumModule)
+        .filter(CurriculumModule.curriculum_id == curriculum_id)
+        .order_by(CurriculumModule.sequence_order)
+        .yield_per(batch_size)
+    )
+    for module in query:
+        yield module
+        db.expunge(module)
+
+
+def _snapshot(row: Any, **collections) -> SimpleNamespace:
+    """Column values of an ORM row, plus any child collections"""
+    values = {attr.key: getattr(row, attr.key) for attr in row.__mapper__.column_attrs}
+    return SimpleNamespace(**values, **collections)
+
+
+def save_designed_curriculum(db: Session, rfp_id: str, design: Dict[str, Any],
+                             client_key: Optional[str] = None) -> Tuple[str, bool]:
+    """
+    Persist a designed curriculum (InstructionalDesigner output) and all of
+    its modules in one transaction, the modules as a single bulk insert
+    A repeated client_key returns the curriculum saved the first time.
+
+    Returns:
+        (curriculum_id, created)
+    """
+    from app.db_models import Curriculum, CurriculumModule, generate_uuid
+
+    if client_key:
+        existing = db.query(Curriculum.id).filter(Curriculum.client_key == client_key).first()
+        if existing:
+            return existing.id, False
+
+    curriculum_id = generate_uuid()
+    modules = [
+        {
+            'id': generate_uuid(),
+            'curriculum_id': curriculum_id,
+            'title': module.get('title') or f"Module {order}",
+            'description': module.get('description', ''),
+            'learning_objectives': module.get('learning_objectives') or [],
+            'duration_minutes': module.get('duration_minutes') or 0,
+            'sequence_order': module.get('sequence_order') or order,
+            'topics': module.get('topics') or [],
+            'activities': module.get('activities') or [],
+            'assessment': module.get('assessment'),
+        }
+        for order, module in enumerate(design.get('modules') or [], 1)
+    ]
+
+    try:
+        db.execute(insert(Curriculum), [{
+            'id': curriculum_id,
+            'rfp_id': rfp_id,
+            'title': design.get('title') or 'Untitled Curriculum',
+            'description': design.get('description', ''),
+            'status': 'completed',
+            'total_duration_minutes': design.get('total_duration_minutes', 480),
+            'client_key': client_key,
+        }])
+        if modules:
+            db.execute(insert(CurriculumModule), modules)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        # A concurrent save with the same key won the race
+        if client_key:
+            existing = db.query(Curriculum.id).filter(Curriculum.client_key == client_key).first()
+            if existing:
+                return existing.id, False
+        raise
+    return curriculum_id, True
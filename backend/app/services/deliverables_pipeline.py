@@ -0,0 +1,217 @@
+"""
+One-shot deliverables pipeline
+Loads a curriculum and its modules once, renders all five deliverables in
+parallel in the shared process pool and bundles them into a single ZIP.
+Bundles are named by content hash, so concurrent runs never overwrite each
+other's ZIP, and each rendered file is pinned as soon as its stage finishes
+so output cache eviction cannot remove it before it is bundled.
+"""
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional
+from sqlalchemy.orm import Session
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+import zipfile
+
+from app.services.curriculum_repository import get_curriculum_aggregate
+from app.services.local_storage import storage
+from app.services.output_cache import CURRICULUM_FIELDS, MODULE_FIELDS
+from app.services.worker_pool import get_process_pool
+
+STAGES = ['ppt', 'student_manual', 'instructor_manual', 'scenarios', 'test_questions']
+
+# Fixed entry timestamp, so identical deliverables give an identical bundle
+BUNDLE_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+class PipelineError(Exception):
+    """Raised when one or more pipeline stages fail"""
+    
+    def __init__(self, errors: Dict[str, str], timings: Dict[str, int]):
+        super().__init__("; ".join(f"{stage}: {error}" for stage, error in errors.items()))
+        self.errors = errors
+        self.timings = timings
+
+
+def load_curriculum_snapshot(db: Session, curriculum_id: str, question_count: int = 25) -> Optional[Dict[str, Any]]:
+    """
+    Load the curriculum, its ordered modules and the question bank rows its
+    test draws from as plain (picklable) dicts
+    Returns None if the curriculum does not exist.
+    """
+    from app.services.generators.test_generator import TestGenerator
+    
+    curriculum = get_curriculum_aggregate(db, curriculum_id)
+    if not curriculum:
+        return None
+    
+    module_dicts = [{field: getattr(module, field) for field in MODULE_FIELDS} for module in curriculum.modules]
+    return {
+        'curriculum': {field: getattr(curriculum, field) for field in CURRICULUM_FIELDS},
+        'modules': module_dicts,
+        'question_bank': TestGenerator(db).candidate_questions(module_dicts, question_count)
+    }
+
+
+def _pin(path: str) -> str:
+    """
+    Private hard link (or copy, across filesystems) of a cached output
+    The bundle reads the pin, which eviction of the cached file cannot remove.
+    """
+    pinned = os.path.join(storage.outputs_dir, f"{uuid.uuid4().hex}.pin.tmp")
+    try:
+        os.link(path, pinned)
+    except OSError:
+        shutil.copyfile(path, pinned)
+    return pinned
+
+
+def _release(results: List[Any]):
+    """Remove the pinned files of finished stages"""
+    for result in results:
+        if isinstance(result, dict) and 'path' in result and os.path.exists(result['path']):
+            os.remove(result['path'])
+
+
+def run_stage(stage: str, snapshot: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Process-pool entry point: render one deliverable from the snapshot
+    Returns the ZIP entry name plus either a pinned file path (removed once
+    bundled) or inline content.
+    """
+    from app.services.generators.ppt_generator import PptGenerator
+    from app.services.generators.pdf_generator import PdfGenerator
+    from app.services.generators.scenario_generator import ScenarioGenerator, scenario_seed, module_topics
+    from app.services.generators.test_generator import TestGenerator, form_seed
+    
+    started = time.perf_counter()
+    curriculum = SimpleNamespace(**snapshot['curriculum'])
+    modules = [SimpleNamespace(**module) for module in snapshot['modules']]
+    result = {'stage': stage}
+    
+    if stage == 'ppt':
+        generator = PptGenerator()
+        customizations = options.get('customizations')
+        cache_key = generator.cache_key(curriculum, snapshot['modules'], customizations)
+        url = generator.render(curriculum.id, curriculum, modules, customizations, cache_key)
+        result['path'] = storage.get_file_path(url)
+        result['arcname'] = 'presentation.pptx'
+    elif stage == 'student_manual':
+        generator = PdfGenerator()
+        cache_key = generator.cache_key('student_manual', curriculum, snapshot['modules'])
+        result['path'] = storage.get_file_path(generator.render_student_manual(curriculum, modules, cache_key))
+        result['arcname'] = 'student_manual.pdf'
+    elif stage == 'instructor_manual':
+        generator = PdfGenerator()
+        cache_key = generator.cache_key('instructor_manual', curriculum, snapshot['modules'])
+        result['path'] = storage.get_file_path(generator.render_instructor_manual(curriculum, modules, cache_key))
+        result['arcname'] = 'instructor_manual.pdf'
+    elif stage == 'scenarios':
+        scenarios = ScenarioGenerator().iter_scenarios(
+            module_topics(snapshot['modules']), options['scenario_count'], scenario_seed(curriculum.id)
+        )
+        result['content'] = json.dumps([s.model_dump() for s in scenarios], indent=2)
+        result['arcname'] = 'scenarios.json'
+    elif stage == 'test_questions':
+        questions = TestGenerator(bank=snapshot['question_bank']).assemble_forms(
+            snapshot['modules'], options['question_count'], 1, form_seed(curriculum.id)
+        )[0]
+        result['content'] = json.dumps([q.model_dump() for q in questions], indent=2)
+        result['arcname'] = 'test_questions.json'
+    else:
+        raise ValueError(f"Unknown pipeline stage: {stage}")
+    
+    if 'path' in result:
+        result['path'] = _pin(result['path'])
+    result['elapsed_ms'] = int((time.perf_counter() - started) * 1000)
+    return result
+
+
+def _bundle_entry(arcname: str, compress_type: int) -> zipfile.ZipInfo:
+    """ZIP entry with a fixed timestamp and rw-r--r-- permissions"""
+    info = zipfile.ZipInfo(arcname, date_time=BUNDLE_DATE_TIME)
+    info.compress_type = compress_type
+    info.external_attr = 0o644 << 16
+    return info
+
+
+def _write_bundle(curriculum_id: str, results: List[Dict[str, Any]]) -> str:
+    """Zip the stage artifacts into storage and return the bundle URL"""
+    fd, tmp_path = tempfile.mkstemp(dir=storage.outputs_dir, suffix='.zip.tmp')
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(tmp_path, 'w') as bundle:
+            for result in results:
+                if 'path' in result:
+                    # pptx / pdf are already compressed
+                    entry = _bundle_entry(result['arcname'], zipfile.ZIP_STORED)
+                    with open(result['path'], 'rb') as src, bundle.open(entry, 'w') as dst:
+                        shutil.copyfileobj(src, dst, 1024 * 1024)
+                else:
+                    bundle.writestr(_bundle_entry(result['arcname'], zipfile.ZIP_DEFLATED), result['content'])
+        with open(tmp_path, 'rb') as f:
+            digest = hashlib.file_digest(f, 'sha256').hexdigest()
+        file_info = storage.save_output_file(
+            tmp_path, f"deliverables_{curriculum_id}_{digest[:16]}.zip", 'bundles'
+        )
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        _release(results)
+    return file_info['url']
+
+
+async def run_pipeline(
+    snapshot: Dict[str, Any],
+    scenario_count: int = 5,
+    question_count: int = 25,
+    customizations: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Render all deliverables in parallel and bundle them
+    
+    Returns:
+        Dict with bundle file_url, per-stage timings (ms) and total_ms
+    """
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    options = {
+        'scenario_count': scenario_count,
+        'question_count': question_count,
+        'customizations': customizations
+    }
+    
+    results = await asyncio.gather(
+        *(loop.run_in_executor(pool, run_stage, stage, snapshot, options) for stage in STAGES),
+        return_exceptions=True
+    )
+    
+    timings = {}
+    errors = {}
+    for stage, result in zip(STAGES, results):
+        if isinstance(result, Exception):
+            errors[stage] = str(result)
+        else:
+            timings[stage] = result['elapsed_ms']
+    if errors:
+        _release(results)
+        raise PipelineError(errors, timings)
+    
+    bundle_started = time.perf_counter()
+    file_url = await loop.run_in_executor(None, _write_bundle, snapshot['curriculum']['id'], results)
+    timings['bundle'] = int((time.perf_counter() - bundle_started) * 1000)
+    
+    return {
+        'file_url': file_url,
+        'timings': timings,
+        'total_ms': int((time.perf_counter() - started) * 1000)
+    }
@@ -0,0 +1,113 @@
+"""
+Memoised curriculum designs
+A design is a pure function of its inputs, so it is cached under a hash of
+them. The clauses are keyed by a cheap fingerprint - the RFP id, the
+version of its clause set and the selected clause ids - instead of hashing
+every clause row on each call; editing, adding or deleting a clause of the
+RFP changes the version. Standards are not part of the key, since designs
+do not read them.
+
+Cached designs are shared, not copied: callers must treat them as read-only.
+"""
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+import hashlib
+import json
+import threading
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.services.design_types import DesignedCurriculum
+
+
+def clause_set_version(db: Session, rfp_id: str) -> str:
+    """Clause count and latest clause update of an RFP (one aggregate query)"""
+    from app.db_models import Clause
+    
+    count, latest = (
+        db.query(func.count(Clause.id), func.max(Clause.updated_at))
+        .filter(Clause.rfp_id == rfp_id)
+        .one()
+    )
+    return f"{count}:{latest}"
+
+
+def source_fingerprint(rfp_id: str, clause_version: str, clause_ids: Optional[Iterable[str]] = None) -> str:
+    """
+    Fingerprint of the clauses a design is built from
+    
+    Args:
+        clause_version: clause_set_version() of the RFP
+        clause_ids: Selected clause ids in design order; None for the RFP's MUST clauses
+    """
+    if clause_ids is None:
+        selection = 'must'
+    else:
+        selection = hashlib.sha256("\n".join(clause_ids).encode('utf-8')).hexdigest()
+    return f"{rfp_id}:{clause_version}:{selection}"
+
+
+def design_key(
+    title: str,
+    duration_minutes: int,
+    audience: str,
+    sources: str,
+    user_instructions: str = ""
+) -> str:
+    """Stable cache key for a design of the clauses fingerprinted by sources (see source_fingerprint)"""
+    payload = {
+        'title': title,
+        'duration_minutes': duration_minutes,
+        'audience': audience,
+        'sources': sources,
+        'user_instructions': user_instructions or '',
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class DesignCache:
+    """Bounded LRU of designed curricula with hit/miss counters"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, DesignedCurriculum]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[DesignedCurriculum]:
+        """The cached (shared, read-only) design, or None"""
+        with self._lock:
+            design = self._entries.get(key)
+            if design is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return design
+
+    def put(self, key: str, design: DesignedCurriculum):
+        """
+        Cache a design, evicting the least recently used beyond max_entries
+        The design is stored as is; neither the caller nor later readers may modify it.
+        """
+        with self._lock:
+            self._entries[key] = design
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'size': len(self._entries), 'max_entries': self.max_entries}
+
+# Global instance
+design_cache = DesignCache(settings.DESIGN_CACHE_SIZE)
@@ -0,0 +1,123 @@
+"""
+Compact internal representations of designed curricula and BRDs
+The instructional designer and BRD extractor build slotted dataclasses
+instead of nested dicts. to_json() is the one serialisation path to API
+responses (orjson when installed, which encodes dataclasses natively),
+through DesignJSONResponse; to_plain() gives nested dicts for pydantic
+fields and JSON columns.
+"""
+from dataclasses import dataclass
+from datetime import date, time
+from typing import Any, List, Optional
+import json
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Optional dependency; the stdlib encoder is the fallback
+    orjson = None
+
+
+@dataclass(slots=True)
+class DesignedTopic:
+    title: str
+    content: str
+    duration_minutes: int
+
+
+@dataclass(slots=True)
+class DesignedActivity:
+    type: str
+    title: str
+    description: str
+    duration_minutes: int
+    materials_needed: Optional[List[str]] = None
+
+
+@dataclass(slots=True)
+class DesignedAssessment:
+    type: str
+    title: str
+    passing_score: int
+
+
+@dataclass(slots=True)
+class DesignedModule:
+    title: str
+    description: str
+    learning_objectives: List[str]
+    duration_minutes: int
+    sequence_order: int
+    topics: List[DesignedTopic]
+    activities: List[DesignedActivity]
+    assessment: Optional[DesignedAssessment] = None
+
+
+@dataclass(slots=True)
+class DesignedCurriculum:
+    title: str
+    description: str
+    total_duration_minutes: int
+    modules: List[DesignedModule]
+    design_notes: str
+
+
+@dataclass(slots=True)
+class BRDData:
+    rfp_title: str
+    executive_summary: str
+    business_objectives: List[str]
+    functional_requirements: List[str]
+    non_functional_requirements: List[str]
+    scope: str
+    stakeholders: List[str]
+    success_criteria: List[str]
+    constraints: List[str]
+    assumptions: List[str]
+
+
+def to_plain(value: Any) -> Any:
+    """Dataclasses (nested in lists and dicts) as plain dicts"""
+    fields = getattr(type(value), '__dataclass_fields__', None)
+    if fields is not None:
+        return {name: to_plain(getattr(value, name)) for name in fields}
+    if isinstance(value, (list, tuple)):
+        return [to_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_plain(item) for key, item in value.items()}
+    return value
+
+
+def _json_default(value: Any) -> Any:
+    """
+    Encoder hook for values JSON has no type for, shared by both encoders so
+    the output does not depend on whether orjson is installed: dataclasses
+    one level at a time (the encoder recurses), dates and times as ISO 8601
+    (what orjson writes natively), anything else as str()
+    """
+    fields = getattr(type(value), '__dataclass_fields__', None)
+    if fields is not None:
+        return {name: getattr(value, name) for name in fields}
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def to_json(value: Any) -> bytes:
+    """UTF-8 JSON for dataclasses, dicts and lists (compact, like JSONResponse)"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+
+class DesignJSONResponse(JSONResponse):
+    """
+    JSON response encoded with to_json(), for content holding designed dataclasses
+    Return an instance from the route, so the content skips FastAPI's
+    jsonable_encoder / response_model copy; document the shape with
+    responses={200: {'model': ...}} instead of response_model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
@@ -0,0 +1,237 @@
+"""
+HTTP file serving for uploads and generated outputs
+Redirects to the storage backend's direct download URL when it has one
+(presigned S3 URLs); otherwise adds strong content-hash ETags, Cache-Control, single-range requests for
+resumable downloads and precompressed gzip/brotli variants of text-like
+generated outputs on top of Starlette's FileResponse. Uploads are served
+without variants: their blobs directory belongs to storage GC, which would
+delete sidecars written there.
+"""
+from collections import OrderedDict
+from typing import Iterator, Optional, Tuple
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+import gzip
+import hashlib
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+from urllib.parse import quote
+
+from app.services.local_storage import storage, UPLOADS_URL_PREFIX
+
+try:
+    import brotli
+except ImportError:  # optional: gzip variants only
+    brotli = None
+
+CACHE_CONTROL = 'private, no-cache'
+CHUNK_SIZE = 256 * 1024
+
+# Media types worth compressing; PDF, PPTX and ZIP are already compressed
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/xml', 'application/javascript',
+    'text/plain', 'text/csv', 'text/html', 'text/markdown', 'text/xml', 'image/svg+xml',
+}
+MIN_COMPRESS_BYTES = 1024
+
+# (encoding, sidecar suffix), in order of preference
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+# path -> ((size, mtime_ns), sha256 hex); bounded LRU
+MAX_HASHES = 4096
+_hashes: "OrderedDict[str, Tuple[Tuple[int, int], str]]" = OrderedDict()
+_hash_lock = threading.Lock()
+_compress_lock = threading.Lock()
+
+
+def resolve_path(root: str, filepath: str) -> str:
+    """Resolve filepath, 404 if it is not an existing file under root"""
+    root = os.path.realpath(root)
+    filepath = os.path.realpath(filepath)
+    if os.path.commonpath([root, filepath]) != root or not os.path.isfile(filepath):
+        raise HTTPException(status_code=404, detail="File not found")
+    return filepath
+
+
+def content_hash(filepath: str, stat: os.stat_result = None) -> str:
+    """SHA-256 of a file, recomputed only when its size or mtime changes"""
+    stat = stat or os.stat(filepath)
+    version = (stat.st_size, stat.st_mtime_ns)
+    with _hash_lock:
+        cached = _hashes.get(filepath)
+        if cached and cached[0] == version:
+            _hashes.move_to_end(filepath)
+            return cached[1]
+
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    value = digest.hexdigest()
+
+    with _hash_lock:
+        _hashes[filepath] = (version, value)
+        _hashes.move_to_end(filepath)
+        while len(_hashes) > MAX_HASHES:
+            _hashes.popitem(last=False)
+    return value
+
+
+def _accepts(request: Request, encoding: str) -> bool:
+    for part in request.headers.get('accept-encoding', '').split(','):
+        name, _, params = part.strip().partition(';')
+        if name.strip().lower() in (encoding, '*'):
+            return params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+def _compressed_variant(filepath: str, encoding: str, suffix: str, stat: os.stat_result) -> Optional[str]:
+    """Path of an up-to-date precompressed sidecar, written on first use"""
+    if encoding == 'br' and brotli is None:
+        return None
+
+    variant = filepath + suffix
+    try:
+        if os.stat(variant).st_mtime_ns >= stat.st_mtime_ns:
+            return variant
+    except FileNotFoundError:
+        pass
+
+    with _compress_lock:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(filepath), suffix=suffix + '.tmp')
+        try:
+            with open(filepath, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+                if encoding == 'br':
+                    dst.write(brotli.compress(src.read()))
+                else:
+                    with gzip.GzipFile(fileobj=dst, mode='wb', mtime=0) as gz:
+                        shutil.copyfileobj(src, gz, CHUNK_SIZE)
+            os.replace(tmp_path, variant)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return variant
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single 'bytes=' range into inclusive (start, end)
+    Returns None for headers we do not honour (multiple ranges, other units),
+    in which case the full file is served; raises 416 if unsatisfiable.
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+
+    first, _, last = spec.strip().partition('-')
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+
+    if start >= size or start > end or (not first and not last):
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable",
+                            headers={'Content-Range': f"bytes */{size}"})
+    return start, min(end, size - 1)
+
+
+def _iter_range(filepath: str, start: int, length: int) -> Iterator[bytes]:
+    with open(filepath, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def content_disposition(filename: str) -> str:
+    """Inline Content-Disposition naming the file (RFC 5987 encoding for non-ASCII names)"""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"inline; filename*=utf-8''{quoted}"
+    return f'inline; filename="{filename}"'
+
+
+def serve_file(request: Request, filepath: str, filename: Optional[str] = None,
+               precompress: bool = True) -> Response:
+    """
+    Serve a file with ETag / If-None-Match revalidation, Range requests and
+    (for text-like files) precompressed Content-Encoding variants
+
+    Args:
+        filename: Name the file was stored under, when filepath has none of its
+            own (content-addressed blobs); sets the media type and Content-Disposition
+        precompress: Serve (and write on first use) gzip/brotli sidecars next
+            to the file; False for upload blobs
+    """
+    stat = os.stat(filepath)
+    media_type = mimetypes.guess_type(filename or filepath)[0] or 'application/octet-stream'
+    etag = f'"{content_hash(filepath, stat)}"'
+    compressible = precompress and media_type in COMPRESSIBLE_TYPES and stat.st_size >= MIN_COMPRESS_BYTES
+
+    headers = {'Cache-Control': CACHE_CONTROL, 'Accept-Ranges': 'bytes'}
+    if filename:
+        headers['Content-Disposition'] = content_disposition(filename)
+    if compressible:
+        headers['Vary'] = 'Accept-Encoding'
+
+    range_header = request.headers.get('range')
+    if_range = request.headers.get('if-range')
+    byte_range = None
+    if range_header and (not if_range or if_range == etag):
+        byte_range = _parse_range(range_header, stat.st_size)
+
+    # Each encoding is a separate representation with its own strong ETag;
+    # ranges always refer to the identity representation
+    if compressible and byte_range is None:
+        for encoding, suffix in ENCODINGS:
+            if _accepts(request, encoding):
+                variant = _compressed_variant(filepath, encoding, suffix, stat)
+                if variant:
+                    etag = f'"{etag[1:-1]}-{encoding}"'
+                    filepath = variant
+                    headers['Content-Encoding'] = encoding
+                    break
+
+    headers['ETag'] = etag
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match and (if_none_match.strip() == '*' or
+                          etag in [tag.strip() for tag in if_none_match.split(',')]):
+        headers.pop('Content-Encoding', None)
+        return Response(status_code=304, headers=headers)
+
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        headers.update({
+            'Content-Range': f"bytes {start}-{end}/{stat.st_size}",
+            'Content-Length': str(length),
+        })
+        return StreamingResponse(_iter_range(filepath, start, length), status_code=206,
+                                 media_type=media_type, headers=headers)
+
+    return FileResponse(filepath, media_type=media_type, headers=headers, stat_result=os.stat(filepath))
+
+
+def serve_stored_file(request: Request, url: str) -> Response:
+    """Serve a storage URL (/files/uploads/... or /files/outputs/...)"""
+    download_url = storage.download_url(url)
+    if download_url:
+        return RedirectResponse(download_url, status_code=307)
+
+    if url.startswith(UPLOADS_URL_PREFIX):
+        # Uploads live in extension-less blobs; the URL keeps the original name
+        filepath = resolve_path(storage.storage_dir, storage.get_file_path(url))
+        return serve_file(request, filepath, url[len(UPLOADS_URL_PREFIX):], precompress=False)
+    return serve_file(request, resolve_path(storage.outputs_dir, storage.get_file_path(url)))
@@ -0,0 +1,13 @@
+"""
+Text formatting shared by the PowerPoint and PDF generators
+"""
+
+
+def format_duration(minutes: int) -> str:
+    """Format minutes as e.g. '1 h 30 min'"""
+    hours, mins = divmod(minutes or 0, 60)
+    if hours and mins:
+        return f"{hours} h {mins} min"
+    if hours:
+        return f"{hours} h"
+    return f"{mins} min"
@@ -1,140 +1,312 @@
-from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
+from typing import Dict, Any, List, Iterable, Iterator, Optional
+from xml.sax.saxutils import escape
+from io import BytesIO
+from sqlalchemy.orm import Session
 import os
+import re
+import tempfile
+
+from app.services.local_storage import storage
+from app.services import output_cache
+from app.services.curriculum_repository import iter_modules
+from app.services.generators.render_context import get_render_context
+from app.services.generators.formatting import format_duration
+
+class _StreamingDocTemplate(SimpleDocTemplate):
+    """
+    SimpleDocTemplate fed from an iterator of flowable chunks
+    The next chunk is only built when the current one is nearly consumed,
+    so a manual never holds more than about one module's story in memory.
+    """
+    
+    def build_streaming(self, chunks: Iterator[list]):
+        self._chunks = chunks
+        self._story = []
+        self._refill()
+        if not self._story:
+            self._story.append(Spacer(1, 0))
+        self.build(self._story)
+    
+    def _refill(self):
+        while self._chunks is not None and len(self._story) <= 1:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._chunks = None
+            else:
+                self._story.extend(chunk)
+    
+    def filterFlowables(self, flowables):
+        # Called by reportlab before each flowable is handled; it is also
+        # used for internal lists, so only the main story is refilled
+        if flowables is self._story:
+            self._refill()
+
 
 class PdfGenerator:
     """
     Service to generate PDF manuals from curriculum
+    Streams the modules from the database one batch at a time rather than
+    using the cached curriculum aggregate, so a long manual never holds
+    every module in memory
     """
     
+    # Bump when manual layout changes so cached manuals are re-rendered
+    VERSION = 1
+    
+    def __init__(self, db: Optional[Session] = None):
+        self.db = db
+    
     async def generate_student_manual(self, curriculum_id: str) -> str:
         """
         Generate student manual PDF
         """
-        output_dir = "outputs/manuals"
-        os.makedirs(output_dir, exist_ok=True)
-        file_path = f"{output_dir}/student_manual_{curriculum_id}.pdf"
+        curriculum = self._get_curriculum(curriculum_id)
+        cache_key = self.cache_key('student_manual', curriculum, output_cache.iter_module_fields(self.db, curriculum_id))
+        return self.render_student_manual(curriculum, iter_modules(self.db, curriculum_id), cache_key)
+    
+    async def generate_instructor_manual(self, curriculum_id: str) -> str:
+        """
+        Generate instructor manual PDF
+        """
+        curriculum = self._get_curriculum(curriculum_id)
+        cache_key = self.cache_key('instructor_manual', curriculum, output_cache.iter_module_fields(self.db, curriculum_id))
+        return self.render_instructor_manual(curriculum, iter_modules(self.db, curriculum_id), cache_key)
+    
+    def cache_key(self, kind: str, curriculum, module_fields: Iterable) -> str:
+        """Content fingerprint of a manual (see output_cache.fingerprint)"""
+        return output_cache.fingerprint(kind, curriculum, module_fields, None, self.VERSION)
+    
+    def render_student_manual(self, curriculum, modules: Iterable, cache_key: str = None) -> str:
+        """
+        Render the student manual for an already-loaded curriculum
         
-        doc = SimpleDocTemplate(file_path, pagesize=letter)
-        styles = getSampleStyleSheet()
-        story = []
+        Args:
+            curriculum: Curriculum row (or any object with the same attributes)
+            modules: Modules in sequence order; consumed lazily and not at all on a cache hit
+            cache_key: Content fingerprint; an existing manual with this key is reused
+        """
+        filename = f"student_manual_{cache_key or curriculum.id}.pdf"
+        if cache_key:
+            cached_url = output_cache.lookup('manuals', filename)
+            if cached_url:
+                return cached_url
         
-        # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor='darkblue',
-            spaceAfter=30,
-        )
-        story.append(Paragraph("CPR Training - Student Manual", title_style))
-        story.append(Spacer(1, 0.2 * inch))
+        ctx = get_render_context()
+        styles = ctx.styles
+        title_style = ctx.title_style('darkblue')
+        intro = [
+            Paragraph(f"{escape(curriculum.title)} - Student Manual", title_style),
+            Spacer(1, 0.2 * inch),
+            Paragraph("Introduction", styles['Heading2']),
+            Paragraph(escape(curriculum.description or
+                             f"Welcome to {curriculum.title}. This manual will guide you through "
+                             "the essential skills and knowledge covered in each module."),
+                      styles['BodyText']),
+        ]
+        if curriculum.total_duration_minutes:
+            intro.append(Paragraph(f"Course duration: {format_duration(curriculum.total_duration_minutes)}",
+                                   styles['BodyText']))
         
-        # Introduction
-        story.append(Paragraph("Introduction", styles['Heading2']))
-        story.append(Paragraph(
-            "Welcome to the CPR Training Program. This manual will guide you through "
-            "the essential skills and knowledge needed to perform CPR effectively.",
-            styles['BodyText']
-        ))
-        story.append(Spacer(1, 0.2 * inch))
+        chunks = self._stream_story(
+            intro,
+            (self._student_module_story(module, styles) for module in modules)
+        )
+        return self._build_to_storage(chunks, filename, curriculum.title)
+    
+    def render_instructor_manual(self, curriculum, modules: Iterable, cache_key: str = None) -> str:
+        """Render the instructor manual for an already-loaded curriculum"""
+        filename = f"instructor_manual_{cache_key or curriculum.id}.pdf"
+        if cache_key:
+            cached_url = output_cache.lookup('manuals', filename)
+            if cached_url:
+                return cached_url
         
-        # Module 1
-        story.append(Paragraph("Module 1: Introduction to CPR", styles['Heading2']))
-        story.append(Paragraph("Learning Objectives:", styles['Heading3']))
-        objectives = [
-            "Understand the importance of CPR",
-            "Identify when CPR is needed",
-            "Recognize signs of cardiac arrest"
+        ctx = get_render_context()
+        styles = ctx.styles
+        title_style = ctx.title_style('darkgreen')
+        intro = [
+            Paragraph(f"{escape(curriculum.title)} - Instructor Manual", title_style),
+            Spacer(1, 0.2 * inch),
+            Paragraph("Teaching Guide", styles['Heading2']),
+            Paragraph(f"This manual provides comprehensive guidance for delivering {escape(curriculum.title)}.",
+                      styles['BodyText']),
         ]
-        for obj in objectives:
-            story.append(Paragraph(f"• {obj}", styles['BodyText']))
-        story.append(Spacer(1, 0.3 * inch))
-        
-        # Module 2
-        story.append(Paragraph("Module 2: CPR Techniques", styles['Heading2']))
-        story.append(Paragraph(
-            "Chest compressions are the most critical component of CPR. "
-            "Proper technique ensures blood flow to vital organs.",
-            styles['BodyText']
-        ))
-        story.append(Spacer(1, 0.2 * inch))
+        if curriculum.total_duration_minutes:
+            intro.append(Paragraph(f"Total contact time: {format_duration(curriculum.total_duration_minutes)}",
+                                   styles['BodyText']))
+        
+        chunks = self._stream_story(
+            intro,
+            (self._instructor_module_story(module, styles) for module in modules)
+        )
+        return self._build_to_storage(chunks, filename, curriculum.title)
+    
+    def _get_curriculum(self, curriculum_id: str):
+        """Load the curriculum row (modules are streamed separately) or raise ValueError"""
+        from app.db_models import Curriculum
+        
+        if not self.db:
+            raise ValueError("A database session is required to generate manuals")
+        curriculum = self.db.query(Curriculum).filter(Curriculum.id == curriculum_id).first()
+        if not curriculum:
+            raise ValueError(f"Curriculum not found: {curriculum_id}")
+        return curriculum
+    
+    def _stream_story(self, intro: list, module_chunks: Iterator[list]) -> Iterator[list]:
+        """Chain the intro flowables with one chunk per module"""
+        yield intro
+        yield from module_chunks
+    
+    def _build_to_storage(self, chunks: Iterator[list], filename: str, title: str) -> str:
+        """Render into a temp file and atomically move it into storage"""
+        fd, tmp_path = tempfile.mkstemp(dir=storage.outputs_dir, suffix='.pdf.tmp')
+        os.close(fd)
+        try:
+            doc = _StreamingDocTemplate(tmp_path, title=title, **get_render_context().doc_kwargs)
+            doc.build_streaming(chunks)
+            file_info = storage.save_output_file(tmp_path, filename, 'manuals')
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        output_cache.enforce_size_limit()
+        return file_info['url']
+    
+    def _student_module_story(self, module, styles) -> list:
+        """Flowables for one module of the student manual"""
+        story = [PageBreak(), Paragraph(escape(module.title), styles['Heading2'])]
+        if module.description:
+            story.append(Paragraph(escape(module.description), styles['BodyText']))
+        story.append(Paragraph(f"Duration: {format_duration(module.duration_minutes)}", styles['BodyText']))
+        
+        self._add_bullet_section(story, "Learning Objectives:", module.learning_objectives, styles, 'Heading3')
+        
+        for topic in module.topics or []:
+            story.append(Paragraph(escape(topic.get('title', '')), styles['Heading3']))
+            if topic.get('content'):
+                self._add_text_block(story, topic['content'], styles)
+        
+        activities = module.activities or []
+        if activities:
+            story.append(Paragraph("Activities:", styles['Heading3']))
+            for activity in activities:
+                story.append(Paragraph(
+                    f"<b>{escape(activity.get('title', ''))}</b> "
+                    f"({escape(activity.get('type', ''))}, {activity.get('duration_minutes', 0)} min)",
+                    styles['BodyText']
+                ))
+                if activity.get('description'):
+                    story.append(Paragraph(escape(activity['description']), styles['BodyText']))
         
         # Practice section
         story.append(Paragraph("Practice Notes", styles['Heading3']))
-        story.append(Paragraph("" * 10, styles['BodyText']))  # Empty lines for notes
+        story.append(Spacer(1, 1.5 * inch))
+        return story
+    
+    def _instructor_module_story(self, module, styles) -> list:
+        """Flowables for one module of the instructor manual"""
+        story = [PageBreak(), Paragraph(escape(module.title), styles['Heading2'])]
+        story.append(Paragraph("Teaching Notes:", styles['Heading3']))
+        story.append(Paragraph(f"Duration: {format_duration(module.duration_minutes)}", styles['BodyText']))
+        if module.description:
+            story.append(Paragraph(escape(module.description), styles['BodyText']))
         
-        doc.build(story)
-        return file_path
+        self._add_bullet_section(story, "Learning Objectives:", module.learning_objectives, styles, 'Heading3')
+        
+        topics = module.topics or []
+        if topics:
+            story.append(Paragraph("Lesson Plan:", styles['Heading3']))
+            for topic in topics:
+                story.append(Paragraph(
+                    f"• {escape(topic.get('title', ''))} ({topic.get('duration_minutes', 0)} min)",
+                    styles['BodyText']
+                ))
+        
+        for activity in module.activities or []:
+            story.append(Paragraph(
+                f"{escape(activity.get('type', 'Activity'))}: {escape(activity.get('title', ''))} "
+                f"({activity.get('duration_minutes', 0)} min)",
+                styles['Heading3']
+            ))
+            if activity.get('description'):
+                story.append(Paragraph(escape(activity['description']), styles['BodyText']))
+            materials = activity.get('materials_needed') or []
+            if materials:
+                story.append(Paragraph(f"Materials: {escape(', '.join(materials))}", styles['BodyText']))
+        
+        assessment = module.assessment
+        if assessment:
+            story.append(Paragraph("Assessment Guide", styles['Heading3']))
+            story.append(Paragraph(
+                f"{escape(assessment.get('title', ''))} - {escape(assessment.get('type', ''))}. "
+                f"Passing score: {assessment.get('passing_score', 80)}%",
+                styles['BodyText']
+            ))
+        return story
     
-    async def generate_instructor_manual(self, curriculum_id: str) -> str:
+    def build_brd_pdf(self, brd: Dict[str, Any]) -> bytes:
         """
-        Generate instructor manual PDF
-        """
-        output_dir = "outputs/manuals"
-        os.makedirs(output_dir, exist_ok=True)
-        file_path = f"{output_dir}/instructor_manual_{curriculum_id}.pdf"
+        Render a Business Requirements Document to PDF bytes
         
-        doc = SimpleDocTemplate(file_path, pagesize=letter)
-        styles = getSampleStyleSheet()
+        Args:
+            brd: BRD dict as returned by brd_to_dict / BRDExtractor
+        """
+        buffer = BytesIO()
+        ctx = get_render_context()
+        doc = SimpleDocTemplate(buffer, title=f"BRD - {brd.get('rfp_title', '')}", **ctx.doc_kwargs)
+        styles = ctx.styles
         story = []
         
         # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor='darkgreen',
-            spaceAfter=30,
-        )
-        story.append(Paragraph("CPR Training - Instructor Manual", title_style))
+        title_style = ctx.title_style('darkblue')
+        story.append(Paragraph("Business Requirements Document", title_style))
+        story.append(Paragraph(escape(brd.get('rfp_title') or ''), styles['Heading2']))
         story.append(Spacer(1, 0.2 * inch))
         
-        # Teaching guide
-        story.append(Paragraph("Teaching Guide", styles['Heading2']))
-        story.append(Paragraph(
-            "This manual provides comprehensive guidance for delivering the CPR training program.",
-            styles['BodyText']
-        ))
+        # Executive summary and scope are free text
+        story.append(Paragraph("Executive Summary", styles['Heading2']))
+        self._add_text_block(story, brd.get('executive_summary'), styles)
         story.append(Spacer(1, 0.2 * inch))
         
-        # Module 1 teaching notes
-        story.append(Paragraph("Module 1: Introduction to CPR", styles['Heading2']))
-        story.append(Paragraph("Teaching Notes:", styles['Heading3']))
-        story.append(Paragraph(
-            "Duration: 60 minutes",
-            styles['BodyText']
-        ))
-        story.append(Paragraph(
-            "Key Points to Emphasize:",
-            styles['BodyText']
-        ))
-        teaching_points = [
-            "CPR can double or triple chances of survival",
-            "Every second counts in cardiac arrest",
-            "Good Samaritan laws protect rescuers"
-        ]
-        for point in teaching_points:
-            story.append(Paragraph(f"• {point}", styles['BodyText']))
-        story.append(Spacer(1, 0.3 * inch))
-        
-        # Assessment guide
-        story.append(Paragraph("Assessment Guide", styles['Heading2']))
-        story.append(Paragraph(
-            "Students must demonstrate proper technique in the following areas:",
-            styles['BodyText']
-        ))
-        assessment_criteria = [
-            "Correct hand placement (80% minimum)",
-            "Adequate compression depth (2-2.4 inches)",
-            "Proper compression rate (100-120 per minute)",
-            "Complete chest recoil between compressions"
-        ]
-        for criterion in assessment_criteria:
-            story.append(Paragraph(f"• {criterion}", styles['BodyText']))
+        # Requirements
+        self._add_bullet_section(story, "Business Objectives", brd.get('business_objectives'), styles)
+        self._add_bullet_section(story, "Functional Requirements", brd.get('functional_requirements'), styles)
+        self._add_bullet_section(story, "Non-Functional Requirements", brd.get('non_functional_requirements'), styles)
+        
+        # Scope
+        story.append(Paragraph("Scope", styles['Heading2']))
+        self._add_text_block(story, brd.get('scope'), styles)
+        story.append(Spacer(1, 0.2 * inch))
+        
+        # Project context
+        self._add_bullet_section(story, "Stakeholders", brd.get('stakeholders'), styles)
+        self._add_bullet_section(story, "Success Criteria", brd.get('success_criteria'), styles)
+        self._add_bullet_section(story, "Constraints", brd.get('constraints'), styles)
+        self._add_bullet_section(story, "Assumptions", brd.get('assumptions'), styles)
         
         doc.build(story)
-        return file_path
+        return buffer.getvalue()
+    
+    def _add_text_block(self, story: list, text: str, styles):
+        """Add free text, one paragraph per line, honouring **bold** markers"""
+        for line in (text or '').splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            line = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', escape(line))
+            story.append(Paragraph(line, styles['BodyText']))
+    
+    def _add_bullet_section(self, story: list, heading: str, items: List[str], styles,
+                            heading_style: str = 'Heading2'):
+        """Add a heading followed by a bulleted list"""
+        story.append(Paragraph(heading, styles[heading_style]))
+        for item in items or []:
+            story.append(Paragraph(f"• {escape(str(item))}", styles['BodyText']))
+        story.append(Spacer(1, 0.2 * inch))
+
 
+def render_brd_pdf(brd: Dict[str, Any]) -> bytes:
+    """Process-pool entry point for BRD PDF rendering"""
+    return PdfGenerator().build_brd_pdf(brd)
@@ -1,124 +1,338 @@
 from pptx import Presentation
 from pptx.util import Inches, Pt
-from pptx.enum.text import PP_ALIGN
-from typing import Dict, Any, Optional
+from pptx.dml.color import RGBColor
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.packuri import PackURI
+from concurrent.futures import Executor
+from types import SimpleNamespace
+from typing import Dict, Any, Optional, Iterable, List
+from io import BytesIO
 import os
+import tempfile
+import threading
 from sqlalchemy.orm import Session
 
+from app.config import settings
+from app.services.local_storage import storage
+from app.services import output_cache
+from app.services.curriculum_repository import get_curriculum_aggregate
+from app.services.generators.formatting import format_duration
+
+# Colour schemes offered by ppt_chat: (accent, light background tint)
+COLOR_SCHEMES = {
+    'blue': (RGBColor(0x1F, 0x4E, 0x79), RGBColor(0xEA, 0xF1, 0xFB)),
+    'red': (RGBColor(0xA3, 0x1F, 0x1F), RGBColor(0xFB, 0xEC, 0xEC)),
+    'green': (RGBColor(0x2E, 0x6B, 0x30), RGBColor(0xEC, 0xF6, 0xEC)),
+    'purple': (RGBColor(0x5B, 0x2C, 0x83), RGBColor(0xF3, 0xEC, 0xFA)),
+    'orange': (RGBColor(0xC0, 0x56, 0x0A), RGBColor(0xFD, 0xF1, 0xE6)),
+}
+
+# Layout indexes in the default python-pptx template
+TITLE_LAYOUT = 0
+CONTENT_LAYOUT = 1
+SECTION_LAYOUT = 2
+
+MAX_BULLETS_PER_SLIDE = 6
+
+# Serialized themed templates, keyed by (theme, color_scheme)
+_template_cache: Dict[tuple, bytes] = {}
+_template_lock = threading.Lock()
+
+
+def _themed_template(theme: str, color_scheme: str) -> bytes:
+    """
+    Build (once per process) an empty deck with slide size and master
+    background applied, serialized so each render can clone it cheaply
+    """
+    key = (theme, color_scheme)
+    template = _template_cache.get(key)
+    if template is None:
+        with _template_lock:
+            template = _template_cache.get(key)
+            if template is None:
+                prs = Presentation()
+                prs.slide_width = Inches(10)
+                prs.slide_height = Inches(7.5)
+
+                if theme == 'engaging':
+                    _, tint = COLOR_SCHEMES.get(color_scheme, COLOR_SCHEMES['blue'])
+                    fill = prs.slide_master.background.fill
+                    fill.solid()
+                    fill.fore_color.rgb = tint
+
+                buffer = BytesIO()
+                prs.save(buffer)
+                template = buffer.getvalue()
+                _template_cache[key] = template
+    return template
+
+
+class _DeckBuilder:
+    """Adds slides to one presentation; layouts and styling resolved once"""
+
+    def __init__(self, prs: Presentation, theme: str, color_scheme: str, instructor_notes: bool):
+        layouts = prs.slide_layouts
+        self.slides = prs.slides
+        self.title_layout = layouts[TITLE_LAYOUT]
+        self.content_layout = layouts[CONTENT_LAYOUT]
+        self.section_layout = layouts[SECTION_LAYOUT]
+        self.accent, _ = COLOR_SCHEMES.get(color_scheme, COLOR_SCHEMES['blue'])
+        self.bullet_size = Pt(20) if theme == 'engaging' else Pt(18)
+        self.instructor_notes = instructor_notes
+        self.count = 0
+
+    def _new_slide(self, layout, title: str):
+        slide = self.slides.add_slide(layout)
+        title_shape = slide.shapes.title
+        title_shape.text = title
+        title_shape.text_frame.paragraphs[0].font.color.rgb = self.accent
+        self.count += 1
+        return slide
+
+    def _add_notes(self, slide, notes: str):
+        if self.instructor_notes and notes:
+            slide.notes_slide.notes_text_frame.text = notes
+
+    def title_slide(self, title: str, subtitle: str):
+        slide = self._new_slide(self.title_layout, title)
+        slide.placeholders[1].text = subtitle or ''
+
+    def section_slide(self, title: str, text: str, notes: str = None):
+        slide = self._new_slide(self.section_layout, title)
+        slide.placeholders[1].text = text or ''
+        self._add_notes(slide, notes)
+
+    def bullet_slides(self, title: str, bullets: List[str], notes: str = None):
+        """Add one or more content slides, continuing long lists on new slides"""
+        for start in range(0, max(len(bullets), 1), MAX_BULLETS_PER_SLIDE):
+            chunk = bullets[start:start + MAX_BULLETS_PER_SLIDE]
+            slide_title = title if start == 0 else f"{title} (cont.)"
+            slide = self._new_slide(self.content_layout, slide_title)
+
+            text_frame = slide.placeholders[1].text_frame
+            for i, point in enumerate(chunk):
+                p = text_frame.paragraphs[0] if i == 0 else text_frame.add_paragraph()
+                p.text = point
+                p.level = 0
+                p.font.size = self.bullet_size
+            self._add_notes(slide, notes)
+
+
+def _append_deck(prs: Presentation, blob: bytes, notes_count: int) -> int:
+    """
+    Move every slide of a partial deck into prs at the package level
+    Slide and notes parts are renamed and re-pointed at prs's own layouts and
+    notes master, so no slide XML is copied. Both decks must come from the
+    same themed template. Returns the updated notes slide count.
+    
+    Relies on python-pptx internals (slide part naming, _sldIdLst, _package)
+    as of the pinned 0.6.23; tests/test_ppt_merge.py compares a merged deck
+    with the serial render so an upgrade that changes them fails loudly.
+    """
+    src = Presentation(BytesIO(blob))
+    layout_parts = {src_layout.part: layout.part for src_layout, layout in zip(src.slide_layouts, prs.slide_layouts)}
+    package = prs.part.package
+    notes_master_part = None
+
+    for slide in src.slides:
+        slide_part = slide.part
+        slide_part.partname = prs.part._next_slide_partname
+        slide_part._package = package
+
+        for rId, rel in list(slide_part.rels.items()):
+            if rel.reltype == RT.SLIDE_LAYOUT:
+                slide_part.rels.pop(rId)
+                slide_part.relate_to(layout_parts[rel.target_part], RT.SLIDE_LAYOUT)
+            elif rel.reltype == RT.NOTES_SLIDE:
+                notes_part = rel.target_part
+                notes_count += 1
+                notes_part.partname = PackURI(f"/ppt/notesSlides/notesSlide{notes_count}.xml")
+                notes_part._package = package
+                if notes_master_part is None:
+                    notes_master_part = prs.part.notes_master_part
+                for notes_rId, notes_rel in list(notes_part.rels.items()):
+                    if notes_rel.reltype == RT.NOTES_MASTER:
+                        notes_part.rels.pop(notes_rId)
+                        notes_part.relate_to(notes_master_part, RT.NOTES_MASTER)
+
+        rId = prs.part.relate_to(slide_part, RT.SLIDE)
+        prs.slides._sldIdLst.add_sldId(rId)
+
+    return notes_count
+
+
+def render_module_deck(customizations: Dict[str, Any], modules: List[Dict[str, Any]]) -> bytes:
+    """Process-pool entry point: render a partial deck holding only these modules' slides"""
+    generator = PptGenerator()
+    customizations = customizations or {}
+    theme = customizations.get('theme', 'professional')
+    color_scheme = customizations.get('color_scheme', 'blue')
+
+    prs = Presentation(BytesIO(_themed_template(theme, color_scheme)))
+    deck = _DeckBuilder(prs, theme, color_scheme, customizations.get('include_instructor_notes', False))
+    for module in modules:
+        generator._add_module_slides(deck, SimpleNamespace(**module), customizations.get('include_assessments', True))
+
+    buffer = BytesIO()
+    prs.save(buffer)
+    return buffer.getvalue()
+
+
 class PptGenerator:
     """
     Service to generate PowerPoint presentations from curriculum
-    Now reads actual curriculum from database!
+    Renders every CurriculumModule (objectives, topics, activities, assessment)
     """
-    
-    def __init__(self, db: Optional[Session] = None):
+
+    # Bump when slide layout changes so cached decks are re-rendered
+    VERSION = 2
+
+    def __init__(self, db: Optional[Session] = None, executor: Optional[Executor] = None):
+        """
+        Args:
+            executor: Optional process pool; when given, module slides are rendered
+                in parallel partial decks and merged (see render_module_deck)
+        """
         self.db = db
-    
+        self.executor = executor
+
     async def generate(self, curriculum_id: str, customizations: Dict[str, Any] = None) -> str:
         """
         Generate a PowerPoint presentation from curriculum data
-        
+
         Args:
             curriculum_id: ID of curriculum to generate from
-            customizations: Optional dict with theme, colors, preferences
+            customizations: Optional dict with theme, color_scheme, include_assessments,
+                include_instructor_notes (as collected by ppt-chat)
+        """
+        curriculum = get_curriculum_aggregate(self.db, curriculum_id) if self.db else None
+        if not curriculum:
+            return self.render(curriculum_id, None, [], customizations)
+
+        cache_key = self.cache_key(curriculum, curriculum.modules, customizations)
+        return self.render(curriculum_id, curriculum, curriculum.modules, customizations, cache_key)
+
+    def cache_key(self, curriculum: Any, module_fields: Iterable, customizations: Dict[str, Any] = None) -> str:
+        """Content fingerprint of a deck (see output_cache.fingerprint)"""
+        return output_cache.fingerprint('ppt', curriculum, module_fields, customizations, self.VERSION)
+
+    def render(self, curriculum_id: str, curriculum: Any, modules: Iterable, customizations: Dict[str, Any] = None,
+               cache_key: str = None) -> str:
         """
-        from app.db_models import Curriculum
-        
-        # Get curriculum from database
-        if self.db:
-            curriculum = self.db.query(Curriculum).filter(Curriculum.id == curriculum_id).first()
-        else:
-            curriculum = None
-        
-        # Create presentation
-        prs = Presentation()
-        prs.slide_width = Inches(10)
-        prs.slide_height = Inches(7.5)
-        
-        # Get customizations
-        theme = customizations.get('theme', 'professional') if customizations else 'professional'
-        color_scheme = customizations.get('color_scheme', 'blue') if customizations else 'blue'
-        
+        Render the presentation for an already-loaded curriculum (or None)
+        An existing deck with the same cache_key is reused.
+
+        Args:
+            modules: Modules in sequence order; consumed lazily and not at all on a cache hit
+
+        Returns the storage URL of the .pptx
+        """
+        filename = f"curriculum_{cache_key or curriculum_id}.pptx"
+        if cache_key:
+            cached_url = output_cache.lookup('presentations', filename)
+            if cached_url:
+                return cached_url
+
+        prs = self.build_presentation(curriculum, modules, customizations)
+
+        # Save to a temp file and move it into storage atomically
+        fd, tmp_path = tempfile.mkstemp(dir=storage.outputs_dir, suffix='.pptx.tmp')
+        os.close(fd)
+        try:
+            prs.save(tmp_path)
+            file_info = storage.save_output_file(tmp_path, filename, 'presentations')
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        output_cache.enforce_size_limit()
+        return file_info['url']
+
+    def build_presentation(self, curriculum: Any, modules: Iterable, customizations: Dict[str, Any] = None) -> Presentation:
+        """Build the deck in memory from a themed template clone"""
+        customizations = customizations or {}
+        theme = customizations.get('theme', 'professional')
+        color_scheme = customizations.get('color_scheme', 'blue')
+        include_assessments = customizations.get('include_assessments', True)
+
+        prs = Presentation(BytesIO(_themed_template(theme, color_scheme)))
+        deck = _DeckBuilder(prs, theme, color_scheme, customizations.get('include_instructor_notes', False))
+
         # Title
         title = curriculum.title if curriculum else "Training Program"
         subtitle = curriculum.description if curriculum else "Professional Curriculum"
-        
-        # Add title slide
-        self._add_title_slide(prs, title, subtitle)
-        
-        # If we have curriculum data, use it
-        if curriculum and hasattr(curriculum, 'total_duration_minutes'):
-            # Add overview slide
-            self._add_content_slide(
-                prs,
-                "Course Overview",
-                [
-                    f"Duration: {curriculum.total_duration_minutes // 60} hours",
-                    f"Status: {curriculum.status.title()}",
-                    "Comprehensive training program",
-                    "Hands-on practice included"
-                ]
-            )
-        
-        # Add generic content slides (will be enhanced with actual modules)
-        self._add_content_slide(
-            prs,
-            "Learning Objectives",
-            [
-                "Understand key concepts and principles",
-                "Demonstrate practical skills",
-                "Apply knowledge in real scenarios",
-                "Pass competency assessments"
-            ]
-        )
-        
-        self._add_content_slide(
-            prs,
-            "Course Content",
-            [
-                "Comprehensive curriculum coverage",
-                "2. Call for help",
-                "3. Position the patient",
-                "4. Begin chest compressions",
-                "5. Give rescue breaths"
-            ]
+        deck.title_slide(title, subtitle)
+
+        if curriculum and curriculum.total_duration_minutes:
+            deck.bullet_slides("Course Overview", [
+                f"Duration: {format_duration(curriculum.total_duration_minutes)}",
+                f"Status: {(curriculum.status or 'draft').title()}",
+                "Hands-on practice included",
+            ])
+
+        # Fan-out pays for pickling and the merge, so only very long decks win
+        min_modules = settings.PPT_PARALLEL_MIN_MODULES
+        if self.executor is not None and min_modules:
+            modules = list(modules)
+            if len(modules) >= min_modules:
+                self._add_modules_parallel(prs, modules, customizations)
+                return prs
+
+        for module in modules:
+            self._add_module_slides(deck, module, include_assessments)
+        return prs
+
+    def _add_modules_parallel(self, prs: Presentation, modules: List[Any], customizations: Dict[str, Any]):
+        """Render contiguous chunks of modules in the executor, one per worker, and merge them in order"""
+        modules = [{field: getattr(module, field) for field in output_cache.MODULE_FIELDS} for module in modules]
+        workers = max(1, min(settings.WORKER_PROCESSES, len(modules)))
+        chunk_size = -(-len(modules) // workers)
+        futures = [
+            self.executor.submit(render_module_deck, customizations, modules[start:start + chunk_size])
+            for start in range(0, len(modules), chunk_size)
+        ]
+        notes_count = sum(1 for slide in prs.slides if slide.has_notes_slide)
+        for future in futures:
+            notes_count = _append_deck(prs, future.result(), notes_count)
+
+    def _add_module_slides(self, deck: _DeckBuilder, module: Any, include_assessments: bool):
+        """Section, objectives, topics, activities and assessment slides for one module"""
+        deck.section_slide(
+            module.title,
+            f"{module.description or ''}\n{format_duration(module.duration_minutes)}".strip(),
+            notes=module.description
         )
-        
-        # Save file
-        output_dir = "outputs/presentations"
-        os.makedirs(output_dir, exist_ok=True)
-        file_path = f"{output_dir}/curriculum_{curriculum_id}.pptx"
-        prs.save(file_path)
-        
-        return file_path
-    
-    def _add_title_slide(self, prs: Presentation, title: str, subtitle: str):
-        """Add a title slide"""
-        slide_layout = prs.slide_layouts[0]  # Title slide layout
-        slide = prs.slides.add_slide(slide_layout)
-        
-        title_shape = slide.shapes.title
-        subtitle_shape = slide.placeholders[1]
-        
-        title_shape.text = title
-        subtitle_shape.text = subtitle
-    
-    def _add_content_slide(self, prs: Presentation, title: str, bullet_points: list):
-        """Add a content slide with bullet points"""
-        slide_layout = prs.slide_layouts[1]  # Title and Content layout
-        slide = prs.slides.add_slide(slide_layout)
-        
-        title_shape = slide.shapes.title
-        content_shape = slide.placeholders[1]
-        
-        title_shape.text = title
-        
-        text_frame = content_shape.text_frame
-        text_frame.clear()
-        
-        for point in bullet_points:
-            p = text_frame.add_paragraph()
-            p.text = point
-            p.level = 0
-            p.font.size = Pt(18)
 
+        objectives = module.learning_objectives or []
+        if objectives:
+            deck.bullet_slides("Learning Objectives", list(objectives))
+
+        topics = module.topics or []
+        if topics:
+            deck.bullet_slides(
+                "Topics",
+                [f"{t.get('title', '')} ({t.get('duration_minutes', 0)} min)" for t in topics],
+                notes="\n".join(t.get('content', '') for t in topics if t.get('content'))
+            )
+
+        activities = module.activities or []
+        if activities:
+            deck.bullet_slides(
+                "Activities",
+                [f"{a.get('type', 'Activity')}: {a.get('title', '')} ({a.get('duration_minutes', 0)} min)"
+                 for a in activities],
+                notes="\n".join(
+                    f"{a.get('title', '')}: {a.get('description', '')} "
+                    f"Materials: {', '.join(a.get('materials_needed') or []) or 'none'}"
+                    for a in activities
+                )
+            )
+
+        assessment = module.assessment
+        if include_assessments and assessment:
+            deck.bullet_slides("Assessment", [
+                assessment.get('title', ''),
+                f"Format: {assessment.get('type', '')}",
+                f"Passing score: {assessment.get('passing_score', 80)}%",
+            ])
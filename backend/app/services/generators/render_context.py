@@ -0,0 +1,83 @@
+"""
+Shared reportlab rendering context
+Stylesheets, custom paragraph styles and fonts are built once per process
+and reused by every manual and BRD export, including from render pools.
+"""
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from typing import Dict, List, Optional
+import os
+import threading
+
+from app.config import settings
+
+
+class RenderContext:
+    """
+    Immutable-after-construction rendering resources
+    Styles must be treated as read-only; derive new ParagraphStyles from
+    them instead of mutating, so the context stays safe to share.
+    """
+    
+    def __init__(self):
+        self.fonts: List[str] = self._register_fonts(settings.PDF_FONTS_DIR)
+        self.styles = getSampleStyleSheet()
+        
+        body_font = settings.PDF_BODY_FONT
+        if body_font and body_font in self.fonts:
+            for name in ('Normal', 'BodyText'):
+                self.styles[name].fontName = body_font
+        
+        self._title_styles: Dict[str, ParagraphStyle] = {}
+        self._title_lock = threading.Lock()
+        
+        # Page setup shared by every document template
+        self.doc_kwargs = {'pagesize': letter}
+    
+    def title_style(self, color: str) -> ParagraphStyle:
+        """Large document title style in the given colour (cached)"""
+        style = self._title_styles.get(color)
+        if style is None:
+            with self._title_lock:
+                style = self._title_styles.get(color)
+                if style is None:
+                    style = ParagraphStyle(
+                        f'CustomTitle-{color}',
+                        parent=self.styles['Heading1'],
+                        fontSize=24,
+                        textColor=color,
+                        spaceAfter=30,
+                    )
+                    self._title_styles[color] = style
+        return style
+    
+    def _register_fonts(self, fonts_dir: str) -> List[str]:
+        """Register every .ttf in fonts_dir with reportlab, named by file stem"""
+        registered = []
+        if not fonts_dir or not os.path.isdir(fonts_dir):
+            return registered
+        
+        for filename in sorted(os.listdir(fonts_dir)):
+            name, ext = os.path.splitext(filename)
+            if ext.lower() != '.ttf':
+                continue
+            if name not in pdfmetrics.getRegisteredFontNames():
+                pdfmetrics.registerFont(TTFont(name, os.path.join(fonts_dir, filename)))
+            registered.append(name)
+        return registered
+
+
+_context: Optional[RenderContext] = None
+_context_lock = threading.Lock()
+
+
+def get_render_context() -> RenderContext:
+    """Return the process-wide render context, building it on first use"""
+    global _context
+    if _context is None:
+        with _context_lock:
+            if _context is None:
+                _context = RenderContext()
+    return _context
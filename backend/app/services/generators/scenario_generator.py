@@ -1,95 +1,361 @@
-from typing import List
+from typing import Iterable, Iterator, List, Optional, Tuple
+from math import gcd
+from sqlalchemy.orm import Session
+import hashlib
+import random
+
 from app.models import Scenario
 
+# Rows per bulk insert when persisting scenarios
+SCENARIO_INSERT_BATCH = 500
+
+BASE_ACTIONS = [
+    "Check scene safety",
+    "Check responsiveness",
+    "Call 911 or direct someone to call",
+]
+
+BASE_CRITERIA = [
+    {"criterion": "Scene safety assessment", "points": 5},
+    {"criterion": "Check responsiveness", "points": 5},
+    {"criterion": "Activate emergency response", "points": 10},
+]
+
+CPR_ACTIONS = [
+    "Position patient on firm, flat surface",
+    "Begin chest compressions",
+    "Deliver rescue breaths if trained",
+    "Continue CPR until help arrives or AED is available",
+]
+
+CPR_CRITERIA = [
+    {"criterion": "Proper hand placement", "points": 15},
+    {"criterion": "Adequate compression depth", "points": 20},
+    {"criterion": "Correct compression rate", "points": 20},
+    {"criterion": "Minimal interruptions", "points": 15},
+    {"criterion": "Proper rescue breaths (if applicable)", "points": 10},
+]
+
+
 class ScenarioGenerator:
     """
     Service to generate practice scenarios from curriculum
+
+    Scenarios are composed from location x patient profile x condition x
+    complication. Conditions (and complications) that match the curriculum's
+    topics come first; the rest follow so large exports still have variety.
+    Combinations are visited in a seeded pseudo-random order computed one at
+    a time, so output is reproducible, free of duplicates and lazy.
     """
-    
-    SCENARIO_TEMPLATES = [
+
+    LOCATIONS = [
+        "shopping mall", "office building", "residential home", "fitness center",
+        "restaurant", "construction site", "warehouse", "school gymnasium",
+        "public swimming pool", "city park", "subway platform", "hockey arena",
+        "hotel lobby", "community centre", "factory floor", "parking garage",
+        "daycare centre", "grocery store", "beach", "hospital waiting room",
+    ]
+
+    # Profiles are grouped by the patient category conditions apply to
+    PATIENT_PROFILES = {
+        "adult": [
+            {"label": "young adult", "age_range": (18, 29)},
+            {"label": "adult", "age_range": (30, 44)},
+            {"label": "middle-aged adult", "age_range": (45, 64)},
+            {"label": "older adult", "age_range": (65, 85)},
+            {"label": "pregnant adult", "age_range": (22, 40), "gender": "female"},
+            {"label": "adult athlete", "age_range": (20, 45)},
+            {"label": "adult worker", "age_range": (25, 60)},
+            {"label": "adult with known heart disease", "age_range": (50, 75)},
+        ],
+        "child": [
+            {"label": "toddler", "age_range": (1, 3)},
+            {"label": "child", "age_range": (4, 8)},
+            {"label": "older child", "age_range": (9, 12)},
+        ],
+        "infant": [
+            {"label": "newborn infant", "age_range": (0, 0)},
+            {"label": "infant", "age_range": (0, 1)},
+        ],
+    }
+
+    CONDITIONS = [
         {
-            "title": "Shopping Mall Cardiac Arrest",
-            "location": "shopping mall",
-            "age_range": (45, 65),
-            "condition": "sudden cardiac arrest"
+            "name": "sudden cardiac arrest", "patients": ["adult"], "cpr": True,
+            "keywords": ["cardiac", "cpr", "compression", "arrest", "heart"],
+            "symptoms": ["Unresponsive", "Not breathing normally", "No pulse detected"],
         },
         {
-            "title": "Workplace Emergency",
-            "location": "office building",
-            "age_range": (30, 60),
-            "condition": "cardiac arrest"
+            "name": "collapse during exercise", "patients": ["adult"], "cpr": True,
+            "keywords": ["cardiac", "cpr", "aed", "defibrillat"],
+            "symptoms": ["Sudden collapse", "Unresponsive", "Gasping"],
         },
         {
-            "title": "Home Emergency",
-            "location": "residential home",
-            "age_range": (50, 75),
-            "condition": "unresponsive adult"
+            "name": "choking leading to cardiac arrest", "patients": ["adult", "child"], "cpr": True,
+            "keywords": ["choking", "airway", "obstruction"],
+            "symptoms": ["Clutching throat", "Unable to speak or cough", "Becomes unresponsive"],
+            "actions": ["Deliver abdominal thrusts while the patient is conscious"],
+            "criteria": [{"criterion": "Correct abdominal thrusts", "points": 10}],
         },
         {
-            "title": "Gym Emergency",
-            "location": "fitness center",
-            "age_range": (25, 50),
-            "condition": "collapsed during exercise"
+            "name": "drowning", "patients": ["adult", "child"], "cpr": True,
+            "keywords": ["drowning", "water", "rescue breath", "ventilation"],
+            "symptoms": ["Pulled from water", "Unresponsive", "Not breathing"],
+            "actions": ["Give 5 initial rescue breaths"],
+            "criteria": [{"criterion": "Initial rescue breaths delivered", "points": 10}],
         },
         {
-            "title": "Restaurant Emergency",
-            "location": "restaurant",
-            "age_range": (40, 70),
-            "condition": "choking leading to cardiac arrest"
-        }
+            "name": "suspected opioid overdose", "patients": ["adult"], "cpr": True,
+            "keywords": ["overdose", "opioid", "naloxone", "poison"],
+            "symptoms": ["Pinpoint pupils", "Slow or absent breathing", "Blue lips"],
+            "actions": ["Administer naloxone if available"],
+            "criteria": [{"criterion": "Naloxone administration", "points": 10}],
+        },
+        {
+            "name": "electrical injury", "patients": ["adult"], "cpr": True,
+            "keywords": ["electrical", "workplace", "hazard", "safety"],
+            "symptoms": ["Burn marks on hands", "Unresponsive", "No pulse detected"],
+            "actions": ["Confirm power source is isolated before touching the patient"],
+            "criteria": [{"criterion": "Power source isolated", "points": 10}],
+        },
+        {
+            "name": "heart attack", "patients": ["adult"], "cpr": False,
+            "keywords": ["heart attack", "chest pain", "cardiac", "aspirin"],
+            "symptoms": ["Crushing chest pain", "Sweating", "Shortness of breath"],
+            "actions": ["Keep the patient at rest", "Assist with ASA if appropriate", "Monitor breathing"],
+            "criteria": [{"criterion": "Recognise heart attack signs", "points": 20},
+                         {"criterion": "Appropriate ASA assistance", "points": 10}],
+        },
+        {
+            "name": "stroke", "patients": ["adult"], "cpr": False,
+            "keywords": ["stroke", "fast", "neurolog"],
+            "symptoms": ["Facial droop", "Arm weakness", "Slurred speech"],
+            "actions": ["Assess using FAST", "Note time of symptom onset", "Monitor breathing"],
+            "criteria": [{"criterion": "FAST assessment", "points": 20},
+                         {"criterion": "Onset time recorded", "points": 10}],
+        },
+        {
+            "name": "severe allergic reaction", "patients": ["adult", "child"], "cpr": False,
+            "keywords": ["anaphyla", "allerg", "epinephrine", "auto-injector"],
+            "symptoms": ["Hives", "Swelling of face and throat", "Difficulty breathing"],
+            "actions": ["Assist with epinephrine auto-injector", "Position for comfortable breathing"],
+            "criteria": [{"criterion": "Auto-injector use", "points": 20},
+                         {"criterion": "Positioning", "points": 10}],
+        },
+        {
+            "name": "pediatric cardiac arrest", "patients": ["child"], "cpr": True,
+            "keywords": ["child", "pediatric", "paediatric", "cpr"],
+            "symptoms": ["Unresponsive", "Not breathing normally", "No pulse detected"],
+            "actions": ["Use one or two hands for compressions"],
+            "criteria": [{"criterion": "Child compression technique", "points": 10}],
+        },
+        {
+            "name": "infant choking", "patients": ["infant"], "cpr": False,
+            "keywords": ["infant", "choking", "airway"],
+            "symptoms": ["Unable to cry or cough", "Turning blue", "Weak, ineffective cough"],
+            "actions": ["Deliver 5 back blows", "Deliver 5 chest thrusts", "Repeat until object is expelled"],
+            "criteria": [{"criterion": "Back blows", "points": 20}, {"criterion": "Chest thrusts", "points": 20}],
+        },
+        {
+            "name": "unresponsive infant", "patients": ["infant"], "cpr": True,
+            "keywords": ["infant", "cpr", "compression"],
+            "symptoms": ["Unresponsive", "Not breathing", "Limp"],
+            "actions": ["Use two fingers or two thumbs for compressions"],
+            "criteria": [{"criterion": "Infant compression technique", "points": 10}],
+        },
     ]
-    
-    async def generate(self, curriculum_id: str, count: int = 5) -> List[Scenario]:
+
+    COMPLICATIONS = [
+        {"name": None, "keywords": []},
+        {
+            "name": "AED arrives mid-scenario", "cpr_only": True, "keywords": ["aed", "defibrillat"],
+            "cue": "An AED is brought to the scene two minutes in",
+            "actions": ["Apply AED pads as soon as the AED arrives", "Follow AED prompts"],
+            "criteria": [{"criterion": "Correct AED pad placement", "points": 10}],
+            "extra_minutes": 3, "advanced": False,
+        },
+        {
+            "name": "agonal breathing", "cpr_only": True, "keywords": ["breathing", "assessment"],
+            "cue": "The manikin makes occasional gasping sounds",
+            "actions": ["Treat agonal breathing as not breathing"],
+            "criteria": [{"criterion": "Recognise agonal breathing", "points": 10}],
+            "extra_minutes": 0, "advanced": True,
+        },
+        {
+            "name": "vomiting", "keywords": ["airway", "recovery"],
+            "cue": "The patient vomits partway through",
+            "actions": ["Roll patient to the side and clear the airway", "Resume care promptly"],
+            "criteria": [{"criterion": "Airway cleared", "points": 10}],
+            "extra_minutes": 2, "advanced": True,
+        },
+        {
+            "name": "panicking bystanders", "keywords": ["bystander", "communication", "leadership"],
+            "cue": "Bystanders are loud and unsure how to help",
+            "actions": ["Give clear, specific instructions to bystanders"],
+            "criteria": [{"criterion": "Bystander direction", "points": 10}],
+            "extra_minutes": 0, "advanced": False,
+        },
+        {
+            "name": "second rescuer arrives", "cpr_only": True, "keywords": ["team", "two-rescuer", "rescuer"],
+            "cue": "A second trained rescuer arrives after three minutes",
+            "actions": ["Coordinate roles with the second rescuer", "Switch compressors every 2 minutes"],
+            "criteria": [{"criterion": "Team coordination", "points": 10}],
+            "extra_minutes": 3, "advanced": False,
+        },
+        {
+            "name": "ongoing scene hazard", "keywords": ["hazard", "safety", "workplace"],
+            "cue": "A hazard (traffic, spill or live equipment) remains near the patient",
+            "actions": ["Control or avoid the hazard before approaching"],
+            "criteria": [{"criterion": "Hazard managed", "points": 10}],
+            "extra_minutes": 2, "advanced": True,
+        },
+        {
+            "name": "patient regains breathing", "cpr_only": True, "keywords": ["recovery position", "monitor"],
+            "cue": "The patient starts breathing normally after several cycles",
+            "actions": ["Place patient in the recovery position", "Monitor until EMS arrives"],
+            "criteria": [{"criterion": "Recovery position", "points": 10}],
+            "extra_minutes": 2, "advanced": False,
+        },
+    ]
+
+    def __init__(self, db: Optional[Session] = None):
+        self.db = db
+
+    async def generate(self, curriculum_id: str, count: int = 5, seed: Optional[int] = None) -> List[Scenario]:
+        """
+        Generate practice scenarios for a curriculum
+        With no seed, the curriculum id seeds the order, so repeated calls match.
+        """
+        topics = curriculum_topics(self.db, curriculum_id) if self.db else []
+        return list(self.iter_scenarios(topics, count, scenario_seed(curriculum_id, seed)))
+
+    def iter_scenarios(self, topics: Iterable[str], count: int, seed: int) -> Iterator[Scenario]:
+        """
+        Lazily yield up to `count` distinct scenarios
+        Stops early if every combination has been used.
+        """
+        topics = [topic.lower() for topic in topics if topic]
+        tiers = self._combination_tiers(topics)
+        produced = 0
+        for tier_index, tier in enumerate(tiers):
+            for combination in self._permuted(tier, seed + tier_index):
+                if produced >= count:
+                    return
+                yield self._build(combination, topics, seed)
+                produced += 1
+
+    def persist(self, db: Session, curriculum_id: str, scenarios: Iterable[Scenario],
+                batch_size: int = SCENARIO_INSERT_BATCH) -> Iterator[Scenario]:
+        """
+        Insert scenarios into the scenarios table in bulk batches as they
+        pass through, yielding each one; the caller commits
+        """
+        from app.db_models import Scenario as ScenarioRow, generate_uuid
+
+        batch = []
+        for scenario in scenarios:
+            batch.append({'id': generate_uuid(), 'curriculum_id': curriculum_id, **scenario.model_dump()})
+            if len(batch) >= batch_size:
+                db.bulk_insert_mappings(ScenarioRow, batch)
+                batch = []
+            yield scenario
+        if batch:
+            db.bulk_insert_mappings(ScenarioRow, batch)
+
+    # ----- combination space -----
+
+    def _combination_tiers(self, topics: List[str]) -> List[List[Tuple]]:
+        """
+        Split (condition, profile, complication) triples into topic-relevant and
+        other tiers; each triple is combined with every location
+        """
+        def relevant(item):
+            return any(keyword in topic for keyword in item['keywords'] for topic in topics)
+
+        tiers = ([], [])
+        for condition in self.CONDITIONS:
+            for category in condition['patients']:
+                for profile in self.PATIENT_PROFILES[category]:
+                    for complication in self.COMPLICATIONS:
+                        # CPR-specific complications need CPR in the response
+                        if complication.get('cpr_only') and not condition['cpr']:
+                            continue
+                        matched = relevant(condition) or (complication['name'] and relevant(complication))
+                        tiers[0 if matched else 1].append((condition, profile, complication))
+        return [tier for tier in tiers if tier]
+
+    def _permuted(self, triples: List[Tuple], seed: int) -> Iterator[Tuple]:
         """
-        Generate practice scenarios
+        Visit every (triple, location) pair once in a seeded order, using an
+        affine bijection i -> (a*i + b) mod n instead of shuffling a list
         """
-        scenarios = []
-        
-        for i, template in enumerate(self.SCENARIO_TEMPLATES[:count]):
-            scenario = Scenario(
-                title=template["title"],
-                description=f"Simulated emergency at a {template['location']}",
-                setup_instructions=self._generate_setup_instructions(template),
-                patient_information={
-                    "age": (template["age_range"][0] + template["age_range"][1]) // 2,
-                    "gender": "male" if i % 2 == 0 else "female",
-                    "condition": template["condition"],
-                    "symptoms": [
-                        "Unresponsive",
-                        "Not breathing normally",
-                        "No pulse detected"
-                    ]
-                },
-                expected_actions=[
-                    "Check scene safety",
-                    "Check responsiveness",
-                    "Call 911 or direct someone to call",
-                    "Position patient on firm, flat surface",
-                    "Begin chest compressions",
-                    "Deliver rescue breaths if trained",
-                    "Continue CPR until help arrives or AED is available"
-                ],
-                evaluation_criteria=[
-                    {"criterion": "Scene safety assessment", "points": 5},
-                    {"criterion": "Check responsiveness", "points": 5},
-                    {"criterion": "Activate emergency response", "points": 10},
-                    {"criterion": "Proper hand placement", "points": 15},
-                    {"criterion": "Adequate compression depth", "points": 20},
-                    {"criterion": "Correct compression rate", "points": 20},
-                    {"criterion": "Minimal interruptions", "points": 15},
-                    {"criterion": "Proper rescue breaths (if applicable)", "points": 10}
-                ],
-                duration_minutes=10,
-                difficulty="intermediate"
-            )
-            scenarios.append(scenario)
-        
-        return scenarios
-    
+        locations = self.LOCATIONS
+        n = len(triples) * len(locations)
+        rng = random.Random(seed)
+        a = rng.randrange(1, n) if n > 1 else 1
+        while gcd(a, n) != 1:
+            a = rng.randrange(1, n)
+        b = rng.randrange(n)
+        for i in range(n):
+            index = (a * i + b) % n
+            triple = triples[index // len(locations)]
+            yield (locations[index % len(locations)],) + triple
+
+    def _build(self, combination: Tuple, topics: List[str], seed: int) -> Scenario:
+        location, condition, profile, complication = combination
+        rng = random.Random(f"{seed}:{condition['name']}:{profile['label']}:{complication['name']}:{location}")
+
+        low, high = profile['age_range']
+        topic = next((t for t in topics if any(k in t for k in condition['keywords'])), None)
+
+        title = f"{location.title()}: {condition['name'].capitalize()} ({profile['label']})"
+        if complication['name']:
+            title += f" with {complication['name']}"
+        description = f"Simulated {condition['name']} involving a {profile['label']} at a {location}"
+        if topic:
+            description += f". Practises: {topic}"
+
+        actions = list(BASE_ACTIONS) + condition.get('actions', [])
+        criteria = list(BASE_CRITERIA) + condition.get('criteria', [])
+        if condition['cpr']:
+            actions += CPR_ACTIONS
+            criteria += CPR_CRITERIA
+        if complication['name']:
+            actions += complication['actions']
+            criteria += complication['criteria']
+
+        if not complication['name']:
+            difficulty = "beginner"
+        elif complication['advanced']:
+            difficulty = "advanced"
+        else:
+            difficulty = "intermediate"
+
+        return Scenario(
+            title=title,
+            description=description,
+            setup_instructions=self._generate_setup_instructions(
+                {'location': location, 'cue': complication.get('cue')}
+            ),
+            patient_information={
+                "age": rng.randint(low, high),
+                "gender": profile.get('gender') or rng.choice(["male", "female"]),
+                "profile": profile['label'],
+                "condition": condition['name'],
+                "complication": complication['name'],
+                "symptoms": list(condition['symptoms'])
+            },
+            expected_actions=actions,
+            evaluation_criteria=criteria,
+            duration_minutes=10 + complication.get('extra_minutes', 0),
+            difficulty=difficulty
+        )
+
     def _generate_setup_instructions(self, template: dict) -> str:
         """
         Generate setup instructions for scenario
         """
+        complication = f"\n- Complication: {template['cue']}" if template.get('cue') else ""
         return f"""
 Scenario Setup:
 1. Place manikin in {template['location']} setting
@@ -105,8 +371,34 @@ Starting Position:
 
 Scenario Flow:
 - Allow student to assess situation
-- Respond to student's directions (calling 911, getting AED, etc.)
+- Respond to student's directions (calling 911, getting AED, etc.){complication}
 - Monitor performance using evaluation criteria
 - Provide feedback after scenario completion
         """.strip()
 
+
+def scenario_seed(curriculum_id: str, seed: Optional[int] = None) -> int:
+    """Explicit seed, or a stable one derived from the curriculum id"""
+    if seed is not None:
+        return seed
+    return int(hashlib.sha256(curriculum_id.encode('utf-8')).hexdigest()[:8], 16)
+
+
+def module_topics(modules: Iterable) -> List[str]:
+    """Module and topic titles from module rows or dicts"""
+    titles = []
+    for module in modules:
+        get = module.get if isinstance(module, dict) else lambda name: getattr(module, name, None)
+        titles.append(get('title') or '')
+        titles.extend(topic.get('title', '') for topic in get('topics') or [])
+    return titles
+
+
+def curriculum_topics(db: Session, curriculum_id: str) -> List[str]:
+    """Module and topic titles of a curriculum (from the shared aggregate cache)"""
+    from app.services.curriculum_repository import get_curriculum_aggregate
+
+    curriculum = get_curriculum_aggregate(db, curriculum_id)
+    if curriculum is None:
+        return []
+    return module_topics({'title': module.title, 'topics': module.topics} for module in curriculum.modules)
@@ -1,9 +1,43 @@
-from typing import List
+from typing import Dict, Iterable, List, Optional
+from itertools import zip_longest
+from sqlalchemy.orm import Session
+import hashlib
+import random
+
 from app.models import TestQuestion
 
+QUESTION_INSERT_BATCH = 500
+MAX_FORM_ATTEMPTS = 10  # assembly attempts per requested form before accepting reordered repeats
+
+# Ordered: a bank question is filed under the first topic its objective matches
+TOPIC_KEYWORDS = [
+    ('aed', ('aed', 'defibrillat')),
+    ('pediatric', ('child', 'infant', 'pediatric', 'paediatric')),
+    ('airway', ('airway', 'choking', 'obstruct', 'head-tilt')),
+    ('ventilation', ('ventilat', 'breath')),
+    ('compressions', ('compression', 'hand placement', 'positioning')),
+    ('legal', ('legal', 'ethic', 'consent', 'samaritan')),
+    ('assessment', ('assess', 'responsive', 'scene safety', 'complication')),
+    ('emergency_response', ('emergency', 'chain of survival')),
+    ('fundamentals', ('cpr', 'purpose', 'sequence', 'fundamental')),
+]
+DEFAULT_TOPIC = 'fundamentals'
+
+DIFFICULTIES = ['beginner', 'intermediate', 'advanced']
+DIFFICULTY_BY_VERB = {
+    'understand': 'beginner',
+    'follow': 'intermediate',
+    'demonstrate': 'intermediate',
+    'handle': 'advanced',
+}
+
+
 class TestGenerator:
     """
-    Service to generate test questions from curriculum
+    Service to assemble tests from the question bank
+    Questions are indexed by topic and difficulty; each test follows a
+    blueprint with a quota per module learning objective, and seeded
+    randomisation yields any number of parallel forms.
     """
     
     QUESTION_BANK = [
@@ -259,22 +293,249 @@ class TestGenerator:
         }
     ]
     
-    async def generate(self, curriculum_id: str, count: int = 25) -> List[TestQuestion]:
+    def __init__(self, db: Optional[Session] = None, bank: Optional[List[dict]] = None):
+        # Without a session, questions come from bank (e.g. rows loaded into a
+        # pipeline snapshot) or the built-in QUESTION_BANK
+        self.db = db
+        self.bank = bank
+
+    async def generate(self, curriculum_id: str, count: int = 25, seed: Optional[int] = None,
+                       difficulty: Optional[str] = None) -> List[TestQuestion]:
+        """
+        Assemble one test for a curriculum
         """
-        Generate test questions from question bank
+        return self.generate_forms(curriculum_id, count, 1, seed, difficulty)[0]
+
+    def generate_forms(self, curriculum_id: str, count: int = 25, forms: int = 1,
+                       seed: Optional[int] = None, difficulty: Optional[str] = None) -> List[List[TestQuestion]]:
+        """
+        Assemble parallel forms of a curriculum's test (same blueprint, different draws)
+        """
+        modules = curriculum_objectives(self.db, curriculum_id) if self.db is not None else []
+        return self.assemble_forms(modules, count, forms, form_seed(curriculum_id, seed), difficulty)
+
+    def assemble_forms(self, modules: Iterable, count: int, forms: int, seed: int,
+                       difficulty: Optional[str] = None) -> List[List[TestQuestion]]:
         """
-        questions = []
-        
-        for i, q in enumerate(self.QUESTION_BANK[:count]):
-            question = TestQuestion(
-                question=q["question"],
-                type=q["type"],
-                options=q.get("options"),
-                correct_answer=q["correct_answer"],
-                points=q["points"],
-                learning_objective=q["objective"]
-            )
-            questions.append(question)
-        
-        return questions
+        Draw forms for the modules' blueprint from one candidate query
+        Forms are unique question sets while the bank allows it, then unique
+        orderings; form n depends only on the seed, so forms are reproducible.
+        """
+        sections = build_blueprint(modules, count)
+        candidates = self._candidates(blueprint_topics(sections), difficulty, count)
+
+        by_topic: Dict[str, List[dict]] = {}
+        for item in candidates:
+            by_topic.setdefault(item['topic'], []).append(item)
+
+        results, spares = [], []
+        seen_sets, seen_orders = set(), set()
+        for attempt in range(forms * MAX_FORM_ATTEMPTS):
+            if len(results) == forms:
+                break
+            form = self._assemble(sections, by_topic, candidates, random.Random(f"{seed}:{attempt}"))
+            ids = tuple(item['id'] for item, _ in form)
+            if frozenset(ids) not in seen_sets:
+                seen_sets.add(frozenset(ids))
+                seen_orders.add(ids)
+                results.append(form)
+            elif ids not in seen_orders:
+                seen_orders.add(ids)
+                spares.append(form)
+        results.extend(spares[:forms - len(results)])
+
+        return [[self._question(item, objective) for item, objective in form] for form in results]
+
+    def candidate_questions(self, modules: Iterable, count: int, difficulty: Optional[str] = None) -> List[dict]:
+        """Bank questions a test of count questions for the modules draws from"""
+        return self._candidates(blueprint_topics(build_blueprint(modules, count)), difficulty, count)
+
+    def _candidates(self, topics: List[str], difficulty: Optional[str], count: int) -> List[dict]:
+        """
+        Bank questions for the blueprint topics: one query on the
+        (topic, difficulty) index, widened to the whole bank if too few match
+        """
+        if self.db is None:
+            bank = self.bank if self.bank is not None else bank_items()
+            items = [item for item in bank if not difficulty or item['difficulty'] == difficulty]
+            matching = [item for item in items if item['topic'] in topics]
+            return matching if len(matching) >= count else items
+
+        matching = self._query(topics, difficulty)
+        if not matching and ensure_question_bank(self.db):
+            matching = self._query(topics, difficulty)
+        return matching if len(matching) >= count else self._query(None, difficulty)
+
+    def _query(self, topics: Optional[List[str]], difficulty: Optional[str]) -> List[dict]:
+        from app.db_models import QuestionBankItem as Row
+
+        query = self.db.query(
+            Row.id, Row.question, Row.type, Row.options, Row.correct_answer,
+            Row.points, Row.learning_objective, Row.topic, Row.difficulty
+        )
+        if topics is not None:
+            query = query.filter(Row.topic.in_(topics))
+        if difficulty:
+            query = query.filter(Row.difficulty == difficulty)
+        # Ordered so a seed draws the same forms regardless of row order
+        return [row._asdict() for row in query.order_by(Row.id)]
+
+    def _assemble(self, sections: List[dict], by_topic: Dict[str, List[dict]],
+                  candidates: List[dict], rng: random.Random) -> List[tuple]:
+        """(item, objective) pairs meeting each section's quota, in shuffled order"""
+        used = set()
+        form = []
+        for section in sections:
+            pool = [item for topic in section['topics'] for item in by_topic.get(topic, [])
+                    if item['id'] not in used]
+            picks = rng.sample(pool, min(section['quota'], len(pool)))
+            used.update(item['id'] for item in picks)
+            form.extend((item, section['objective'] or item['learning_objective']) for item in picks)
+
+            # Objectives the bank cannot cover yet are filled from other topics
+            shortfall = section['quota'] - len(picks)
+            if shortfall:
+                rest = [item for item in candidates if item['id'] not in used]
+                fill = rng.sample(rest, min(shortfall, len(rest)))
+                used.update(item['id'] for item in fill)
+                form.extend((item, item['learning_objective']) for item in fill)
+
+        rng.shuffle(form)
+        return [(self._shuffle_options(item, rng), objective) for item, objective in form]
+
+    def _shuffle_options(self, item: dict, rng: random.Random) -> dict:
+        if item['type'] != 'multiple_choice' or not item.get('options'):
+            return item
+        options = list(item['options'])
+        rng.shuffle(options)
+        return {**item, 'options': options}
+
+    def _question(self, item: dict, objective: str) -> TestQuestion:
+        return TestQuestion(
+            question=item['question'],
+            type=item['type'],
+            options=item.get('options'),
+            correct_answer=item['correct_answer'],
+            points=item['points'],
+            learning_objective=objective
+        )
+
+
+def form_seed(curriculum_id: str, seed: Optional[int] = None) -> int:
+    """Explicit seed, or a stable one derived from the curriculum id"""
+    if seed is not None:
+        return seed
+    return int(hashlib.sha256(curriculum_id.encode('utf-8')).hexdigest()[:8], 16)
+
+
+def objective_topics(text: str) -> List[str]:
+    """Every topic whose keywords appear in text"""
+    text = (text or '').lower()
+    return [topic for topic, keywords in TOPIC_KEYWORDS if any(keyword in text for keyword in keywords)]
+
+
+def classify_question(question: dict) -> dict:
+    """Question dict with topic and difficulty filled in from its objective when missing"""
+    objective = question.get('learning_objective') or question.get('objective') or ''
+    topics = objective_topics(objective) or objective_topics(question.get('question')) or [DEFAULT_TOPIC]
+    verb = objective.split(' ', 1)[0].lower()
+    return {
+        'question': question['question'],
+        'type': question['type'],
+        'options': question.get('options'),
+        'correct_answer': question['correct_answer'],
+        'points': question.get('points') or 4,
+        'learning_objective': objective,
+        'topic': question.get('topic') or topics[0],
+        'difficulty': question.get('difficulty') or DIFFICULTY_BY_VERB.get(verb, 'intermediate'),
+    }
+
+
+_bank_items: List[dict] = []
+
+
+def bank_items() -> List[dict]:
+    """The built-in question bank, classified (used when no database session is given)"""
+    if not _bank_items:
+        _bank_items.extend(
+            {'id': f"bank-{index:03d}", **classify_question(question)}
+            for index, question in enumerate(TestGenerator.QUESTION_BANK)
+        )
+    return _bank_items
+
+
+def build_blueprint(modules: Iterable, count: int) -> List[dict]:
+    """
+    One section per module learning objective, with its question quota
+    Objectives are interleaved across modules so a remainder (or a count
+    smaller than the number of objectives) is spread over modules rather
+    than landing on the first one.
+    """
+    per_module = []
+    for module in modules:
+        get = module.get if isinstance(module, dict) else lambda name: getattr(module, name, None)
+        title = get('title') or ''
+        objectives = [o for o in get('learning_objectives') or [] if o] or [title]
+        per_module.append([
+            {
+                'module': title,
+                'objective': objective,
+                'topics': objective_topics(objective) or objective_topics(title) or [DEFAULT_TOPIC],
+            }
+            for objective in objectives
+        ])
+
+    sections = [section for row in zip_longest(*per_module) for section in row if section]
+    if not sections:
+        sections = [{'module': None, 'objective': None, 'topics': [topic for topic, _ in TOPIC_KEYWORDS]}]
+
+    base, remainder = divmod(count, len(sections))
+    for index, section in enumerate(sections):
+        section['quota'] = base + (1 if index < remainder else 0)
+    return [section for section in sections if section['quota']]
+
+
+def blueprint_topics(sections: List[dict]) -> List[str]:
+    return sorted({topic for section in sections for topic in section['topics']})
+
+
+def curriculum_objectives(db: Session, curriculum_id: str) -> List[dict]:
+    """Module titles and learning objectives of a curriculum (from the shared aggregate cache)"""
+    from app.services.curriculum_repository import get_curriculum_aggregate
+
+    curriculum = get_curriculum_aggregate(db, curriculum_id)
+    if curriculum is None:
+        return []
+    return [
+        {'title': module.title, 'learning_objectives': module.learning_objectives}
+        for module in curriculum.modules
+    ]
+
+
+def add_questions(db: Session, questions: Iterable[dict], batch_size: int = QUESTION_INSERT_BATCH) -> int:
+    """Bulk-insert questions into the bank, classifying any without topic or difficulty"""
+    from app.db_models import QuestionBankItem, generate_uuid
+
+    added = 0
+    batch = []
+    for question in questions:
+        batch.append({'id': generate_uuid(), **classify_question(question)})
+        if len(batch) >= batch_size:
+            db.bulk_insert_mappings(QuestionBankItem, batch)
+            added += len(batch)
+            batch = []
+    if batch:
+        db.bulk_insert_mappings(QuestionBankItem, batch)
+        added += len(batch)
+    return added
+
+
+def ensure_question_bank(db: Session) -> bool:
+    """Seed an empty question bank with the built-in questions; True if seeded"""
+    from app.db_models import QuestionBankItem
 
+    if db.query(QuestionBankItem.id).first() is not None:
+        return False
+    add_questions(db, TestGenerator.QUESTION_BANK)
+    db.commit()
+    return True
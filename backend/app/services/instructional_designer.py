@@ -2,15 +2,74 @@
 Professional Instructional Design Service
 Applies ADDIE model, Bloom's Taxonomy, and adult learning principles
 """
-from typing import List, Dict, Any
+from collections import Counter
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Set, Tuple
 import math
+import re
+
+from app.services.design_cache import DesignCache, design_cache, design_key
+from app.services.design_types import (
+    DesignedActivity, DesignedAssessment, DesignedCurriculum, DesignedModule, DesignedTopic
+)
+
+# Common CPR/First Aid topics and the clause keywords that signal them, in teaching order
+TOPIC_KEYWORDS = {
+    'CPR': ['cpr', 'chest compression', 'rescue breath', 'cardiopulmonary'],
+    'AED': ['aed', 'defibrillator', 'automated external'],
+    'First Aid': ['first aid', 'bleeding', 'wound', 'bandage'],
+    'Choking': ['choking', 'airway obstruction', 'heimlich'],
+    'Assessment': ['assessment', 'scene safety', 'primary survey'],
+    'Pediatric': ['pediatric', 'infant', 'child', 'children'],
+    'Medical Emergencies': ['stroke', 'heart attack', 'diabetic', 'seizure'],
+    'Injury Management': ['fracture', 'sprain', 'burn', 'injury']
+}
+
+# Precomputed keyword -> topic index (shared with CurriculumEngine)
+KEYWORD_TOPICS = {keyword: topic for topic, keywords in TOPIC_KEYWORDS.items() for keyword in keywords}
+
+# Every keyword in one alternation, longest first so 'children' is one hit, not also 'child'
+TOPIC_PATTERN = re.compile('|'.join(re.escape(keyword) for keyword in sorted(KEYWORD_TOPICS, key=len, reverse=True)))
+
+TEACHING_ORDER = {topic: rank for rank, topic in enumerate(TOPIC_KEYWORDS)}
+
+# Generic structure used when no clause matches a topic
+DEFAULT_TOPICS = ['Introduction', 'Core Skills', 'Practice', 'Assessment']
+
+
+def clause_text(clause: Any) -> str:
+    """Lowercased text of a clause row, dict or string"""
+    if hasattr(clause, 'text'):
+        return clause.text.lower()
+    if isinstance(clause, dict):
+        return str(clause.get('text', '')).lower()
+    return str(clause).lower()
+
+
+def match_topics(text: str) -> Set[str]:
+    """Topics whose keywords occur in already-lowercased text"""
+    return {KEYWORD_TOPICS[keyword] for keyword in TOPIC_PATTERN.findall(text)}
+
+
+def count_topics(clauses: Iterable[Any]) -> Counter:
+    """
+    Keyword hits per topic across clauses, in one pass
+    Each clause is lowercased once and all of them are scanned by the compiled
+    pattern together; the newline separator is in no keyword, so no match
+    spans two clauses.
+    """
+    text = "\n".join(clause_text(clause) for clause in clauses)
+    return Counter(KEYWORD_TOPICS[keyword] for keyword in TOPIC_PATTERN.findall(text))
+
 
 class InstructionalDesigner:
     """
     Expert instructional designer that creates professional curricula
     """
     
-    def __init__(self):
+    def __init__(self, cache: Optional[DesignCache] = None):
+        # Memoises design_curriculum_structure() when set
+        self.cache = cache
+        
         # Bloom's Taxonomy levels
         self.blooms_levels = ['Remember', 'Understand', 'Apply', 'Analyze', 'Evaluate', 'Create']
         
@@ -30,90 +89,131 @@ class InstructionalDesigner:
         audience: str,
         clauses: List[Any],
         standards: List[Any],
-        user_instructions: str = ""
-    ) -> Dict[str, Any]:
+        user_instructions: str = "",
+        sources: Optional[str] = None
+    ) -> DesignedCurriculum:
         """
         Create a professionally structured curriculum
-        Uses instructional design best practices
+        Uses instructional design best practices; with a sources fingerprint of
+        the clauses (design_cache.source_fingerprint), repeated inputs are
+        served from the cache. The result may be shared: do not modify it.
         """
+        key = None
+        if self.cache is not None and sources:
+            key = design_key(title, duration_minutes, audience, sources, user_instructions)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
         
-        # Determine number of modules based on duration
+        modules = list(self.iter_modules(duration_minutes, audience, clauses))
+        curriculum = self.curriculum_summary(title, duration_minutes, audience, modules)
+        if key is not None:
+            self.cache.put(key, curriculum)
+        return curriculum
+    
+    def module_count(self, duration_minutes: int) -> int:
+        """Number of modules for a course length"""
         # Rule: 60-90 minutes per module for adult learners
-        num_modules = max(3, min(8, math.ceil(duration_minutes / 75)))
+        return max(3, min(8, math.ceil(duration_minutes / 75)))
+    
+    def iter_modules(self, duration_minutes: int, audience: str, clauses: List[Any],
+                     topics: Optional[List[str]] = None) -> Iterator[DesignedModule]:
+        """
+        Design the modules one at a time, so callers can stream each as it is ready
+        Pass topics (from _extract_topics_from_clauses) to reuse an extraction.
+        """
+        num_modules = self.module_count(duration_minutes)
         
         # Calculate time per module
         time_per_module = duration_minutes // num_modules
         
-        # Create modules with proper structure
-        modules = []
-        
         # Extract key topics from clauses
-        topics = self._extract_topics_from_clauses(clauses)
+        if topics is None:
+            topics = self._extract_topics_from_clauses(clauses)
         
         for i in range(num_modules):
-            module = self._design_module(
+            yield self.design_module(
+                topic=topics[i % len(topics)],
                 module_number=i + 1,
                 total_modules=num_modules,
                 duration=time_per_module,
-                topics=topics,
                 audience=audience
             )
-            modules.append(module)
-        
-        return {
-            'title': title,
-            'description': f"A professionally designed {duration_minutes // 60}-hour curriculum for {audience}",
-            'total_duration_minutes': duration_minutes,
-            'modules': modules,
-            'design_notes': self._create_design_notes(duration_minutes, num_modules, audience)
-        }
     
-    def _extract_topics_from_clauses(self, clauses: List[Any]) -> List[str]:
-        """Extract key topics from RFP clauses"""
-        topics = []
+    def design_variants(
+        self,
+        title: str,
+        variants: List[Tuple[int, str]],
+        clauses: List[Any],
+        standards: List[Any],
+        user_instructions: str = "",
+        sources: Optional[str] = None
+    ) -> List[DesignedCurriculum]:
+        """
+        Design one curriculum per (duration_minutes, audience) variant, in order
+        Topics are extracted once for the whole grid and, given a sources
+        fingerprint, cached designs are reused. The rest are designed serially:
+        a variant takes well under a millisecond, less than pickling it to a
+        worker process would.
+        """
+        designs: List[Optional[DesignedCurriculum]] = [None] * len(variants)
+        keys: List[Optional[str]] = [None] * len(variants)
+        if self.cache is not None and sources:
+            for i, (duration_minutes, audience) in enumerate(variants):
+                keys[i] = design_key(title, duration_minutes, audience, sources, user_instructions)
+                designs[i] = self.cache.get(keys[i])
         
-        # Common CPR/First Aid topics
-        keywords = {
-            'CPR': ['cpr', 'chest compression', 'rescue breath', 'cardiopulmonary'],
-            'AED': ['aed', 'defibrillator', 'automated external'],
-            'First Aid': ['first aid', 'bleeding', 'wound', 'bandage'],
-            'Choking': ['choking', 'airway obstruction', 'heimlich'],
-            'Assessment': ['assessment', 'scene safety', 'primary survey'],
-            'Pediatric': ['pediatric', 'infant', 'child', 'children'],
-            'Medical Emergencies': ['stroke', 'heart attack', 'diabetic', 'seizure'],
-            'Injury Management': ['fracture', 'sprain', 'burn', 'injury']
-        }
+        missing = [i for i, design in enumerate(designs) if design is None]
+        if not missing:
+            return designs
         
-        for topic, keywords_list in keywords.items():
-            for clause in clauses:
-                clause_text = clause.text.lower() if hasattr(clause, 'text') else str(clause).lower()
-                if any(keyword in clause_text for keyword in keywords_list):
-                    if topic not in topics:
-                        topics.append(topic)
-                    break
+        topics = self._extract_topics_from_clauses(clauses)
+        for i in missing:
+            duration_minutes, audience = variants[i]
+            modules = list(self.iter_modules(duration_minutes, audience, [], topics))
+            designs[i] = self.curriculum_summary(title, duration_minutes, audience, modules)
+            if keys[i] is not None:
+                self.cache.put(keys[i], designs[i])
+        return designs
+    
+    def curriculum_summary(
+        self,
+        title: str,
+        duration_minutes: int,
+        audience: str,
+        modules: List[DesignedModule]
+    ) -> DesignedCurriculum:
+        """Curriculum-level fields around the designed modules"""
+        return DesignedCurriculum(
+            title=title,
+            description=f"A professionally designed {duration_minutes // 60}-hour curriculum for {audience}",
+            total_duration_minutes=duration_minutes,
+            modules=modules,
+            design_notes=self._create_design_notes(duration_minutes, self.module_count(duration_minutes), audience)
+        )
+    
+    def _extract_topics_from_clauses(self, clauses: List[Any]) -> List[str]:
+        """
+        Extract key topics from RFP clauses, most mentioned first (teaching
+        order among equals), so extra modules go to the most requested topics
+        """
+        counts = count_topics(clauses)
         
         # If no topics found, use generic structure
-        if not topics:
-            topics = ['Introduction', 'Core Skills', 'Practice', 'Assessment']
-        
-        return topics
+        return sorted(counts, key=lambda topic: (-counts[topic], TEACHING_ORDER[topic])) or list(DEFAULT_TOPICS)
     
-    def _design_module(
+    def design_module(
         self,
+        topic: str,
         module_number: int,
         total_modules: int,
         duration: int,
-        topics: List[str],
         audience: str
-    ) -> Dict[str, Any]:
+    ) -> DesignedModule:
         """
-        Design a single module using instructional design principles
+        Design a single module on one topic using instructional design principles
         """
         
-        # Assign topic to this module
-        topic_index = (module_number - 1) % len(topics)
-        topic = topics[topic_index] if topic_index < len(topics) else f"Module {module_number}"
-        
         # Create learning objectives using Bloom's taxonomy
         objectives = self._create_learning_objectives(topic, module_number, total_modules)
         
@@ -123,16 +223,16 @@ class InstructionalDesigner:
         # Create assessment
         assessment = self._design_assessment(topic, module_number, total_modules)
         
-        return {
-            'title': f"Module {module_number}: {topic}",
-            'description': f"Comprehensive training on {topic}",
-            'learning_objectives': objectives,
-            'duration_minutes': duration,
-            'sequence_order': module_number,
-            'topics': self._create_topics(topic, duration),
-            'activities': activities,
-            'assessment': assessment if module_number == total_modules else None  # Final module has main assessment
-        }
+        return DesignedModule(
+            title=f"Module {module_number}: {topic}",
+            description=f"Comprehensive training on {topic}",
+            learning_objectives=objectives,
+            duration_minutes=duration,
+            sequence_order=module_number,
+            topics=self._create_topics(topic, duration),
+            activities=activities,
+            assessment=assessment if module_number == total_modules else None  # Final module has main assessment
+        )
     
     def _create_learning_objectives(self, topic: str, module_num: int, total_modules: int) -> List[str]:
         """Create SMART learning objectives using Bloom's Taxonomy"""
@@ -159,85 +259,85 @@ class InstructionalDesigner:
         
         return objectives
     
-    def _create_topics(self, topic: str, duration: int) -> List[Dict[str, Any]]:
+    def _create_topics(self, topic: str, duration: int) -> List[DesignedTopic]:
         """Create content topics for the module"""
         num_topics = max(2, min(5, duration // 15))  # 15-30 min per topic
         topic_duration = duration // num_topics
         
         topics = []
         for i in range(num_topics):
-            topics.append({
-                'title': f"{topic} - Part {i + 1}",
-                'content': f"Detailed instruction on {topic.lower()}",
-                'duration_minutes': topic_duration
-            })
+            topics.append(DesignedTopic(
+                title=f"{topic} - Part {i + 1}",
+                content=f"Detailed instruction on {topic.lower()}",
+                duration_minutes=topic_duration
+            ))
         
         return topics
     
-    def _design_activities(self, topic: str, duration: int, audience: str) -> List[Dict[str, Any]]:
+    def _design_activities(self, topic: str, duration: int, audience: str) -> List[DesignedActivity]:
         """Design engaging activities using adult learning principles"""
         
         activities = []
         
         # Introduction activity (10% of time)
         intro_time = int(duration * self.time_allocation['introduction'])
-        activities.append({
-            'type': 'Discussion',
-            'title': 'Real-World Scenarios',
-            'description': f'Group discussion on when {audience} might encounter {topic.lower()} situations',
-            'duration_minutes': intro_time,
-            'materials_needed': ['Whiteboard', 'Markers']
-        })
+        activities.append(DesignedActivity(
+            type='Discussion',
+            title='Real-World Scenarios',
+            description=f'Group discussion on when {audience} might encounter {topic.lower()} situations',
+            duration_minutes=intro_time,
+            materials_needed=['Whiteboard', 'Markers']
+        ))
         
         # Demonstration (30% of time)
         demo_time = int(duration * self.time_allocation['instruction'])
-        activities.append({
-            'type': 'Demonstration',
-            'title': f'{topic} Technique Demonstration',
-            'description': f'Instructor demonstrates proper {topic.lower()} techniques step-by-step',
-            'duration_minutes': demo_time,
-            'materials_needed': ['Training manikins', 'AED trainer', 'Visual aids']
-        })
+        activities.append(DesignedActivity(
+            type='Demonstration',
+            title=f'{topic} Technique Demonstration',
+            description=f'Instructor demonstrates proper {topic.lower()} techniques step-by-step',
+            duration_minutes=demo_time,
+            materials_needed=['Training manikins', 'AED trainer', 'Visual aids']
+        ))
         
         # Hands-on Practice (35% of time - MOST IMPORTANT)
         practice_time = int(duration * self.time_allocation['practice'])
-        activities.append({
-            'type': 'Hands-on Practice',
-            'title': f'{topic} Skills Practice',
-            'description': f'Students practice {topic.lower()} in small groups with instructor feedback',
-            'duration_minutes': practice_time,
-            'materials_needed': ['Training manikins (1 per 3 students)', 'Gloves', 'Barrier devices']
-        })
+        activities.append(DesignedActivity(
+            type='Hands-on Practice',
+            title=f'{topic} Skills Practice',
+            description=f'Students practice {topic.lower()} in small groups with instructor feedback',
+            duration_minutes=practice_time,
+            materials_needed=['Training manikins (1 per 3 students)', 'Gloves', 'Barrier devices']
+        ))
         
         # Assessment (15% of time)
         assessment_time = int(duration * self.time_allocation['assessment'])
-        activities.append({
-            'type': 'Skills Assessment',
-            'title': f'{topic} Competency Check',
-            'description': 'Individual skills demonstration to verify competency',
-            'duration_minutes': assessment_time,
-            'materials_needed': ['Skills checklist', 'Evaluation forms']
-        })
+        activities.append(DesignedActivity(
+            type='Skills Assessment',
+            title=f'{topic} Competency Check',
+            description='Individual skills demonstration to verify competency',
+            duration_minutes=assessment_time,
+            materials_needed=['Skills checklist', 'Evaluation forms']
+        ))
         
         return activities
     
-    def _design_assessment(self, topic: str, module_num: int, total_modules: int) -> Dict[str, Any]:
+    def _design_assessment(self, topic: str, module_num: int, total_modules: int) -> DesignedAssessment:
         """Design appropriate assessment"""
         
         if module_num == total_modules:
             # Final comprehensive assessment
-            return {
-                'type': 'Skills Test + Written Exam',
-                'title': 'Final Competency Assessment',
-                'passing_score': 80  # Industry standard for CPR/First Aid
-            }
+            return DesignedAssessment(
+                type='Skills Test + Written Exam',
+                title='Final Competency Assessment',
+                passing_score=80  # Industry standard for CPR/First Aid
+            )
         else:
             # Formative assessment
-            return {
-                'type': 'Skills Check',
-                'title': f'{topic} Competency Verification',
-                'passing_score': 80
-            }
+            return DesignedAssessment(
+                type='Skills Check',
+                title=f'{topic} Competency Verification',
+                passing_score=80
+            )
     
     def _create_design_notes(self, duration: int, modules: int, audience: str) -> str:
         """Create instructional design rationale"""
@@ -253,6 +353,25 @@ Instructional Design Notes:
 • Incorporates scenario-based learning for real-world application
         """.strip()
 
+def compare_variants(variants: List[Tuple[int, str]], designs: List[DesignedCurriculum]) -> List[Dict[str, Any]]:
+    """One comparison row per designed variant"""
+    rows = []
+    for (duration_minutes, audience), design in zip(variants, designs):
+        modules = design.modules
+        rows.append({
+            'duration_minutes': duration_minutes,
+            'audience': audience,
+            'modules': len(modules),
+            'minutes_per_module': modules[0].duration_minutes if modules else 0,
+            'practice_minutes': sum(
+                activity.duration_minutes
+                for module in modules for activity in module.activities
+                if activity.type == 'Hands-on Practice'
+            ),
+            'topics': [module.title.split(': ', 1)[-1] for module in modules],
+        })
+    return rows
+
 # Global instance
-instructional_designer = InstructionalDesigner()
+instructional_designer = InstructionalDesigner(cache=design_cache)
 
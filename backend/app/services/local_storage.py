@@ -1,35 +1,243 @@
+import hashlib
+import json
 import os
 import shutil
-from typing import Dict
+import tempfile
+import threading
+from io import BytesIO
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from app.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+UPLOADS_URL_PREFIX = '/files/uploads/'
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class _IndexLock:
+    """
+    Exclusive lock on the blob index across threads and processes
+    (uvicorn workers, pool workers), held through a lock file next to it
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd = None
+    
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            else:
+                while True:
+                    try:
+                        msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:  # LK_LOCK gives up after ~10 s
+                        continue
+        except Exception:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            self._thread_lock.release()
+            raise
+        return self
+    
+    def __exit__(self, *exc):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+            self._thread_lock.release()
+
 
 class LocalStorage:
     """
     Simple file storage for local development
     No Supabase needed!
+    
+    Uploads are stored once per unique content under blobs/ab/cd/<sha256>;
+    blob-index.json maps each upload URL to its blob and counts references,
+    so identical uploads share one file and unreferenced blobs can be
+    garbage-collected (see app.services.maintenance). The index is only
+    read and written under a file lock shared by every process.
     """
     
     def __init__(self, storage_dir: str = "local_storage"):
         self.storage_dir = storage_dir
         self.uploads_dir = os.path.join(storage_dir, "rfp-uploads")
         self.outputs_dir = os.path.join(storage_dir, "generated-outputs")
+        self.blobs_dir = os.path.join(storage_dir, "blobs")
+        self.index_path = os.path.join(storage_dir, "blob-index.json")
         
         # Create directories
         os.makedirs(self.uploads_dir, exist_ok=True)
         os.makedirs(self.outputs_dir, exist_ok=True)
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        
+        self._index_lock = _IndexLock(os.path.join(storage_dir, "blob-index.lock"))
+        self._index = None
+        self._index_version = None
+    
+    # ----- blob index -----
+    
+    def _index_stat(self) -> Optional[Tuple[int, int, int]]:
+        """(inode, mtime, size) of the index; every write replaces the file, so the inode changes too"""
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+    
+    def _load_index(self) -> Dict:
+        """
+        Index as {'refs': {url: sha256}, 'blobs': {sha256: {'size', 'refcount'}}},
+        reloaded when another process changed it (index lock held)
+        """
+        version = self._index_stat()
+        if self._index is None or version != self._index_version:
+            if version is None:
+                self._index = {'refs': {}, 'blobs': {}}
+            else:
+                with open(self.index_path, 'r') as f:
+                    self._index = json.load(f)
+            self._index_version = version
+        return self._index
+    
+    def _write_index(self):
+        fd, tmp_path = tempfile.mkstemp(dir=self.storage_dir, suffix='.json.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self._index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+        self._index_version = self._index_stat()
+    
+    def blob_path(self, digest: str) -> str:
+        """Sharded location of a blob: blobs/ab/cd/abcd..."""
+        return os.path.join(self.blobs_dir, digest[:2], digest[2:4], digest)
+    
+    def _write_blob(self, fileobj: BinaryIO) -> Tuple[str, int, str]:
+        """Stream fileobj to a temp file in blobs/, hashing as it goes; returns (digest, size, temp path)"""
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.blobs_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in iter(lambda: fileobj.read(COPY_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        return digest.hexdigest(), size, tmp_path
+    
+    def _commit_blob(self, digest: str, tmp_path: str):
+        """Move a written blob into place, or drop it if the content is already stored (index lock held)"""
+        path = self.blob_path(digest)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+    
+    def _add_ref(self, url: str, digest: str, size: int):
+        """Point url at digest, moving its reference off any previous blob (index lock held)"""
+        index = self._load_index()
+        previous = index['refs'].get(url)
+        if previous == digest:
+            return
+        if previous is not None:
+            index['blobs'][previous]['refcount'] -= 1
+        blob = index['blobs'].setdefault(digest, {'size': size, 'refcount': 0})
+        blob['refcount'] += 1
+        index['refs'][url] = digest
     
     def save_upload(self, file_content: bytes, filename: str) -> Dict:
-        """Save uploaded file"""
-        filepath = os.path.join(self.uploads_dir, filename)
-        
-        with open(filepath, 'wb') as f:
-            f.write(file_content)
+        """Save uploaded file (deduplicated by content)"""
+        return self.save_upload_file(BytesIO(file_content), filename)
+    
+    def save_upload_file(self, fileobj: BinaryIO, filename: str) -> Dict:
+        """Save an uploaded file from a file object without reading it into memory"""
+        url = f'{UPLOADS_URL_PREFIX}{filename}'
+        digest, size, tmp_path = self._write_blob(fileobj)
+        with self._index_lock:
+            self._commit_blob(digest, tmp_path)
+            self._add_ref(url, digest, size)
+            self._write_index()
         
         return {
-            'path': filepath,
-            'url': f'/files/uploads/{filename}',
+            'path': self.blob_path(digest),
+            'url': url,
             'fileName': filename
         }
     
+    def delete_upload(self, url: str) -> bool:
+        """Drop an upload's reference; the blob is removed by collect_garbage once unreferenced"""
+        with self._index_lock:
+            index = self._load_index()
+            digest = index['refs'].pop(url, None)
+            if digest is None:
+                legacy_path = os.path.join(self.uploads_dir, url.replace(UPLOADS_URL_PREFIX, ''))
+                if url.startswith(UPLOADS_URL_PREFIX) and os.path.isfile(legacy_path):
+                    os.remove(legacy_path)
+                    return True
+                return False
+            index['blobs'][digest]['refcount'] -= 1
+            self._write_index()
+        return True
+    
+    def migrate_legacy_uploads(self) -> int:
+        """Move files saved under rfp-uploads/ before deduplication into the blob store"""
+        migrated = 0
+        with self._index_lock:
+            self._load_index()
+            for filename in sorted(os.listdir(self.uploads_dir)):
+                filepath = os.path.join(self.uploads_dir, filename)
+                if not os.path.isfile(filepath):
+                    continue
+                with open(filepath, 'rb') as f:
+                    digest, size, tmp_path = self._write_blob(f)
+                self._commit_blob(digest, tmp_path)
+                self._add_ref(f'{UPLOADS_URL_PREFIX}{filename}', digest, size)
+                os.remove(filepath)
+                migrated += 1
+            if migrated:
+                self._write_index()
+        return migrated
+    
+    def collect_garbage(self) -> Dict:
+        """Delete blobs with no references, including files missing from the index"""
+        removed = 0
+        freed = 0
+        with self._index_lock:
+            index = self._load_index()
+            live = {digest for digest, blob in index['blobs'].items() if blob['refcount'] > 0}
+            for root, _, files in os.walk(self.blobs_dir):
+                for name in files:
+                    # Skip live blobs and uploads still being written
+                    if name in live or name.endswith('.tmp'):
+                        continue
+                    path = os.path.join(root, name)
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+                    removed += 1
+            index['blobs'] = {digest: index['blobs'][digest] for digest in live}
+            self._write_index()
+        return {'removed': removed, 'freed_bytes': freed}
+    
     def save_output(self, file_content: bytes, filename: str, output_type: str) -> Dict:
         """Save generated output file"""
         type_dir = os.path.join(self.outputs_dir, output_type)
@@ -46,17 +254,78 @@ class LocalStorage:
             'fileName': filename
         }
     
+    def save_output_file(self, source_path: str, filename: str, output_type: str) -> Dict:
+        """Atomically move an already-written file into the outputs directory"""
+        type_dir = os.path.join(self.outputs_dir, output_type)
+        os.makedirs(type_dir, exist_ok=True)
+        
+        filepath = os.path.join(type_dir, filename)
+        os.replace(source_path, filepath)
+        
+        return {
+            'path': filepath,
+            'url': f'/files/outputs/{output_type}/{filename}',
+            'fileName': filename
+        }
+    
+    def prune_outputs(self, output_type: str, prefix: str, keep: str = None) -> int:
+        """Delete generated outputs starting with prefix, except `keep`"""
+        type_dir = os.path.join(self.outputs_dir, output_type)
+        if not os.path.isdir(type_dir):
+            return 0
+        
+        removed = 0
+        for filename in os.listdir(type_dir):
+            if filename.startswith(prefix) and filename != keep:
+                os.remove(os.path.join(type_dir, filename))
+                removed += 1
+        return removed
+    
     def get_file_path(self, url: str) -> str:
         """Convert URL to local file path"""
-        if url.startswith('/files/uploads/'):
-            filename = url.replace('/files/uploads/', '')
+        if url.startswith(UPLOADS_URL_PREFIX):
+            with self._index_lock:
+                digest = self._load_index()['refs'].get(url)
+            if digest:
+                return self.blob_path(digest)
+            # Uploads saved before deduplication
+            filename = url.replace(UPLOADS_URL_PREFIX, '')
             return os.path.join(self.uploads_dir, filename)
         elif url.startswith('/files/outputs/'):
             path_parts = url.replace('/files/outputs/', '').split('/')
             return os.path.join(self.outputs_dir, *path_parts)
         return url
+    
+    def download_url(self, url: str) -> Optional[str]:
+        """Direct download URL that bypasses the API, if the backend has one"""
+        return None
+
+
+def create_storage() -> LocalStorage:
+    """Storage backend selected by Settings.STORAGE_TYPE ('local' or 's3')"""
+    if settings.STORAGE_TYPE == 's3':
+        from app.services.s3_storage import S3Storage
+        return S3Storage(
+            bucket=settings.S3_BUCKET,
+            endpoint_url=settings.S3_ENDPOINT_URL or None,
+            region=settings.S3_REGION or None,
+            access_key_id=settings.S3_ACCESS_KEY_ID or None,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY or None,
+            prefix=settings.S3_PREFIX
+        )
+    if settings.STORAGE_TYPE != 'local':
+        raise ValueError(f"Unsupported STORAGE_TYPE: {settings.STORAGE_TYPE}")
+    return LocalStorage()
 
 # Global instance
-storage = LocalStorage()
+storage = create_storage()
+
+
+if __name__ == "__main__":
+    # Deduplicate existing uploads and free unreferenced blobs now (the API
+    # also does this at startup and every STORAGE_GC_INTERVAL_SECONDS):
+    #   python -m app.services.local_storage
+    print(f"Migrated {storage.migrate_legacy_uploads()} legacy uploads")
+    print("Garbage collection: {removed} blobs removed, {freed_bytes} bytes freed".format(**storage.collect_garbage()))
 
 
@@ -0,0 +1,60 @@
+"""
+Periodic housekeeping started with the API
+Tasks run once at startup and then every interval on a worker thread, so
+they never block the event loop. Every API process runs them; the tasks
+themselves are safe to run concurrently.
+"""
+from typing import Callable, List
+import asyncio
+
+from app.config import settings
+from app.services.conversation_store import conversation_store
+from app.services.local_storage import storage
+
+_tasks: List[asyncio.Task] = []
+
+
+def collect_upload_garbage():
+    """Move pre-deduplication uploads into the blob store and delete unreferenced blobs"""
+    migrated = storage.migrate_legacy_uploads()
+    result = storage.collect_garbage()
+    if migrated or result['removed']:
+        print(f"[STORAGE] Migrated {migrated} legacy uploads, removed {result['removed']} "
+              f"unreferenced blobs ({result['freed_bytes']} bytes)")
+
+
+def purge_conversations():
+    """Delete chat conversations idle for longer than CONVERSATION_TTL_SECONDS"""
+    removed = conversation_store.purge_expired()
+    if removed:
+        print(f"[CHAT] Purged {removed} expired conversations")
+
+
+async def _run_periodically(name: str, task: Callable[[], None], interval_seconds: int):
+    while True:
+        try:
+            await asyncio.to_thread(task)
+        except Exception as e:
+            print(f"[MAINTENANCE] {name} failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+def start_maintenance():
+    """Schedule the housekeeping tasks on the running event loop (call on startup)"""
+    if settings.STORAGE_GC_INTERVAL_SECONDS > 0:
+        _tasks.append(asyncio.create_task(
+            _run_periodically('Upload garbage collection', collect_upload_garbage,
+                              settings.STORAGE_GC_INTERVAL_SECONDS)
+        ))
+    if settings.CONVERSATION_PURGE_INTERVAL_SECONDS > 0:
+        _tasks.append(asyncio.create_task(
+            _run_periodically('Conversation purge', purge_conversations,
+                              settings.CONVERSATION_PURGE_INTERVAL_SECONDS)
+        ))
+
+
+def stop_maintenance():
+    """Cancel the housekeeping tasks (call on shutdown)"""
+    for task in _tasks:
+        task.cancel()
+    _tasks.clear()
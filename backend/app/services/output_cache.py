@@ -0,0 +1,173 @@
+"""
+Content-addressed cache for generated decks and manuals
+Artifacts are named by a fingerprint of the curriculum, its modules, the
+customizations and the generator version, so unchanged inputs reuse the
+existing file. The cached presentation and manual directories are kept
+under OUTPUT_CACHE_MAX_BYTES by evicting the least recently used files;
+files a completed Output still points at are never evicted.
+"""
+from typing import Dict, Any, Iterable, Optional, Set
+from sqlalchemy.orm import Session
+import hashlib
+import json
+import os
+import threading
+
+from app.config import settings
+from app.services.local_storage import storage
+
+# Columns that affect rendered output
+CURRICULUM_FIELDS = ['id', 'rfp_id', 'title', 'description', 'status', 'total_duration_minutes']
+MODULE_FIELDS = [
+    'id', 'title', 'description', 'learning_objectives', 'duration_minutes',
+    'sequence_order', 'topics', 'activities', 'assessment'
+]
+
+# Fingerprint length in hex characters (128 bits)
+KEY_LENGTH = 32
+
+# Output types named by fingerprint; BRDs and bundles are managed elsewhere
+CACHED_OUTPUT_TYPES = ('presentations', 'manuals')
+
+# Precompressed variants written next to a file when it is served
+SIDECAR_SUFFIXES = ('.gz', '.br')
+
+_evict_lock = threading.Lock()
+
+
+def _fields(obj: Any, names) -> Dict[str, Any]:
+    """Pick fields from a dict or an object with attributes"""
+    if isinstance(obj, dict):
+        return {name: obj.get(name) for name in names}
+    return {name: getattr(obj, name, None) for name in names}
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value, sort_keys=True, default=str).encode('utf-8')
+
+
+def fingerprint(
+    kind: str,
+    curriculum: Any,
+    modules: Iterable[Any],
+    customizations: Optional[Dict[str, Any]],
+    version: int
+) -> str:
+    """
+    Stable cache key for a generated artifact
+    
+    Args:
+        kind: Artifact kind, e.g. 'ppt' or 'student_manual'
+        curriculum: Curriculum row or dict
+        modules: Modules in sequence order (rows or dicts), consumed once
+        customizations: Generator options that change the output
+        version: Generator version; bump it when rendering changes
+    """
+    hasher = hashlib.sha256()
+    hasher.update(_encode({'kind': kind, 'version': version, 'customizations': customizations or {}}))
+    hasher.update(_encode(_fields(curriculum, CURRICULUM_FIELDS)))
+    for module in modules:
+        hasher.update(b'\n')
+        hasher.update(_encode(_fields(module, MODULE_FIELDS)))
+    return hasher.hexdigest()[:KEY_LENGTH]
+
+
+def iter_module_fields(db: Session, curriculum_id: str):
+    """Stream a curriculum's module columns in sequence order (for fingerprinting)"""
+    from app.db_models import CurriculumModule
+    
+    columns = [getattr(CurriculumModule, name) for name in MODULE_FIELDS]
+    query = (
+        db.query(*columns)
+        .filter(CurriculumModule.curriculum_id == curriculum_id)
+        .order_by(CurriculumModule.sequence_order)
+        .yield_per(16)
+    )
+    for row in query:
+        yield dict(zip(MODULE_FIELDS, row))
+
+
+def lookup(output_type: str, filename: str) -> Optional[str]:
+    """Return the URL of a cached output and mark it recently used, or None"""
+    url = f'/files/outputs/{output_type}/{filename}'
+    path = storage.get_file_path(url)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return url
+
+
+def _referenced_paths() -> Set[str]:
+    """Paths of files that completed Output rows point at"""
+    from app.database import SessionLocal
+    from app.db_models import Output
+    
+    db = SessionLocal()
+    try:
+        rows = db.query(Output.file_url).filter(
+            Output.status == 'completed', Output.file_url.isnot(None)
+        ).all()
+    finally:
+        db.close()
+    return {os.path.realpath(storage.get_file_path(url)) for url, in rows}
+
+
+def enforce_size_limit(max_bytes: int = None) -> int:
+    """
+    Evict least recently used cached decks and manuals until they fit in max_bytes
+    A file's precompressed sidecars count towards its size and go with it.
+    Returns the number of files removed (sidecars not counted).
+    """
+    max_bytes = settings.OUTPUT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    
+    with _evict_lock:
+        entries = []
+        total = 0
+        for output_type in CACHED_OUTPUT_TYPES:
+            type_dir = os.path.join(storage.outputs_dir, output_type)
+            try:
+                filenames = os.listdir(type_dir)
+            except FileNotFoundError:
+                continue
+            for filename in filenames:
+                if filename.endswith('.tmp') or filename.endswith(SIDECAR_SUFFIXES):
+                    continue  # render in progress, or counted with its source
+                path = os.path.join(type_dir, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                size = stat.st_size
+                for suffix in SIDECAR_SUFFIXES:
+                    try:
+                        size += os.stat(path + suffix).st_size
+                    except FileNotFoundError:
+                        pass
+                entries.append((stat.st_mtime, size, path))
+                total += size
+        
+        removed = 0
+        if total <= max_bytes:
+            return removed
+        
+        try:
+            referenced = _referenced_paths()
+        except Exception as e:
+            # Without the references nothing is known to be safe to delete;
+            # the render that triggered this still succeeds
+            print(f"[OUTPUT CACHE] Eviction skipped, could not load referenced outputs: {e}")
+            return removed
+        for _, size, path in sorted(entries):
+            if os.path.realpath(path) in referenced:
+                continue
+            for victim in (path, *(path + suffix for suffix in SIDECAR_SUFFIXES)):
+                try:
+                    os.remove(victim)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            removed += 1
+            if total <= max_bytes:
+                break
+        return removed
@@ -0,0 +1,177 @@
+"""
+Background output generation jobs
+Each job owns an Output row that moves pending -> running -> completed/failed
+and runs in the shared process pool, so API requests return immediately.
+PowerPoint jobs instead run on a thread in the API process and fan their
+module slides out to the pool themselves.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Optional
+from sqlalchemy.orm import Session
+import asyncio
+import threading
+import time
+
+from app.config import settings
+from app.database import SessionLocal
+from app.db_models import Output
+from app.services.worker_pool import get_process_pool
+
+# Output type -> default title
+OUTPUT_TYPES = {
+    'ppt': 'PowerPoint Presentation',
+    'student_manual': 'Student Manual',
+    'instructor_manual': 'Instructor Manual',
+}
+
+# Output types whose generator fans work out to the process pool; running them
+# inside a pool worker would leave them waiting on their own pool
+FAN_OUT_TYPES = {'ppt'}
+
+ACTIVE_STATUSES = ('pending', 'running')
+TERMINAL_STATUSES = ('completed', 'failed')
+
+
+class JobQueueFull(Exception):
+    """Raised when OUTPUT_JOB_QUEUE_LIMIT jobs are already queued or running"""
+
+
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+_fan_out_threads = ThreadPoolExecutor(thread_name_prefix='output-job')
+
+
+def submit_output_job(
+    db: Session,
+    curriculum_id: str,
+    output_type: str,
+    customizations: Optional[Dict[str, Any]] = None
+) -> Output:
+    """
+    Create a pending Output row and queue its generation
+    
+    Returns the Output immediately; poll GET /api/outputs/{id} for progress.
+    """
+    global _in_flight
+    if output_type not in OUTPUT_TYPES:
+        raise ValueError(f"Unsupported output type: {output_type}")
+    
+    with _in_flight_lock:
+        if _in_flight >= settings.OUTPUT_JOB_QUEUE_LIMIT:
+            raise JobQueueFull("Too many output jobs in progress, try again shortly")
+        _in_flight += 1
+    
+    try:
+        output = Output(
+            curriculum_id=curriculum_id,
+            type=output_type,
+            title=OUTPUT_TYPES[output_type],
+            status='pending'
+        )
+        db.add(output)
+        db.commit()
+        db.refresh(output)
+        
+        if output_type in FAN_OUT_TYPES:
+            future = _fan_out_threads.submit(
+                run_output_job, output.id, output_type, curriculum_id, customizations, True
+            )
+        else:
+            future = get_process_pool().submit(
+                run_output_job, output.id, output_type, curriculum_id, customizations
+            )
+    except Exception:
+        _release_slot()
+        raise
+    
+    output_id = output.id
+    future.add_done_callback(lambda f: _job_finished(f, output_id))
+    return output
+
+
+def _release_slot():
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight -= 1
+
+
+def _job_finished(future, output_id: str):
+    """Free the queue slot; record failures the worker could not report itself"""
+    _release_slot()
+    error = future.exception() if not future.cancelled() else RuntimeError("Job cancelled")
+    if error is not None:
+        _mark_failed(output_id, f"Worker error: {error}")
+
+
+def _mark_failed(output_id: str, message: str):
+    db = SessionLocal()
+    try:
+        output = db.query(Output).filter(Output.id == output_id).first()
+        if output and output.status in ACTIVE_STATUSES:
+            output.status = 'failed'
+            output.error_message = message
+            output.completed_at = datetime.utcnow()
+            db.commit()
+    finally:
+        db.close()
+
+
+def run_output_job(
+    output_id: str,
+    output_type: str,
+    curriculum_id: str,
+    customizations: Optional[Dict[str, Any]] = None,
+    fan_out: bool = False
+):
+    """
+    Process-pool (or, with fan_out, thread) entry point: generate one output
+    and record the result
+    """
+    db = SessionLocal()
+    try:
+        output = db.query(Output).filter(Output.id == output_id).first()
+        if not output:
+            return
+        
+        output.status = 'running'
+        output.started_at = datetime.utcnow()
+        db.commit()
+        started = time.perf_counter()
+        
+        try:
+            file_url = asyncio.run(_generate(db, output_type, curriculum_id, customizations, fan_out))
+        except Exception as e:
+            db.rollback()
+            output.status = 'failed'
+            output.error_message = str(e)
+        else:
+            output.status = 'completed'
+            output.file_url = file_url
+            output.error_message = None
+        
+        output.completed_at = datetime.utcnow()
+        output.duration_ms = int((time.perf_counter() - started) * 1000)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _generate(
+    db: Session,
+    output_type: str,
+    curriculum_id: str,
+    customizations: Optional[Dict[str, Any]],
+    fan_out: bool = False
+) -> str:
+    """Run the generator for output_type and return the file URL"""
+    from app.services.generators.ppt_generator import PptGenerator
+    from app.services.generators.pdf_generator import PdfGenerator
+    
+    if output_type == 'ppt':
+        executor = get_process_pool() if fan_out else None
+        return await PptGenerator(db, executor=executor).generate(curriculum_id, customizations)
+    if output_type == 'student_manual':
+        return await PdfGenerator(db).generate_student_manual(curriculum_id)
+    return await PdfGenerator(db).generate_instructor_manual(curriculum_id)
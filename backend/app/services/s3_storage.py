@@ -0,0 +1,250 @@
+"""
+S3-compatible object storage backend (AWS S3, MinIO, ...)
+Selected with STORAGE_TYPE=s3. The bucket is the source of truth; the local
+storage directories act as a read-through cache so generators and parsers
+keep working with file paths.
+
+Upload references are kept in the bucket too, as empty objects
+upload-refs/<filename>/<sha256>: any host can resolve an upload URL to its
+blob, and bucket garbage collection sees every host's references.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, Dict, Optional
+import mimetypes
+import os
+import tempfile
+
+from app.config import settings
+from app.services.local_storage import LocalStorage, UPLOADS_URL_PREFIX
+
+
+class S3Storage(LocalStorage):
+    """
+    Mirrors LocalStorage's layout as object keys:
+    blobs/ab/cd/<sha256> for uploads, generated-outputs/<type>/<name> for outputs,
+    plus upload-refs/<filename>/<sha256> for each upload URL
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        prefix: str = "",
+        storage_dir: str = "local_storage"
+    ):
+        if not bucket:
+            raise ValueError("S3_BUCKET is required when STORAGE_TYPE=s3")
+        try:
+            import boto3  # noqa: F401
+        except ImportError:
+            raise ImportError("STORAGE_TYPE=s3 requires boto3 (pip install boto3)")
+
+        super().__init__(storage_dir)
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self._client_kwargs = {
+            'endpoint_url': endpoint_url,
+            'region_name': region,
+            'aws_access_key_id': access_key_id,
+            'aws_secret_access_key': secret_access_key,
+        }
+        self._client = None
+        self._client_pid = None
+
+    @property
+    def client(self):
+        """boto3 client, created per process (pool workers are forked)"""
+        if self._client is None or self._client_pid != os.getpid():
+            import boto3
+            self._client = boto3.client('s3', **self._client_kwargs)
+            self._client_pid = os.getpid()
+        return self._client
+
+    @property
+    def transfer_config(self):
+        from boto3.s3.transfer import TransferConfig
+        chunk = max(5, settings.S3_MULTIPART_CHUNK_MB) * 1024 * 1024
+        return TransferConfig(multipart_threshold=chunk, multipart_chunksize=chunk)
+
+    def object_key(self, path: str) -> str:
+        """Object key for a path inside the local storage directory"""
+        relative = os.path.relpath(path, self.storage_dir)
+        return self.prefix + relative.replace(os.sep, '/')
+
+    def _exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def _put(self, path: str, skip_existing: bool = False):
+        """Upload a local file, in parts once it exceeds the multipart threshold"""
+        key = self.object_key(path)
+        if skip_existing and self._exists(key):
+            return
+        self.client.upload_file(path, self.bucket, key, Config=self.transfer_config)
+
+    def _fetch(self, path: str) -> bool:
+        """Download an object into the local cache; False if it does not exist"""
+        from botocore.exceptions import ClientError
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, self.object_key(path), tmp_path, Config=self.transfer_config)
+        except ClientError as e:
+            os.remove(tmp_path)
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, path)
+        return True
+
+    def _delete_keys(self, keys) -> int:
+        keys = list(keys)
+        for start in range(0, len(keys), 1000):
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': key} for key in keys[start:start + 1000]], 'Quiet': True}
+            )
+        return len(keys)
+
+    def _list_objects(self, prefix: str):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            yield from page.get('Contents', [])
+
+    def _list_keys(self, prefix: str):
+        for item in self._list_objects(prefix):
+            yield item['Key']
+
+    # ----- shared upload references -----
+
+    def _ref_prefix(self, url: str) -> str:
+        return f"{self.prefix}upload-refs/{url[len(UPLOADS_URL_PREFIX):]}/"
+
+    def _put_ref(self, url: str, digest: str):
+        """Point url at digest in the bucket, replacing any previous reference"""
+        prefix = self._ref_prefix(url)
+        stale = [key for key in self._list_keys(prefix) if key != prefix + digest]
+        self.client.put_object(Bucket=self.bucket, Key=prefix + digest, Body=b'')
+        self._delete_keys(stale)
+
+    def _shared_digest(self, url: str) -> Optional[str]:
+        """Blob digest of an upload saved by any host, or None"""
+        for key in self._list_keys(self._ref_prefix(url)):
+            return key.rsplit('/', 1)[-1]
+        return None
+
+    def _resolve(self, url: str) -> str:
+        """Local path for url, resolving uploads saved on other hosts through the bucket"""
+        path = super().get_file_path(url)
+        if url.startswith(UPLOADS_URL_PREFIX) and path.startswith(self.uploads_dir) and not os.path.exists(path):
+            digest = self._shared_digest(url)
+            if digest:
+                return self.blob_path(digest)
+        return path
+
+    # ----- LocalStorage interface -----
+
+    def save_upload_file(self, fileobj: BinaryIO, filename: str) -> Dict:
+        """Save an upload locally and to the bucket (blobs are content-addressed, so uploaded once)"""
+        file_info = super().save_upload_file(fileobj, filename)
+        self._put(file_info['path'], skip_existing=True)
+        self._put_ref(file_info['url'], os.path.basename(file_info['path']))
+        return file_info
+
+    def delete_upload(self, url: str) -> bool:
+        """Drop the upload's local and shared references, whichever host saved it"""
+        deleted = super().delete_upload(url)
+        return self._delete_keys(self._list_keys(self._ref_prefix(url))) > 0 or deleted
+
+    def save_output(self, file_content: bytes, filename: str, output_type: str) -> Dict:
+        file_info = super().save_output(file_content, filename, output_type)
+        self._put(file_info['path'])
+        return file_info
+
+    def save_output_file(self, source_path: str, filename: str, output_type: str) -> Dict:
+        file_info = super().save_output_file(source_path, filename, output_type)
+        self._put(file_info['path'])
+        return file_info
+
+    def prune_outputs(self, output_type: str, prefix: str, keep: str = None) -> int:
+        super().prune_outputs(output_type, prefix, keep)
+        key_prefix = self.object_key(os.path.join(self.outputs_dir, output_type, prefix))
+        keep_key = self.object_key(os.path.join(self.outputs_dir, output_type, keep)) if keep else None
+        return self._delete_keys(key for key in self._list_keys(key_prefix) if key != keep_key)
+
+    def migrate_legacy_uploads(self) -> int:
+        """
+        Also publish references this host saved before they were kept in the
+        bucket, so other hosts (and bucket GC) see them; done once per host,
+        since later uploads publish their own and deletes must not be undone
+        """
+        migrated = super().migrate_legacy_uploads()
+        with self._index_lock:
+            index = self._load_index()
+            if index.get('refs_published'):
+                return migrated
+            refs = dict(index['refs'])
+        published = set(self._list_keys(f"{self.prefix}upload-refs/"))
+        for url, digest in refs.items():
+            if self._ref_prefix(url) + digest not in published:
+                self._put(self.blob_path(digest), skip_existing=True)
+                self._put_ref(url, digest)
+        with self._index_lock:
+            self._load_index()['refs_published'] = True
+            self._write_index()
+        return migrated
+
+    def collect_garbage(self) -> Dict:
+        """
+        Local GC, then delete bucket blobs no shared reference points at
+        Blobs younger than S3_BLOB_GC_GRACE_SECONDS are kept: an upload puts
+        its blob before its reference.
+        """
+        result = super().collect_garbage()
+        live = {key.rsplit('/', 1)[-1] for key in self._list_keys(f"{self.prefix}upload-refs/")}
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.S3_BLOB_GC_GRACE_SECONDS)
+        blob_prefix = self.object_key(self.blobs_dir) + '/'
+        result['removed_objects'] = self._delete_keys(
+            item['Key'] for item in self._list_objects(blob_prefix)
+            if item['Key'].rsplit('/', 1)[-1] not in live and item['LastModified'] < cutoff
+        )
+        return result
+
+    def get_file_path(self, url: str) -> str:
+        """Local path for url, downloading it into the cache on first use"""
+        path = self._resolve(url)
+        if path != url and not os.path.exists(path):
+            self._fetch(path)
+        return path
+
+    def download_url(self, url: str) -> Optional[str]:
+        """Presigned GET URL; the bucket then serves ranges and bytes directly"""
+        if not settings.S3_PRESIGN_DOWNLOADS:
+            return None
+        path = self._resolve(url)
+        # Unknown URLs and uploads saved before deduplication only exist locally
+        if path == url or path.startswith(self.uploads_dir):
+            return None
+        params = {'Bucket': self.bucket, 'Key': self.object_key(path)}
+        if url.startswith(UPLOADS_URL_PREFIX):
+            # Blob objects carry no name or type; the URL keeps the original filename
+            from app.services.file_serving import content_disposition
+            filename = url[len(UPLOADS_URL_PREFIX):]
+            params['ResponseContentType'] = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            params['ResponseContentDisposition'] = content_disposition(filename)
+        return self.client.generate_presigned_url(
+            'get_object', Params=params, ExpiresIn=settings.S3_PRESIGN_EXPIRES
+        )
@@ -0,0 +1,17 @@
+"""
+Server-Sent Events formatting for streaming endpoints
+"""
+from typing import Any, Iterator, Optional
+
+from app.services.design_types import to_json
+
+
+def sse_event(data: Any, event: Optional[str] = None) -> str:
+    """One SSE frame with a JSON payload (unnamed events arrive as 'message')"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {to_json(data).decode('utf-8')}\n\n"
+
+
+def text_chunks(text: str) -> Iterator[str]:
+    """Split a chat message into line-sized deltas (joining them gives the text back)"""
+    yield from text.splitlines(keepends=True)
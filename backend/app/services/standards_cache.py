@@ -0,0 +1,46 @@
+"""
+Process-wide snapshot of the standards table
+Curriculum design reads every standard, but the table only changes through
+the standards endpoints, which call invalidate_standards(). MAX_AGE_SECONDS
+bounds staleness when several API processes share one database.
+"""
+from types import SimpleNamespace
+from typing import Tuple
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+MAX_AGE_SECONDS = 300
+
+_lock = threading.Lock()
+_version = 0
+_snapshot = None  # (loaded_at, version, standards)
+
+
+def get_standards(db: Session) -> Tuple[SimpleNamespace, ...]:
+    """All standards as detached, read-only rows (attribute access like the ORM model)"""
+    global _snapshot
+    from app.db_models import Standard
+
+    with _lock:
+        if _snapshot and _snapshot[1] == _version and time.monotonic() - _snapshot[0] < MAX_AGE_SECONDS:
+            return _snapshot[2]
+        version = _version
+
+    rows = db.query(*Standard.__table__.columns).order_by(Standard.created_at).all()
+    standards = tuple(SimpleNamespace(**row._asdict()) for row in rows)
+
+    with _lock:
+        # Skip caching if a create/delete landed while we were loading
+        if version == _version:
+            _snapshot = (time.monotonic(), version, standards)
+    return standards
+
+
+def invalidate_standards():
+    """Drop the snapshot; call after creating, updating or deleting a standard"""
+    global _version, _snapshot
+    with _lock:
+        _version += 1
+        _snapshot = None
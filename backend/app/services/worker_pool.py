@@ -0,0 +1,44 @@
+"""
+Shared process pool for CPU-bound work (BRD extraction, document rendering)
+Created lazily on first use and shut down with the application
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+import threading
+
+from app.config import settings
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    """Drop database connections inherited from the parent process"""
+    from app.database import engine
+    engine.dispose(close=False)
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return the process-wide worker pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = ProcessPoolExecutor(
+                    max_workers=max(1, settings.WORKER_PROCESSES),
+                    initializer=_init_worker
+                )
+                # Workers are forked on first submit; do it now so they are not
+                # forked later from a job thread while other threads hold locks
+                pool.submit(int).result()
+                _pool = pool
+    return _pool
+
+
+def shutdown_process_pool():
+    """Stop the worker pool (called on application shutdown)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
@@ -0,0 +1,59 @@
+"""
+Benchmark: BRDExtractor.extract_from_rfp over 50k clauses
+Run from backend/: python -m benchmarks.bench_brd_extractor
+"""
+import random
+import time
+from types import SimpleNamespace
+
+from app.services.brd_extractor import BRDExtractor
+
+NUM_CLAUSES = 50_000
+
+FRAGMENTS = [
+    "Training must include CPR and AED",
+    "The course must cover first aid",
+    "Participants will pass with 80%",
+    "Certification required for all workers",
+    "Comply with WSIB standards",
+    "Budget and cost limits apply",
+    "Students must demonstrate skill competency",
+    "Supervisor and management sign-off",
+    "Duration is 8 hours",
+    "Assessment of regulator requirements",
+]
+CATEGORIES = ['content', 'duration', 'assessment', 'equipment', 'other']
+PRIORITIES = ['must', 'should', 'may']
+
+
+def make_clauses(count: int, seed: int = 7):
+    """Build synthetic clause objects shaped like db_models.Clause"""
+    rng = random.Random(seed)
+    return [
+        SimpleNamespace(
+            text=" ".join(rng.sample(FRAGMENTS, 3)) + f" #{i}",
+            category=rng.choice(CATEGORIES),
+            priority=rng.choice(PRIORITIES)
+        )
+        for i in range(count)
+    ]
+
+
+def main(repeats: int = 5):
+    rfp = SimpleNamespace(title="Benchmark RFP", organization="WSIB")
+    clauses = make_clauses(NUM_CLAUSES)
+    extractor = BRDExtractor()
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        extractor.extract_from_rfp(rfp, clauses)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    print(f"BRDExtractor: {NUM_CLAUSES} clauses, best of {repeats}: "
+          f"{best * 1000:.1f} ms ({NUM_CLAUSES / best:,.0f} clauses/sec)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark: CurriculumEngine.generate from 5,000 selected clauses
+Run from backend/: python -m benchmarks.bench_curriculum_engine
+"""
+import asyncio
+import random
+import time
+
+from benchmarks.common import use_temp_workdir, make_session
+
+NUM_CLAUSES = 5000
+
+FRAGMENTS = [
+    "Training must include CPR with chest compressions",
+    "Use of an AED defibrillator is required",
+    "The course must cover first aid for bleeding",
+    "Participants should manage choking and airway obstruction",
+    "Scene safety and primary survey",
+    "Infant and child techniques",
+    "Recognise stroke and heart attack",
+    "Burn and fracture care",
+    "Certification required for all workers",
+    "Duration is 8 hours",
+]
+PRIORITIES = ['must', 'should', 'may']
+
+
+def main(repeats: int = 5):
+    use_temp_workdir()
+    from app.db_models import RFP, Clause, generate_uuid
+    from app.services.curriculum_engine import CurriculumEngine
+
+    db = make_session()
+    rfp = RFP(title="Benchmark RFP", organization="WSIB", file_url="/files/uploads/bench.pdf", file_name="bench.pdf")
+    db.add(rfp)
+    db.flush()
+    rng = random.Random(7)
+    clause_ids = [generate_uuid() for _ in range(NUM_CLAUSES)]
+    db.bulk_insert_mappings(Clause, [
+        {'id': clause_id, 'rfp_id': rfp.id, 'text': " ".join(rng.sample(FRAGMENTS, 3)),
+         'category': 'content', 'priority': rng.choice(PRIORITIES)}
+        for clause_id in clause_ids
+    ])
+    db.commit()
+
+    engine = CurriculumEngine(db)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = asyncio.run(engine.generate(rfp.id, clause_ids, []))
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    durations = ", ".join(f"{module.title.split(': ', 1)[1]} {module.duration_minutes}m" for module in result['modules'])
+    print(f"CurriculumEngine: {NUM_CLAUSES} clauses, best of {repeats}: {best * 1000:.1f} ms")
+    print(f"  {len(result['modules'])} modules, {result['total_duration_minutes']} min: {durations}")
+
+
+if __name__ == "__main__":
+    main()
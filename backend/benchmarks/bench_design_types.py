@@ -0,0 +1,62 @@
+"""
+Benchmark: memory and JSON serialisation of 1,000 designed 16-hour,
+8-module curricula as slotted dataclasses vs the nested dicts they replaced
+Run from backend/: python -m benchmarks.bench_design_types
+"""
+import json
+import time
+import tracemalloc
+
+from app.models import CurriculumModule
+from app.services.design_types import orjson, to_json, to_plain
+from app.services.instructional_designer import InstructionalDesigner
+
+COPIES = 1000
+DURATION_MINUTES = 16 * 60
+CLAUSES = ["Training must include CPR and AED", "Infant and child choking", "Burn and fracture care"]
+
+
+def measure(build):
+    """(result, bytes allocated and still held) for build()"""
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def timed(serialise):
+    start = time.perf_counter()
+    payload = serialise()
+    return payload, time.perf_counter() - start
+
+
+def main():
+    designer = InstructionalDesigner()
+    design = lambda: designer.design_curriculum_structure("Benchmark", DURATION_MINUTES, "Nurses", CLAUSES, [])
+
+    designs, slotted_bytes = measure(lambda: [design() for _ in range(COPIES)])
+    dicts, dict_bytes = measure(lambda: [to_plain(design()) for _ in range(COPIES)])
+    assert len(designs[0].modules) == 8
+
+    # Previous path: dicts -> pydantic models -> dicts -> JSON
+    def through_pydantic():
+        return json.dumps([
+            {**curriculum, 'modules': [CurriculumModule(**module).model_dump() for module in curriculum['modules']]}
+            for curriculum in dicts
+        ]).encode('utf-8')
+
+    old_payload, old_seconds = timed(through_pydantic)
+    new_payload, new_seconds = timed(lambda: to_json(designs))
+    assert json.loads(old_payload) == json.loads(new_payload)
+
+    print(f"Design types: {COPIES} x {DURATION_MINUTES // 60}-hour, 8-module curricula")
+    print(f"  memory: dicts {dict_bytes / 1e6:.1f} MB, slotted dataclasses {slotted_bytes / 1e6:.1f} MB "
+          f"({1 - slotted_bytes / dict_bytes:.0%} less)")
+    print(f"  JSON: dict -> pydantic -> json {old_seconds * 1000:.0f} ms, "
+          f"to_json ({'orjson' if orjson else 'json'}) {new_seconds * 1000:.0f} ms "
+          f"({len(new_payload) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
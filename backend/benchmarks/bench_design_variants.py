@@ -0,0 +1,64 @@
+"""
+Benchmark: InstructionalDesigner.design_variants over duration x audience
+grids of 50 and 200 variants (the endpoint's limit) from 5,000 clauses
+Run from backend/: python -m benchmarks.bench_design_variants
+"""
+import random
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.services.design_cache import DesignCache, source_fingerprint
+from app.services.instructional_designer import InstructionalDesigner, compare_variants
+
+NUM_CLAUSES = 5000
+DURATIONS = [120, 240, 360, 480, 600, 720, 840, 960, 1200, 1440]
+AUDIENCES = ["Healthcare workers", "General public", "First responders", "Workplace safety teams", "Teachers"]
+
+FRAGMENTS = [
+    "Training must include CPR with chest compressions",
+    "Use of an AED defibrillator is required",
+    "The course must cover first aid for bleeding",
+    "Participants should manage choking and airway obstruction",
+    "Scene safety and primary survey",
+    "Infant and child techniques",
+    "Recognise stroke and heart attack",
+    "Burn and fracture care",
+]
+
+
+def timed(designer, variants, clauses):
+    start = time.perf_counter()
+    sources = source_fingerprint("benchmark-rfp", f"{len(clauses)}:2024-01-01 00:00:00")
+    designs = designer.design_variants("Benchmark RFP", variants, clauses, [], sources=sources)
+    return designs, time.perf_counter() - start
+
+
+def main():
+    rng = random.Random(7)
+    updated = datetime(2024, 1, 1)
+    clauses = [
+        SimpleNamespace(id=f"clause-{i}", text=" ".join(rng.sample(FRAGMENTS, 3)), updated_at=updated)
+        for i in range(NUM_CLAUSES)
+    ]
+    variants = [(duration, audience) for duration in DURATIONS for audience in AUDIENCES]
+    timed(InstructionalDesigner(cache=None), variants[:1], clauses)  # Warm up
+    designer = InstructionalDesigner(cache=DesignCache(256))
+    designs, first = timed(designer, variants, clauses)
+    _, cached = timed(designer, variants, clauses)
+
+    # 200 variants: every 5-minute step from 2 to 5 h per audience
+    large = [(duration, audience) for duration in range(120, 320, 5) for audience in AUDIENCES]
+    _, large_elapsed = timed(InstructionalDesigner(cache=DesignCache(256)), large, clauses)
+
+    rows = compare_variants(variants, designs)
+    print(f"Design variants from {NUM_CLAUSES} clauses")
+    print(f"  {len(variants)} variants {first * 1000:.1f} ms, repeat (cached) {cached * 1000:.1f} ms, "
+          f"{len(large)} variants {large_elapsed * 1000:.1f} ms")
+    for row in rows[:3]:
+        print(f"  {row['duration_minutes']} min / {row['audience']}: {row['modules']} modules x "
+              f"{row['minutes_per_module']} min, {row['practice_minutes']} min practice")
+
+
+if __name__ == "__main__":
+    main()
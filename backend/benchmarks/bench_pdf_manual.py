@@ -0,0 +1,37 @@
+"""
+Benchmark: streaming student manual for a 40-module, ~500-page curriculum
+Run from backend/: python -m benchmarks.bench_pdf_manual
+"""
+import asyncio
+import time
+import tracemalloc
+
+from benchmarks.common import use_temp_workdir, make_session, make_curriculum
+
+NUM_MODULES = 40
+
+
+def main():
+    use_temp_workdir()
+    from PyPDF2 import PdfReader
+    from app.services.generators.pdf_generator import PdfGenerator
+    from app.services.local_storage import storage
+
+    db = make_session()
+    curriculum_id = make_curriculum(db, num_modules=NUM_MODULES, topics_per_module=6, paragraphs_per_topic=10)
+    db.expunge_all()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    url = asyncio.run(PdfGenerator(db).generate_student_manual(curriculum_id))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    pages = len(PdfReader(storage.get_file_path(url)).pages)
+    print(f"Student manual: {NUM_MODULES} modules, {pages} pages in {elapsed:.2f} s "
+          f"({pages / elapsed:.0f} pages/sec), peak traced memory {peak / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
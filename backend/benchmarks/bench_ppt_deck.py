@@ -0,0 +1,46 @@
+"""
+Benchmark: PowerPoint deck for a 60-module curriculum (~300 slides),
+rendered serially and fanned out to the worker pool (forced on regardless
+of PPT_PARALLEL_MIN_MODULES, to help choose that threshold)
+Run from backend/: python -m benchmarks.bench_ppt_deck
+"""
+import asyncio
+import time
+
+from benchmarks.common import use_temp_workdir, make_session, make_curriculum
+
+NUM_MODULES = 60
+
+
+def main():
+    use_temp_workdir()
+    from pptx import Presentation
+    from app.config import settings
+    from app.services.generators.ppt_generator import PptGenerator
+    from app.services.local_storage import storage
+    from app.services.worker_pool import get_process_pool, shutdown_process_pool
+
+    db = make_session()
+    curriculum_id = make_curriculum(db, num_modules=NUM_MODULES, topics_per_module=4)
+    db.expunge_all()
+
+    pool = get_process_pool()
+    settings.PPT_PARALLEL_MIN_MODULES = 1
+    try:
+        for label, executor in (('serial', None), ('parallel', pool)):
+            # Vary the customizations so the second run is not a cache hit
+            customizations = {'theme': 'engaging', 'color_scheme': 'green',
+                              'include_instructor_notes': True, 'mode': label}
+            start = time.perf_counter()
+            url = asyncio.run(PptGenerator(db, executor=executor).generate(curriculum_id, customizations))
+            elapsed = time.perf_counter() - start
+
+            slides = len(Presentation(storage.get_file_path(url)).slides)
+            print(f"Deck ({label}): {NUM_MODULES} modules, {slides} slides in {elapsed:.2f} s "
+                  f"({slides / elapsed:.0f} slides/sec)")
+    finally:
+        shutdown_process_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark: 500 parallel 25-question test forms for a 12-module curriculum
+drawn from a 5,000-question bank
+Run from backend/: python -m benchmarks.bench_test_forms
+"""
+import time
+
+from benchmarks.common import use_temp_workdir, make_session, make_curriculum
+
+NUM_MODULES = 12
+BANK_SIZE = 5000
+FORMS = 500
+QUESTIONS = 25
+
+
+def main():
+    use_temp_workdir()
+    from app.services.generators.test_generator import (
+        TestGenerator, TOPIC_KEYWORDS, DIFFICULTIES, add_questions, ensure_question_bank
+    )
+
+    db = make_session()
+    curriculum_id = make_curriculum(db, num_modules=NUM_MODULES)
+    ensure_question_bank(db)
+    topics = [topic for topic, _ in TOPIC_KEYWORDS]
+    add_questions(db, (
+        {
+            'question': f"Synthetic question {n}",
+            'type': 'multiple_choice',
+            'options': ['A', 'B', 'C', 'D'],
+            'correct_answer': 'A',
+            'learning_objective': f"Synthetic objective {n % 50}",
+            'topic': topics[n % len(topics)],
+            'difficulty': DIFFICULTIES[n % len(DIFFICULTIES)],
+        }
+        for n in range(BANK_SIZE)
+    ))
+    db.commit()
+
+    start = time.perf_counter()
+    forms = TestGenerator(db).generate_forms(curriculum_id, count=QUESTIONS, forms=FORMS)
+    elapsed = time.perf_counter() - start
+
+    unique = len({frozenset(q.question for q in form) for form in forms})
+    print(f"Test forms: {len(forms)} x {QUESTIONS} questions ({unique} unique question sets) "
+          f"in {elapsed:.2f} s ({len(forms) / elapsed:.0f} forms/sec)")
+
+
+if __name__ == "__main__":
+    main()
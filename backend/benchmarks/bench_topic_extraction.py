@@ -0,0 +1,49 @@
+"""
+Benchmark: InstructionalDesigner topic extraction over 100k clauses
+Run from backend/: python -m benchmarks.bench_topic_extraction
+"""
+import random
+import time
+from types import SimpleNamespace
+
+from app.services.instructional_designer import InstructionalDesigner, count_topics
+
+NUM_CLAUSES = 100_000
+
+FRAGMENTS = [
+    "Training must include CPR with chest compressions",
+    "Use of an AED defibrillator is required",
+    "The course must cover first aid for bleeding",
+    "Participants should manage choking and airway obstruction",
+    "Scene safety and primary survey",
+    "Infant and child techniques",
+    "Recognise stroke and heart attack",
+    "Burn and fracture care",
+    "Certification required for all workers",
+    "Delivery in English and French at client sites",
+]
+
+
+def main(repeats: int = 5):
+    rng = random.Random(7)
+    clauses = [
+        SimpleNamespace(text=" ".join(rng.sample(FRAGMENTS, 3)) + f" (section {i})")
+        for i in range(NUM_CLAUSES)
+    ]
+    designer = InstructionalDesigner()
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        topics = designer._extract_topics_from_clauses(clauses)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    counts = count_topics(clauses)
+    print(f"Topic extraction: {NUM_CLAUSES} clauses, best of {repeats}: "
+          f"{best * 1000:.1f} ms ({NUM_CLAUSES / best:,.0f} clauses/sec)")
+    print("  " + ", ".join(f"{topic} {counts[topic]}" for topic in topics))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Shared helpers for benchmarks
+Benchmarks run against an in-memory SQLite database and a temporary
+working directory so they never touch MySQL or the real local_storage.
+"""
+import os
+import tempfile
+
+
+def use_temp_workdir() -> str:
+    """chdir into a fresh temp dir (call before importing app.services)"""
+    workdir = tempfile.mkdtemp(prefix="wsib-bench-")
+    os.chdir(workdir)
+    return workdir
+
+
+def make_session():
+    """Return a Session bound to a fresh in-memory SQLite database"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from app.db_models import Base
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def make_curriculum(db, num_modules: int = 8, topics_per_module: int = 4, paragraphs_per_topic: int = 1) -> str:
+    """Insert a curriculum with modules shaped like InstructionalDesigner output"""
+    from app.db_models import Curriculum, CurriculumModule
+
+    curriculum = Curriculum(
+        title="Benchmark CPR Curriculum",
+        description="Synthetic curriculum for benchmarking",
+        status='completed',
+        total_duration_minutes=num_modules * 60
+    )
+    db.add(curriculum)
+    db.flush()
+
+    paragraph = ("Rescuers should check the scene for safety, confirm unresponsiveness and call for help "
+                 "before starting chest compressions at a rate of 100 to 120 per minute. ") * 6
+    for n in range(1, num_modules + 1):
+        db.add(CurriculumModule(
+            curriculum_id=curriculum.id,
+            title=f"Module {n}: Topic {n}",
+            description=f"Comprehensive training on topic {n}",
+            learning_objectives=[f"Students will demonstrate skill {n}.{i}" for i in range(3)],
+            duration_minutes=60,
+            sequence_order=n,
+            topics=[
+                {'title': f"Topic {n} - Part {t + 1}",
+                 'content': "\n".join([paragraph] * paragraphs_per_topic),
+                 'duration_minutes': 15}
+                for t in range(topics_per_module)
+            ],
+            activities=[
+                {'type': 'Hands-on Practice', 'title': f"Skills Practice {n}",
+                 'description': "Students practice in small groups with instructor feedback",
+                 'duration_minutes': 20, 'materials_needed': ['Training manikins', 'Gloves']}
+            ],
+            assessment={'type': 'Skills Check', 'title': f"Competency Verification {n}", 'passing_score': 80}
+        ))
+    db.commit()
+    return curriculum.id
@@ -0,0 +1,12 @@
+"""
+Shared test setup
+Like the benchmarks, tests run from a temporary working directory so that
+importing app.services never touches the real local_storage. Run from
+backend/: python -m pytest -q tests
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(tempfile.mkdtemp(prefix="wsib-tests-"))
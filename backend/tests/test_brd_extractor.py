@@ -0,0 +1,179 @@
+"""
+The single-pass _ClauseAccumulator must build the same BRD as the original
+multi-pass extractor, which is kept below as the reference implementation
+"""
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.brd_extractor import BRDExtractor, extract_brd_from_rows
+from app.services.design_types import to_plain
+
+RFP = SimpleNamespace(title="Standard First Aid RFP", organization="Ontario Works")
+
+TEXTS = [
+    "Training must include CPR and AED practice",
+    "Course must cover certification requirements for all staff",
+    "Participants will demonstrate bandaging under supervisor review",
+    "The provider shall comply with WSIB compliance rules",
+    "Trainers need skill assessment every year",
+    "Workplace safety shall be reviewed by management",
+    "Students must pass the final written exam",
+    "80% of employees must attend the refresher",
+    "Each assessment is graded by an accredited body",
+    "Budget is fixed and cost overruns are not accepted",
+    "Resource planning falls to the regulator",
+    "Sessions run for 8 hours across two days",
+    "Workers shall be able to recognise shock",
+    "A" * 140 + " long clause about equipment",
+    "Required to provide manuals in French",
+]
+
+CATEGORIES = ['content', 'duration', 'assessment', 'equipment', 'other']
+PRIORITIES = ['must', 'should', 'may']
+
+
+def _reference_extract(extractor, rfp, clauses):
+    """The pre-accumulator extract_from_rfp: one loop plus a pass per summary"""
+    functional_reqs = []
+    non_functional_reqs = []
+    business_objectives = []
+    constraints = []
+    success_criteria = []
+
+    for clause in clauses:
+        text = clause.text if hasattr(clause, 'text') else str(clause)
+        category = clause.category if hasattr(clause, 'category') else 'other'
+        priority = clause.priority if hasattr(clause, 'priority') else 'may'
+
+        if priority == 'must':
+            if any(k in text.lower() for k in [
+                    'must include', 'shall provide', 'will include', 'training must',
+                    'course must', 'shall demonstrate', 'must cover', 'required to',
+                    'participants will', 'students must', 'shall be able to']):
+                functional_reqs.append(text)
+            else:
+                non_functional_reqs.append(text)
+
+        if category == 'content' and priority in ['must', 'should']:
+            if 'certification' in text.lower():
+                objective = "Provide industry-recognized certification to participants"
+            elif 'comply' in text.lower() or 'compliance' in text.lower():
+                objective = "Ensure regulatory compliance with training standards"
+            elif 'skill' in text.lower() or 'competenc' in text.lower():
+                objective = "Develop practical skills and competencies in participants"
+            elif 'safety' in text.lower():
+                objective = "Improve workplace safety through proper training"
+            else:
+                objective = text[:100] + "..." if len(text) > 100 else text
+            if objective and objective not in business_objectives:
+                business_objectives.append(objective)
+
+        if category in ['assessment', 'duration']:
+            if 'pass' in text.lower():
+                criteria = text
+            elif '%' in text or 'percent' in text.lower():
+                criteria = text
+            elif 'assess' in text.lower():
+                criteria = f"Successful completion of: {text[:80]}"
+            else:
+                criteria = None
+            if criteria and criteria not in success_criteria:
+                success_criteria.append(criteria)
+
+        if 'budget' in text.lower() or 'cost' in text.lower() or 'resource' in text.lower():
+            constraints.append(text)
+
+    if not business_objectives:
+        business_objectives = extractor._generate_default_objectives(rfp)
+    if not success_criteria:
+        success_criteria = extractor._generate_default_success_criteria()
+
+    stakeholders = {rfp.organization, "Training Participants", "Instructors/Trainers",
+                    "Program Administrators"}
+    for clause in clauses:
+        text = clause.text.lower() if hasattr(clause, 'text') else str(clause).lower()
+        for keyword, stakeholder in {
+                'management': 'Management Team', 'supervisor': 'Supervisors',
+                'employee': 'Employees', 'worker': 'Workers',
+                'regulator': 'Regulatory Bodies', 'accredit': 'Accreditation Bodies'}.items():
+            if keyword in text:
+                stakeholders.add(stakeholder)
+
+    def count(category):
+        return sum(1 for c in clauses if hasattr(c, 'category') and c.category == category)
+
+    counts = SimpleNamespace(
+        num_clauses=len(clauses),
+        must_clauses=sum(1 for c in clauses if hasattr(c, 'priority') and c.priority == 'must'),
+        content_clauses=count('content'),
+        duration_clauses=count('duration'),
+        assessment_clauses=count('assessment'),
+    )
+
+    return {
+        'rfp_title': rfp.title,
+        'executive_summary': extractor._create_executive_summary(rfp, counts),
+        'business_objectives': business_objectives[:10],
+        'functional_requirements': functional_reqs[:20],
+        'non_functional_requirements': non_functional_reqs[:15],
+        'scope': extractor._define_scope(rfp, counts),
+        'stakeholders': sorted(list(stakeholders))[:8],
+        'success_criteria': success_criteria[:10],
+        'constraints': constraints[:10] if constraints else extractor._default_constraints(),
+        'assumptions': extractor._identify_assumptions(rfp),
+    }
+
+
+def _mixed_clauses(seed, count):
+    """Random clauses over a small text pool, so categories overflow their caps
+    and objectives/criteria repeat; a few plain strings stand in for bare clauses"""
+    rng = random.Random(seed)
+    clauses = []
+    for i in range(count):
+        text = f"{rng.choice(TEXTS)} (item {i % 7})"
+        if rng.random() < 0.05:
+            clauses.append(text)
+        else:
+            clauses.append(SimpleNamespace(
+                text=text, category=rng.choice(CATEGORIES), priority=rng.choice(PRIORITIES)))
+    return clauses
+
+
+@pytest.mark.parametrize('seed,count', [(0, 0), (1, 5), (2, 40), (3, 200), (4, 1000)])
+def test_single_pass_matches_multi_pass(seed, count):
+    extractor = BRDExtractor()
+    clauses = _mixed_clauses(seed, count)
+
+    expected = _reference_extract(extractor, RFP, clauses)
+    result = to_plain(extractor.extract_from_rfp(RFP, iter(clauses)))
+
+    assert result == expected
+
+
+def test_over_cap_lists_are_truncated_like_the_reference():
+    extractor = BRDExtractor()
+    clauses = [SimpleNamespace(text=f"Training must include drill {i} within budget",
+                               category='content', priority='must') for i in range(30)]
+    clauses += [SimpleNamespace(text=f"Supervisor sign-off {i} is required",
+                                category='assessment', priority='must') for i in range(30)]
+
+    result = to_plain(extractor.extract_from_rfp(RFP, clauses))
+
+    assert result == _reference_extract(extractor, RFP, clauses)
+    assert len(result['functional_requirements']) == 20
+    assert len(result['non_functional_requirements']) == 15
+    assert len(result['business_objectives']) == 10
+    assert len(result['constraints']) == 10
+    assert 'Supervisors' in result['stakeholders']
+
+
+def test_pool_entry_point_matches_direct_extraction():
+    clauses = [c for c in _mixed_clauses(5, 120) if not isinstance(c, str)]
+    rows = [(c.text, c.category, c.priority) for c in clauses]
+
+    direct = BRDExtractor().extract_from_rfp(RFP, clauses)
+    pooled = extract_brd_from_rows(vars(RFP), rows)
+
+    assert pooled == direct
@@ -0,0 +1,96 @@
+"""
+Module lengths must always add up to the requested course length, with no
+module left empty, however the topics and the duration compare
+"""
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.curriculum_engine import CurriculumEngine, allocate_minutes, MIN_MODULE_MINUTES
+
+# One clause per topic, heaviest first: CPR (must) ... Injury Management (may)
+CLAUSES = [
+    SimpleNamespace(text="Chest compression and CPR practice", priority='must'),
+    SimpleNamespace(text="Use of the AED defibrillator", priority='must'),
+    SimpleNamespace(text="Control bleeding and bandage a wound", priority='must'),
+    SimpleNamespace(text="Relieve choking", priority='should'),
+    SimpleNamespace(text="Scene safety and primary survey", priority='should'),
+    SimpleNamespace(text="Infant and child care", priority='should'),
+    SimpleNamespace(text="Recognise a stroke or seizure", priority='may'),
+    SimpleNamespace(text="Splint a fracture", priority='may'),
+]
+
+engine = CurriculumEngine()
+
+
+def _minutes(modules):
+    return [module.duration_minutes for module in modules]
+
+
+@pytest.mark.parametrize('total', [1, 3, 7, 12, 29, 30, 59, 61, 95, 240, 482, 1000])
+@pytest.mark.parametrize('count', [1, 2, 3, 5, 8])
+def test_allocation_sums_to_total_with_no_empty_module(total, count):
+    if count > total:
+        pytest.skip("more modules than minutes")
+    weights = random.Random(total * 10 + count).choices([1, 2, 3, 9], k=count)
+
+    minutes = allocate_minutes(weights, total)
+
+    assert len(minutes) == count
+    assert sum(minutes) == total
+    assert min(minutes) >= 1
+
+
+def test_allocation_with_more_modules_than_minutes_is_rejected():
+    with pytest.raises(ValueError):
+        allocate_minutes([3, 3, 3, 3, 3], 3)
+
+
+def test_allocation_follows_weight_above_the_minimum():
+    minutes = allocate_minutes([3, 1], 240)
+
+    assert minutes[0] > minutes[1] >= MIN_MODULE_MINUTES
+    assert all(m % 5 == 0 for m in minutes)
+
+
+@pytest.mark.parametrize('duration', [1, 3, 7, 29])
+def test_duration_shorter_than_topic_count_gives_one_module(duration):
+    modules = engine.build_modules(CLAUSES, [], duration, "General")
+
+    assert _minutes(modules) == [duration]
+    assert modules[0].title.endswith("CPR")
+
+
+def test_more_topics_than_slots_keeps_the_heaviest_in_teaching_order():
+    # 120 minutes: the designer plans 3 modules for 8 matched topics
+    modules = engine.build_modules(CLAUSES, [], 120, "General")
+
+    assert [m.title.split(": ", 1)[-1] for m in modules] == ['CPR', 'AED', 'First Aid']
+    assert sum(_minutes(modules)) == 120
+
+
+def test_single_topic_gets_the_whole_course():
+    modules = engine.build_modules(CLAUSES[:1], [], 480, "General")
+
+    assert len(modules) == 1
+    assert _minutes(modules) == [480]
+
+
+def test_no_matching_topics_falls_back_to_default_topics():
+    clauses = [SimpleNamespace(text="Provide a certificate", priority='must')]
+
+    modules = engine.build_modules(clauses, [], 95, "General")
+
+    assert sum(_minutes(modules)) == 95
+    assert min(_minutes(modules)) >= 1
+
+
+@pytest.mark.parametrize('duration', [1, 2, 5, 30, 59, 60, 61, 89, 90, 91, 179, 241, 482, 600, 1000])
+@pytest.mark.parametrize('topics', [0, 1, 2, 4, 8])
+def test_build_modules_always_fills_the_course(duration, topics):
+    modules = engine.build_modules(CLAUSES[:topics], [], duration, "General")
+
+    assert sum(_minutes(modules)) == duration
+    assert min(_minutes(modules)) >= 1
+    assert [m.sequence_order for m in modules] == list(range(1, len(modules) + 1))
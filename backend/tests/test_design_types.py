@@ -0,0 +1,66 @@
+"""
+to_json() must write the same bytes whether or not the optional orjson
+package is installed (SSE events and API responses go through it)
+"""
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import json
+import uuid
+
+import pytest
+
+from app.services import design_types
+from app.services.design_types import (
+    DesignedActivity, DesignedModule, DesignedTopic, DesignJSONResponse, to_json, to_plain
+)
+
+PAYLOAD = {
+    'module': DesignedModule(
+        title="Module 1: CPR – Grundlagen",
+        description="Chest compressions",
+        learning_objectives=["Demonstrate compressions"],
+        duration_minutes=60,
+        sequence_order=1,
+        topics=[DesignedTopic(title="CPR", content="Rate 100-120", duration_minutes=15)],
+        activities=[DesignedActivity(type="Practice", title="Drill", description="Pairs", duration_minutes=20)],
+    ),
+    'created_at': datetime(2026, 1, 2, 3, 4, 5),
+    'updated_at': datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc),
+    'due': date(2026, 2, 1),
+    'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'score': Decimal('80.5'),
+    'by_duration': {480: 'full day'},
+    'nested': [[1, 2.5, None, True]],
+}
+
+
+def test_stdlib_fallback_writes_iso_datetimes(monkeypatch):
+    monkeypatch.setattr(design_types, 'orjson', None)
+    data = json.loads(to_json(PAYLOAD))
+    assert data['created_at'] == '2026-01-02T03:04:05'
+    assert data['updated_at'] == '2026-01-02T03:04:05.123456+00:00'
+    assert data['due'] == '2026-02-01'
+    assert data['module'] == to_plain(PAYLOAD['module'])
+
+
+def test_orjson_and_stdlib_fallback_match(monkeypatch):
+    pytest.importorskip('orjson')
+    fast = to_json(PAYLOAD)
+    monkeypatch.setattr(design_types, 'orjson', None)
+    assert to_json(PAYLOAD) == fast
+
+
+def test_design_json_response_renders_with_to_json():
+    response = DesignJSONResponse(PAYLOAD)
+    assert response.body == to_json(PAYLOAD)
+    assert response.media_type == 'application/json'
+
+
+def test_generate_route_documents_its_response_model():
+    from fastapi import FastAPI
+    from app.routers import curriculum
+
+    app = FastAPI()
+    app.include_router(curriculum.router, prefix="/api/curriculum")
+    ok = app.openapi()['paths']['/api/curriculum/generate']['post']['responses']['200']
+    assert ok['content']['application/json']['schema'] == {'$ref': '#/components/schemas/GenerateCurriculumResponse'}
@@ -0,0 +1,58 @@
+"""
+Uploads are stored in extension-less content-addressed blobs; serving them
+must still report the uploaded file's type and name
+"""
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import mysql_api
+from app.services.local_storage import storage
+
+PDF = b"%PDF-1.4\n" + b"0" * 4096 + b"\n%%EOF\n"
+
+app = FastAPI()
+app.include_router(mysql_api.router, prefix="/api")
+client = TestClient(app)
+
+
+def test_served_upload_keeps_content_type_and_name():
+    info = storage.save_upload(PDF, "1700000000000-Course RFP.pdf")
+    assert '.' not in info['path'].rsplit('/', 1)[-1]
+
+    response = client.get(f"/api{info['url']}")
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/pdf'
+    assert response.headers['content-disposition'] == "inline; filename*=utf-8''1700000000000-Course%20RFP.pdf"
+    assert response.content == PDF
+
+
+def test_served_upload_range_keeps_content_type():
+    info = storage.save_upload(b"a,b\n" * 512, "1700000000001-roster.csv")
+
+    response = client.get(f"/api{info['url']}", headers={'Range': 'bytes=0-9'})
+    assert response.status_code == 206
+    assert response.headers['content-type'].startswith('text/csv')
+    assert response.headers['content-disposition'] == 'inline; filename="1700000000001-roster.csv"'
+    assert response.content == (b"a,b\n" * 512)[:10]
+
+
+def test_identical_uploads_share_a_blob():
+    first = storage.save_upload(PDF, "1700000000002-a.pdf")
+    second = storage.save_upload(PDF, "1700000000003-b.pdf")
+    assert first['path'] == second['path']
+
+    assert client.get(f"/api{second['url']}").headers['content-type'] == 'application/pdf'
+
+
+def test_served_upload_writes_no_sidecars_into_blobs():
+    info = storage.save_upload(b"name,score\n" * 512, "1700000000004-scores.csv")
+
+    response = client.get(f"/api{info['url']}", headers={'Accept-Encoding': 'br, gzip'})
+    assert response.status_code == 200
+    assert 'content-encoding' not in response.headers
+    assert response.content == b"name,score\n" * 512
+
+    blob_dir = info['path'].rsplit('/', 1)[0]
+    assert os.listdir(blob_dir) == [info['path'].rsplit('/', 1)[-1]]
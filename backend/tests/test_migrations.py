@@ -0,0 +1,82 @@
+"""
+apply_migrations() must upgrade a database created before the newer columns
+existed, and be a no-op when run again on the next start
+"""
+from sqlalchemy import create_engine, inspect, text
+
+from app.db_models import Base
+from app.migrations import apply_migrations
+
+
+def _legacy_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE outputs (id VARCHAR(36) PRIMARY KEY, curriculum_id VARCHAR(36), "
+            "type VARCHAR(50) NOT NULL, title VARCHAR(255) NOT NULL, "
+            "status VARCHAR(50) DEFAULT 'pending', file_url TEXT, error_message TEXT)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE curricula (id VARCHAR(36) PRIMARY KEY, rfp_id VARCHAR(36), "
+            "title VARCHAR(255) NOT NULL, status VARCHAR(50) DEFAULT 'draft')"
+        ))
+        for i, status in enumerate(['ready', 'generating', 'error', 'pending', 'completed']):
+            conn.execute(text(
+                "INSERT INTO outputs (id, type, title, status) VALUES (:id, 'ppt', 'Deck', :status)"
+            ), {'id': str(i), 'status': status})
+    return engine
+
+
+def _columns(engine, table='outputs'):
+    return [c['name'] for c in inspect(engine).get_columns(table)]
+
+
+def _unique_indexes(engine, table):
+    return [index['column_names'] for index in inspect(engine).get_indexes(table) if index['unique']]
+
+
+def _statuses(engine):
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(text("SELECT status FROM outputs ORDER BY id"))]
+
+
+def test_adds_output_timing_columns_and_renames_statuses(tmp_path):
+    engine = _legacy_engine(tmp_path)
+
+    apply_migrations(engine)
+
+    assert {'started_at', 'completed_at', 'duration_ms'} <= set(_columns(engine))
+    assert _statuses(engine) == ['completed', 'running', 'failed', 'pending', 'completed']
+
+
+def test_adds_unique_curriculum_client_key(tmp_path):
+    engine = _legacy_engine(tmp_path)
+
+    apply_migrations(engine)
+
+    assert 'client_key' in _columns(engine, 'curricula')
+    assert _unique_indexes(engine, 'curricula') == [['client_key']]
+
+
+def test_running_again_is_a_no_op(tmp_path):
+    engine = _legacy_engine(tmp_path)
+    apply_migrations(engine)
+    before = _columns(engine)
+
+    apply_migrations(engine)
+
+    assert _columns(engine) == before
+    assert _unique_indexes(engine, 'curricula') == [['client_key']]
+    assert _statuses(engine) == ['completed', 'running', 'failed', 'pending', 'completed']
+
+
+def test_current_schema_needs_no_changes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'current.db'}")
+    Base.metadata.create_all(engine)
+    indexes = inspect(engine).get_indexes('curricula')
+    constraints = inspect(engine).get_unique_constraints('curricula')
+
+    apply_migrations(engine)
+
+    assert inspect(engine).get_indexes('curricula') == indexes
+    assert inspect(engine).get_unique_constraints('curricula') == constraints
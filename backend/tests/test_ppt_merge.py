@@ -0,0 +1,78 @@
+"""
+Parallel deck rendering merges partial decks through python-pptx internals
+(see ppt_generator._append_deck); the merged deck must match the serial one
+"""
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from types import SimpleNamespace
+
+from pptx import Presentation
+
+from app.config import settings
+from app.services.generators.ppt_generator import PptGenerator
+
+CUSTOMIZATIONS = {'theme': 'engaging', 'color_scheme': 'green', 'include_instructor_notes': True}
+
+
+def make_modules(count):
+    return [
+        SimpleNamespace(
+            id=f"m{n}",
+            title=f"Module {n}",
+            description=f"Module {n} description",
+            learning_objectives=[f"Objective {n}.{i}" for i in range(8)],
+            duration_minutes=60,
+            sequence_order=n,
+            topics=[{'title': f"Topic {n}.{t}", 'content': f"Notes for topic {n}.{t}", 'duration_minutes': 15}
+                    for t in range(3)],
+            activities=[{'type': 'Practice', 'title': f"Activity {n}", 'description': "Pairs",
+                         'duration_minutes': 20, 'materials_needed': ['Manikins']}],
+            assessment={'type': 'Quiz', 'title': f"Check {n}", 'passing_score': 80},
+        )
+        for n in range(1, count + 1)
+    ]
+
+
+def render(executor, monkeypatch):
+    monkeypatch.setattr(settings, 'PPT_PARALLEL_MIN_MODULES', 1)
+    monkeypatch.setattr(settings, 'WORKER_PROCESSES', 3)
+    curriculum = SimpleNamespace(title="CPR", description="Course", status='completed', total_duration_minutes=420)
+    prs = PptGenerator(executor=executor).build_presentation(curriculum, make_modules(7), CUSTOMIZATIONS)
+    buffer = BytesIO()
+    prs.save(buffer)
+    return Presentation(BytesIO(buffer.getvalue()))
+
+
+def describe(prs):
+    slides = []
+    for slide in prs.slides:
+        notes = slide.notes_slide if slide.has_notes_slide else None
+        slides.append({
+            'partname': str(slide.part.partname),
+            'layout': slide.slide_layout.name,
+            'title': slide.shapes.title.text,
+            'text': [shape.text_frame.text for shape in slide.placeholders if shape.has_text_frame],
+            'notes_partname': str(notes.part.partname) if notes else None,
+            'notes': notes.notes_text_frame.text if notes else None,
+        })
+    return slides
+
+
+def test_merged_deck_matches_serial_render(monkeypatch):
+    serial = render(None, monkeypatch)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        merged = render(executor, monkeypatch)
+
+    assert len(merged.slides) == len(serial.slides)
+    assert describe(merged) == describe(serial)
+
+
+def test_merged_deck_part_names_are_sequential(monkeypatch):
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        merged = render(executor, monkeypatch)
+
+    partnames = [str(slide.part.partname) for slide in merged.slides]
+    assert partnames == [f"/ppt/slides/slide{n}.xml" for n in range(1, len(partnames) + 1)]
+    notes = [str(slide.notes_slide.part.partname) for slide in merged.slides if slide.has_notes_slide]
+    assert len(set(notes)) == len(notes)
+    assert notes
@@ -1,8 +1,6 @@
 import { useState, useRef, useEffect } from 'react'
 import { Send, Bot, User, Loader } from 'lucide-react'
-import axios from 'axios'
-
-const API_URL = (import.meta as any).env?.VITE_BACKEND_API_URL || 'http://localhost:8000'
+import { streamChat } from '@/services/api'
 
 interface Message {
   role: 'assistant' | 'user'
@@ -34,7 +32,7 @@ export default function CurriculumChat({
   ])
   const [input, setInput] = useState('')
   const [sending, setSending] = useState(false)
-  const [context, setContext] = useState<any>({})
+  const [conversationId, setConversationId] = useState<string | null>(null)
   const [suggestions, setSuggestions] = useState<string[]>([
     "Create a basic CPR course for healthcare workers",
     "I need to create 3 different courses from this RFP",
@@ -65,47 +63,54 @@ export default function CurriculumChat({
     setSending(true)
 
     try {
-      // Call backend chat API
-      const response = await axios.post(`${API_URL}/api/curriculum/chat`, {
+      // Stream the reply: text appears as it is written and modules as they are designed
+      // The conversation state is kept server-side; send only the new message
+      let reply = ''
+      const modules: any[] = []
+      setMessages(prev => [...prev, { role: 'assistant', content: '', timestamp: new Date() }])
+
+      await streamChat('/api/curriculum/chat/stream', {
         rfp_id: rfpId,
-        message: textToSend,
-        conversation_history: messages,
-        current_context: context
-      })
+        conversation_id: conversationId,
+        message: textToSend
+      }, (event, data) => {
+        if (event === 'message') {
+          reply += data.delta
+          const content = reply
+          setMessages(prev => [...prev.slice(0, -1), { ...prev[prev.length - 1], content }])
+        } else if (event === 'module') {
+          modules.push(data)
+        } else if (event === 'error') {
+          throw new Error(data.detail)
+        } else if (event === 'done') {
+          console.log('[Chat] Response:', data)
 
-      const assistantMessage: Message = {
-        role: 'assistant',
-        content: response.data.message,
-        timestamp: new Date()
-      }
+          // Keep the conversation id FIRST (preserve conversation state)
+          if (data.conversation_id) {
+            setConversationId(data.conversation_id)
+          }
 
-      setMessages(prev => [...prev, assistantMessage])
-      
-      console.log('[Chat] Response:', response.data)
-      
-      // Update context FIRST (preserve conversation state)
-      if (response.data.current_context) {
-        console.log('[Chat] Updating context:', response.data.current_context)
-        setContext(response.data.current_context)
-      }
-      
-      // Update selected clauses
-      if (response.data.selected_clauses && response.data.selected_clauses.length > 0) {
-        console.log('[Chat] Selected clauses:', response.data.selected_clauses.length)
-        onClausesSelected?.(response.data.selected_clauses)
-      }
-      
-      // Update curriculum preview
-      if (response.data.curriculum_preview) {
-        console.log('[Chat] Curriculum preview available')
-        onCurriculumGenerated?.(response.data.curriculum_preview)
-      }
-      
-      // Update suggestions
-      if (response.data.suggestions && response.data.suggestions.length > 0) {
-        console.log('[Chat] New suggestions:', response.data.suggestions)
-        setSuggestions(response.data.suggestions)
-      }
+          // Update selected clauses
+          if (data.selected_clauses && data.selected_clauses.length > 0) {
+            console.log('[Chat] Selected clauses:', data.selected_clauses.length)
+            onClausesSelected?.(data.selected_clauses)
+          }
+
+          // Update curriculum preview (modules arrived as separate events)
+          if (data.curriculum_preview) {
+            console.log('[Chat] Curriculum preview available')
+            onCurriculumGenerated?.(
+              modules.length > 0 ? { ...data.curriculum_preview, modules } : data.curriculum_preview
+            )
+          }
+
+          // Update suggestions
+          if (data.suggestions && data.suggestions.length > 0) {
+            console.log('[Chat] New suggestions:', data.suggestions)
+            setSuggestions(data.suggestions)
+          }
+        }
+      })
       
     } catch (error) {
       console.error('Chat error:', error)
@@ -114,7 +119,12 @@ export default function CurriculumChat({
         content: 'Sorry, I encountered an error. Please try again or try rephrasing your request.',
         timestamp: new Date()
       }
-      setMessages(prev => [...prev, errorMessage])
+      // Replace the streamed reply placeholder if nothing arrived
+      setMessages(prev => {
+        const last = prev[prev.length - 1]
+        const kept = last?.role === 'assistant' && !last.content ? prev.slice(0, -1) : prev
+        return [...kept, errorMessage]
+      })
     } finally {
       setSending(false)
     }
@@ -30,7 +30,7 @@ export default function PptChat({
   ])
   const [input, setInput] = useState('')
   const [sending, setSending] = useState(false)
-  const [context, setContext] = useState<any>({})
+  const [conversationId, setConversationId] = useState<string | null>(null)
   const [suggestions, setSuggestions] = useState<string[]>([
     "Professional blue theme with all modules",
     "Focus on hands-on practice slides",
@@ -62,11 +62,11 @@ export default function PptChat({
 
     try {
       // Call backend PPT chat API
+      // The conversation state is kept server-side; send only the new message
       const response = await axios.post(`${API_URL}/api/outputs/ppt-chat`, {
         curriculum_id: curriculumId,
-        message: textToSend,
-        conversation_history: messages,
-        current_context: context
+        conversation_id: conversationId,
+        message: textToSend
       })
 
       const assistantMessage: Message = {
@@ -79,9 +79,9 @@ export default function PptChat({
       
       console.log('[PPT Chat] Response:', response.data)
       
-      // Update context
-      if (response.data.current_context) {
-        setContext(response.data.current_context)
+      // Keep the conversation id
+      if (response.data.conversation_id) {
+        setConversationId(response.data.conversation_id)
       }
       
       // Update suggestions
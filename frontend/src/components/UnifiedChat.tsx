@@ -74,9 +74,9 @@ export default function UnifiedChat({
       // Call appropriate backend chat API
       const response = await axios.post(`${API_URL}${endpoint}`, {
         rfp_id: rfpId,
+        conversation_id: context.conversation_id,
         message: textToSend,
-        conversation_history: messages,
-        current_context: { ...context, task_type: taskType }
+        current_context: { task_type: taskType }
       })
 
       const assistantMessage: Message = {
@@ -91,7 +91,7 @@ export default function UnifiedChat({
       
       // Update context
       if (response.data.current_context) {
-        setContext({ ...response.data.current_context, task_type: taskType })
+        setContext({ task_type: taskType, conversation_id: response.data.conversation_id })
       }
       
       // Update suggestions
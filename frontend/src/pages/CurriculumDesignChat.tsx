@@ -1,7 +1,8 @@
 import { useEffect, useState } from 'react'
 import { useParams, Link } from 'react-router-dom'
 import { ArrowLeft, CheckSquare, FileText, Eye, EyeOff } from 'lucide-react'
-import { rfpService, clauseService, curriculumService } from '@/services/supabase/database'
+import { rfpService, clauseService } from '@/services/supabase/database'
+import { saveChatCurriculum } from '@/services/api'
 import CurriculumChat from '@/components/CurriculumChat'
 import type { RFP, Clause } from '@/types'
 
@@ -11,6 +12,7 @@ export default function CurriculumDesignChat() {
   const [clauses, setClauses] = useState<Clause[]>([])
   const [selectedClauses, setSelectedClauses] = useState<string[]>([])
   const [curriculumPreview, setCurriculumPreview] = useState<any>(null)
+  const [saveKey, setSaveKey] = useState('')
   const [showPreview, setShowPreview] = useState(false)
   const [loading, setLoading] = useState(true)
   const [saving, setSaving] = useState(false)
@@ -47,6 +49,7 @@ export default function CurriculumDesignChat() {
   const handleCurriculumGenerated = (curriculumData: any) => {
     console.log('[Curriculum Design] Curriculum preview updated:', curriculumData)
     setCurriculumPreview(curriculumData)
+    setSaveKey(crypto.randomUUID())  // One save per preview, however often Save is clicked
     setShowPreview(true)
   }
 
@@ -55,20 +58,14 @@ export default function CurriculumDesignChat() {
 
     setSaving(true)
     try {
-      // Save to database
-      const savedCurriculum = await curriculumService.create({
-        rfp_id: id,
-        title: curriculumPreview.title,
-        description: curriculumPreview.description,
-        status: 'completed',
-        total_duration_minutes: curriculumPreview.total_duration_minutes
-      })
+      // Save to database (curriculum and modules in one transaction)
+      const savedCurriculum = await saveChatCurriculum(id, curriculumPreview, selectedClauses, saveKey)
 
       console.log('[Curriculum Design] Saved:', savedCurriculum)
       alert(`✅ Curriculum "${curriculumPreview.title}" saved successfully!\n\nYou can now generate outputs from it.`)
       
       // Optionally navigate to outputs page
-      // navigate(`/outputs/${savedCurriculum.id}`)
+      // navigate(`/outputs/${savedCurriculum.curriculum_id}`)
     } catch (error) {
       console.error('Error saving curriculum:', error)
       alert('❌ Error saving curriculum. Please try again.')
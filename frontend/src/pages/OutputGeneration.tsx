@@ -7,7 +7,8 @@ import {
   generateStudentManual, 
   generateInstructorManual,
   generateScenarios,
-  generateTestQuestions 
+  generateTestQuestions,
+  waitForOutput
 } from '@/services/api'
 import PptChat from '@/components/PptChat'
 import type { Curriculum, Output } from '@/types'
@@ -56,22 +57,29 @@ export default function OutputGeneration() {
 
     setGenerating(type)
     try {
-      // Create output record
-      const output = await outputService.create({
-        curriculum_id: id,
-        type,
-        title,
-        status: 'generating'
-      })
+      if (type === 'student_manual' || type === 'instructor_manual') {
+        // Background job - the backend creates and updates the output record
+        const job = await generatorFn(id)
+        await loadData()
+        await waitForOutput(job.output_id)
+      } else {
+        // Create output record
+        const output = await outputService.create({
+          curriculum_id: id,
+          type,
+          title,
+          status: 'running'
+        })
 
-      // Generate the file
-      const result = await generatorFn(id)
+        // Generate the content
+        const result = await generatorFn(id)
 
-      // Update output record
-      await outputService.update(output.id, {
-        status: 'ready',
-        file_url: result.url || result.file_url
-      })
+        // Update output record
+        await outputService.update(output.id, {
+          status: 'completed',
+          file_url: result.url || result.file_url
+        })
+      }
 
       // Reload outputs
       await loadData()
@@ -94,22 +102,15 @@ export default function OutputGeneration() {
     setShowPptChat(false)
     
     try {
-      // Create output record
-      const output = await outputService.create({
-        curriculum_id: id,
-        type: 'ppt',
-        title: 'PowerPoint Presentation',
-        status: 'generating'
-      })
-
-      // Generate with customizations
-      const result = await generatePowerPoint(id)
-
-      // Update output record
-      await outputService.update(output.id, {
-        status: 'ready',
-        file_url: result.url || result.file_url
+      // Queue generation with customizations and wait for the job
+      const job = await generatePowerPoint(id, {
+        theme: pptOutline.theme,
+        color_scheme: pptOutline.color_scheme,
+        include_instructor_notes: pptOutline.features?.instructor_notes,
+        include_assessments: pptOutline.features?.assessments
       })
+      await loadData()
+      await waitForOutput(job.output_id)
 
       // Reload outputs
       await loadData()
@@ -232,7 +233,7 @@ export default function OutputGeneration() {
                   <h3 className="font-semibold text-gray-900 mb-1">{outputType.title}</h3>
                   <p className="text-sm text-gray-600 mb-4">{outputType.description}</p>
 
-                  {existingOutput?.status === 'ready' ? (
+                  {existingOutput?.status === 'completed' ? (
                     <a
                       href={existingOutput.file_url}
                       download
@@ -241,7 +242,7 @@ export default function OutputGeneration() {
                       <Download className="w-4 h-4" />
                       Download
                     </a>
-                  ) : existingOutput?.status === 'generating' || isGenerating ? (
+                  ) : existingOutput?.status === 'pending' || existingOutput?.status === 'running' || isGenerating ? (
                     <div className="flex items-center gap-2 text-gray-600 text-sm">
                       <Loader className="w-4 h-4 animate-spin" />
                       Generating...
@@ -257,7 +258,7 @@ export default function OutputGeneration() {
                     </button>
                   )}
 
-                  {existingOutput?.status === 'error' && (
+                  {existingOutput?.status === 'failed' && (
                     <p className="text-xs text-red-600 mt-2">{existingOutput.error_message}</p>
                   )}
                 </div>
@@ -272,7 +273,7 @@ export default function OutputGeneration() {
         <div className="card mt-8">
           <h2 className="text-xl font-bold text-gray-900 mb-4">Generated Files</h2>
           <div className="space-y-3">
-            {outputs.filter(o => o.status === 'ready').map((output) => (
+            {outputs.filter(o => o.status === 'completed').map((output) => (
               <div key={output.id} className="flex items-center justify-between border border-gray-200 rounded-lg p-4">
                 <div className="flex items-center gap-3">
                   <CheckCircle className="w-5 h-5 text-green-600" />
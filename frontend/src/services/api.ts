@@ -1,4 +1,5 @@
 import axios from 'axios'
+import type { Output } from '@/types'
 
 const API_URL = import.meta.env.VITE_BACKEND_API_URL || 'http://localhost:8000'
 
@@ -28,32 +29,64 @@ export const generateCurriculum = async (rfpId: string, clauseIds: string[], sta
   return response.data
 }
 
+// Save a curriculum designed in the chat, with all of its modules
+// clientKey makes retries safe: the same key always returns the first save
+export const saveChatCurriculum = async (
+  rfpId: string,
+  curriculumData: Record<string, any>,
+  selectedClauseIds: string[],
+  clientKey: string
+) => {
+  const response = await api.post('/api/curriculum/generate-from-chat', {
+    rfp_id: rfpId,
+    curriculum_data: curriculumData,
+    selected_clause_ids: selectedClauseIds,
+    client_key: clientKey
+  })
+  return response.data as { success: boolean; curriculum_id: string; created: boolean; message: string }
+}
+
 // Output Generation
-export const generatePowerPoint = async (curriculumId: string) => {
+// PPT and manual generation run as background jobs: the POST returns a
+// pending Output immediately and waitForOutput polls until it finishes.
+export interface OutputJob {
+  success: boolean
+  output_id: string
+  status: Output['status']
+  output: Output
+}
+
+export const waitForOutput = async (outputId: string, intervalMs: number = 1000) => {
+  while (true) {
+    const response = await api.get(`/api/outputs/${outputId}`)
+    const output = response.data as Output
+    if (output.status === 'completed' || output.status === 'failed') {
+      return output
+    }
+    await new Promise(resolve => setTimeout(resolve, intervalMs))
+  }
+}
+
+export const generatePowerPoint = async (curriculumId: string, customizations?: Record<string, any>) => {
   const response = await api.post('/api/outputs/generate-ppt', {
-    curriculum_id: curriculumId
-  }, {
-    responseType: 'blob'
+    curriculum_id: curriculumId,
+    customizations
   })
-  return response.data
+  return response.data as OutputJob
 }
 
 export const generateStudentManual = async (curriculumId: string) => {
   const response = await api.post('/api/outputs/generate-student-manual', {
     curriculum_id: curriculumId
-  }, {
-    responseType: 'blob'
   })
-  return response.data
+  return response.data as OutputJob
 }
 
 export const generateInstructorManual = async (curriculumId: string) => {
   const response = await api.post('/api/outputs/generate-instructor-manual', {
     curriculum_id: curriculumId
-  }, {
-    responseType: 'blob'
   })
-  return response.data
+  return response.data as OutputJob
 }
 
 export const generateScenarios = async (curriculumId: string, count: number = 5) => {
@@ -72,5 +105,61 @@ export const generateTestQuestions = async (curriculumId: string, count: number
   return response.data
 }
 
+// Generate all deliverables in parallel and bundle them into one ZIP
+export const generateAllDeliverables = async (curriculumId: string, customizations?: Record<string, any>) => {
+  const response = await api.post('/api/outputs/generate-all', {
+    curriculum_id: curriculumId,
+    customizations
+  })
+  return response.data as {
+    success: boolean
+    output: Output
+    file_url: string
+    timings: Record<string, number>
+    total_ms: number
+  }
+}
+
+// Chat streaming
+// POSTs to a Server-Sent Events chat endpoint (e.g. /api/curriculum/chat/stream)
+// and calls onEvent for each event ('message', 'module', 'outline', 'done', 'error')
+export const streamChat = async (
+  path: string,
+  body: Record<string, unknown>,
+  onEvent: (event: string, data: any) => void
+) => {
+  const response = await fetch(`${API_URL}${path}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body)
+  })
+  if (!response.ok || !response.body) {
+    throw new Error(`Chat request failed with status ${response.status}`)
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+
+    let boundary = buffer.indexOf('\n\n')
+    while (boundary !== -1) {
+      const frame = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      let event = 'message'
+      let data = ''
+      for (const line of frame.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7)
+        else if (line.startsWith('data: ')) data += line.slice(6)
+      }
+      if (data) onEvent(event, JSON.parse(data))
+      boundary = buffer.indexOf('\n\n')
+    }
+  }
+}
+
 export default api
 
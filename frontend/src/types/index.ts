@@ -100,11 +100,14 @@ export interface Curriculum {
 export interface Output {
   id: string
   curriculum_id: string
-  type: 'ppt' | 'student_manual' | 'instructor_manual' | 'scenario' | 'test'
+  type: 'ppt' | 'student_manual' | 'instructor_manual' | 'scenario' | 'test' | 'bundle'
   title: string
-  status: 'pending' | 'generating' | 'ready' | 'error'
+  status: 'pending' | 'running' | 'completed' | 'failed'
   file_url?: string
   error_message?: string
+  started_at?: string
+  completed_at?: string
+  duration_ms?: number
   created_at: string
   updated_at: string
 }
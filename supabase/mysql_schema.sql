@@ -4,6 +4,8 @@
 -- Drop existing tables if they exist (BE CAREFUL - this deletes data!)
 -- Uncomment these lines if you want to start fresh:
 -- DROP TABLE IF EXISTS outputs;
+-- DROP TABLE IF EXISTS conversations;
+-- DROP TABLE IF EXISTS question_bank;
 -- DROP TABLE IF EXISTS scenarios;
 -- DROP TABLE IF EXISTS curriculum_modules;
 -- DROP TABLE IF EXISTS curricula;
@@ -61,10 +63,13 @@ CREATE TABLE IF NOT EXISTS curricula (
     description TEXT,
     status VARCHAR(50) DEFAULT 'draft',
     total_duration_minutes INT,
+    client_key VARCHAR(64) UNIQUE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (rfp_id) REFERENCES rfps(id) ON DELETE CASCADE
 );
+-- Existing databases get the client_key column and its unique index from
+-- app/migrations.py at startup
 
 -- Curriculum Modules Table
 CREATE TABLE IF NOT EXISTS curriculum_modules (
@@ -92,10 +97,15 @@ CREATE TABLE IF NOT EXISTS outputs (
     status VARCHAR(50) DEFAULT 'pending',
     file_url TEXT,
     error_message TEXT,
+    started_at TIMESTAMP NULL,
+    completed_at TIMESTAMP NULL,
+    duration_ms INT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (curriculum_id) REFERENCES curricula(id) ON DELETE CASCADE
 );
+-- Existing databases get the job timing columns (and old generating/ready/error
+-- statuses renamed to running/completed/failed) from app/migrations.py at startup
 
 -- Scenarios Table
 CREATE TABLE IF NOT EXISTS scenarios (
@@ -113,12 +123,39 @@ CREATE TABLE IF NOT EXISTS scenarios (
     FOREIGN KEY (curriculum_id) REFERENCES curricula(id) ON DELETE CASCADE
 );
 
+-- Question Bank Table
+CREATE TABLE IF NOT EXISTS question_bank (
+    id VARCHAR(36) PRIMARY KEY DEFAULT (UUID()),
+    question TEXT NOT NULL,
+    type VARCHAR(50) NOT NULL,
+    options JSON,
+    correct_answer TEXT NOT NULL,
+    points INT DEFAULT 4,
+    learning_objective VARCHAR(255) NOT NULL,
+    topic VARCHAR(100) NOT NULL,
+    difficulty VARCHAR(50) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Chat Conversations Table (used when CONVERSATION_STORE=mysql)
+CREATE TABLE IF NOT EXISTS conversations (
+    id VARCHAR(36) PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    owner_id VARCHAR(36),
+    context JSON,
+    history JSON,
+    updated_at TIMESTAMP NOT NULL
+);
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_clauses_rfp_id ON clauses(rfp_id);
 CREATE INDEX IF NOT EXISTS idx_curricula_rfp_id ON curricula(rfp_id);
 CREATE INDEX IF NOT EXISTS idx_curriculum_modules_curriculum_id ON curriculum_modules(curriculum_id);
 CREATE INDEX IF NOT EXISTS idx_outputs_curriculum_id ON outputs(curriculum_id);
 CREATE INDEX IF NOT EXISTS idx_scenarios_curriculum_id ON scenarios(curriculum_id);
+CREATE INDEX IF NOT EXISTS idx_question_bank_topic_difficulty ON question_bank(topic, difficulty);
+CREATE INDEX IF NOT EXISTS idx_question_bank_learning_objective ON question_bank(learning_objective);
+CREATE INDEX IF NOT EXISTS ix_conversations_updated_at ON conversations(updated_at);
 
 -- Show all tables
 SHOW TABLES;